@@ -0,0 +1,83 @@
+"""Memory and allocation benchmark for holding many parsed formulas.
+
+Constructs N Expression objects and reports the bytes and allocated blocks
+held per instance, first right after construction (nothing computed yet)
+and then after the lazy attributes have been touched. The baseline is
+EagerExpression, which has the layout of the original class: an instance
+__dict__, and type, validity and simplification computed in __init__. The
+ratio column compares each phase to it.
+
+    $ python -m benchmarks.bench_memory --count 200000
+"""
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+
+from graphalith.expression import Expression
+
+
+class EagerExpression(Expression):
+    """Baseline: no __slots__ (so every instance has a __dict__), and everything computed in __init__"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.__dict__.update(type = self.type, valid = self.valid, simplified = self.simplified)
+
+
+def generate_formulas(count: int, seed: int = 0) -> list:
+    """Generates `count` distinct small formulas"""
+    rng = random.Random(seed)
+    return [f"({rng.randint(0, 999)} + x{i % 97}) * {rng.randint(1, 99)} - {i}" for i in range(count)]
+
+def measure(build, count: int) -> tuple:
+    """Runs build() under tracemalloc and returns (bytes, blocks) retained per item"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del held
+    return size / count, blocks / count
+
+def main(argv = None) -> dict:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--count", type = int, default = 200000)
+    args = parser.parse_args(argv)
+
+    formulas = generate_formulas(args.count)
+
+    def construct():
+        return [Expression(value = formula) for formula in formulas]
+
+    def construct_eager():
+        return [EagerExpression(value = formula) for formula in formulas]
+
+    def construct_and_touch():
+        expressions = construct()
+        for expression in expressions:
+            expression.type
+            expression.valid
+        return expressions
+
+    results = {"eager (baseline)": measure(construct_eager, args.count),
+               "construct": measure(construct, args.count),
+               "construct+type+valid": measure(construct_and_touch, args.count)}
+
+    sample = Expression(value = formulas[0])
+    print(f"{args.count} formulas, Expression has __dict__: {hasattr(sample, '__dict__')}, "
+          f"sizeof: {sys.getsizeof(sample)} bytes")
+    baseline = results["eager (baseline)"][0]
+    for phase, (size, blocks) in results.items():
+        print(f"  {phase:<22} {size:8.1f} bytes/formula {blocks:6.2f} blocks/formula {size / baseline:6.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Parallel evaluation benchmark: one huge expression, sequential versus a process pool.
+
+For each size, generates a long sum of nested terms, compiles it once and
+times sequential evaluation on the interpreter against ParallelEvaluator
+(planning and pool start-up are reported separately from evaluation).
+
+    $ python -m benchmarks.bench_parallel --sizes 10000 100000 1000000 --jobs 8
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.timing import best
+from benchmarks.workloads import BINDINGS
+from graphalith.cache import compile_expression
+from graphalith.parallel import ParallelEvaluator
+
+
+def huge_expression(instructions: int, seed: int = 0) -> str:
+    """Returns a sum of random nested terms compiling to about `instructions` instructions"""
+    rng = random.Random(seed)
+    terms = []
+    for _ in range(max(1, instructions // 12)):
+        a, b, c = rng.randint(1, 9), rng.randint(1, 9), rng.random()
+        terms.append(f"({a} * x - {b} / [y + {c:.3f}] * z)")
+    return " + ".join(terms)
+
+def main(argv = None) -> list:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [10000, 100000, 1000000], help = "instructions per expression")
+    parser.add_argument("--jobs", type = int, default = os.cpu_count() or 1)
+    parser.add_argument("--repeat", type = int, default = 3)
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} CPUs, {args.jobs} jobs")
+    print(f"{'instructions':>12} {'sequential':>11} {'plan':>9} {'parallel':>10} {'speedup':>8}")
+    results = []
+    for size in args.sizes:
+        compiled = compile_expression(huge_expression(size)).with_backend("interpreter")
+        sequential = best(lambda: compiled.evaluate(**BINDINGS), args.repeat)
+
+        start = time.perf_counter()
+        evaluator = ParallelEvaluator(compiled, jobs = args.jobs, threshold = 0)
+        plan = time.perf_counter() - start
+        with evaluator:
+            assert evaluator.evaluate(**BINDINGS) == compiled.evaluate(**BINDINGS)  # also starts the pool
+            parallel = best(lambda: evaluator.evaluate(**BINDINGS), args.repeat)
+
+        results.append({"instructions": len(compiled), "sequential": sequential, "plan": plan,
+                        "parallel": parallel, "speedup": sequential / parallel})
+        print(f"{len(compiled):>12} {sequential * 1e3:>9.1f}ms {plan * 1e3:>7.1f}ms {parallel * 1e3:>8.1f}ms "
+              f"{sequential / parallel:>7.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Serialization benchmark: archive reload versus re-parsing from text.
+
+Compiles N generated formulas, writes them to an archive and compares, per
+formula, the time to load them back (all, or one at random) against
+compiling from source, and the archive size against pickled Node trees.
+
+    $ python -m benchmarks.bench_serialize --count 20000
+"""
+import argparse
+import os
+import pickle
+import random
+import tempfile
+
+from benchmarks.timing import timed
+from benchmarks.workloads import Workload, generate
+from graphalith.cache import CACHE, compile_expression
+from graphalith.lexer import normalize, tokenize
+from graphalith.parser import parse
+from graphalith.serialize import Archive, write_archive
+
+
+def main(argv = None) -> dict:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--count", type = int, default = 20000)
+    parser.add_argument("--length", type = int, default = 32, help = "operands per formula")
+    args = parser.parse_args(argv)
+
+    texts = [normalize(text) for text in generate(Workload("serialize", length = args.length, depth = 3, count = args.count))]
+    compiled = [compile_expression(text) for text in texts]
+    path = os.path.join(tempfile.mkdtemp(), "formulas.glx")
+
+    # Compiling through an empty cache measures the full parse and compile of every formula
+    CACHE.clear()
+    results = {"parse": timed(lambda: [compile_expression(text) for text in texts]),
+               "write": timed(lambda: write_archive(path, compiled))}
+
+    def load_all():
+        with Archive(path) as archive:
+            list(archive)
+
+    def load_one():
+        with Archive(path) as archive:
+            archive[random.randrange(len(archive))]
+
+    results["load_all"] = timed(load_all)
+    results["open_and_load_one"] = timed(load_one)
+    results["archive_bytes"] = os.path.getsize(path)
+    results["pickled_nodes_bytes"] = len(pickle.dumps([parse(tokenize(text)) for text in texts[:1000]])) * args.count / 1000
+
+    print(f"{args.count} formulas of {args.length} operands")
+    print(f"  compile from text   {results['parse'] * 1e6 / args.count:8.2f} us/formula")
+    print(f"  load from archive   {results['load_all'] * 1e6 / args.count:8.2f} us/formula")
+    print(f"  open + load one     {results['open_and_load_one'] * 1e3:8.3f} ms")
+    print(f"  archive             {results['archive_bytes'] / args.count:8.1f} bytes/formula")
+    print(f"  pickled Node trees  {results['pickled_nodes_bytes'] / args.count:8.1f} bytes/formula")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Cold start benchmark for the one-shot CLI, with a time budget.
+
+Shell pipelines run `graphalith -e ...` once per expression, so interpreter
+start-up plus imports dominate. This measures, in fresh interpreters:
+
+    import       cumulative `-X importtime` of graphalith.cli
+    startup      wall time of `python -m graphalith -e "1 + 2"`, minus that of `python -c pass`
+
+Each is the best of --repeat runs. The exit status is 1 when either exceeds
+its budget, so the benchmark can gate CI:
+
+    $ python -m benchmarks.bench_startup --import-budget-ms 75 --startup-budget-ms 150
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import graphalith
+
+# Defaults leave headroom over a typical cold import of graphalith.cli (~40ms)
+IMPORT_BUDGET_MS = 75.0
+STARTUP_BUDGET_MS = 150.0
+
+
+def _environment() -> dict:
+    """Returns the environment for child interpreters, with this checkout importable"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(graphalith.__file__)))
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [root, environment.get("PYTHONPATH")]))
+    return environment
+
+def import_time(module: str = "graphalith.cli") -> float:
+    """Returns the cumulative import time of `module` in a fresh interpreter, in seconds"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output = True, text = True, env = _environment(), check = True)
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    raise RuntimeError(f"import_time: no -X importtime entry for {module}")
+
+def wall_time(arguments: list) -> float:
+    """Returns the wall time of running the interpreter with `arguments`, in seconds"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *arguments], stdout = subprocess.DEVNULL, env = _environment(), check = True)
+    return time.perf_counter() - start
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--import-budget-ms", type = float, default = IMPORT_BUDGET_MS)
+    parser.add_argument("--startup-budget-ms", type = float, default = STARTUP_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    imports = min(import_time() for _ in range(args.repeat))
+    interpreter = min(wall_time(["-c", "pass"]) for _ in range(args.repeat))
+    startup = min(wall_time(["-m", "graphalith", "-e", "1 + 2"]) for _ in range(args.repeat)) - interpreter
+
+    failed = False
+    print(f"{'phase':<10} {'best':>9} {'budget':>9}")
+    for name, seconds, budget in [("import", imports, args.import_budget_ms),
+                                  ("startup", startup, args.startup_budget_ms)]:
+        over = seconds * 1e3 > budget
+        failed |= over
+        print(f"{name:<10} {seconds * 1e3:>7.1f}ms {budget:>7.1f}ms{'  OVER BUDGET' if over else ''}")
+    print(f"(interpreter alone: {interpreter * 1e3:.1f}ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Benchmark suite over generated workloads, with JSON baselines.
+
+Each workload (see benchmarks/workloads.py) is timed phase by phase:
+
+    tokenize     tokenize() of the raw text
+    validate     Expression(...).valid on a fresh expression (format, tokenize, then operator, operand,
+                 delimiter and division-by-zero checks)
+    parse        parse() of already tokenized text into a node tree
+    evaluate     run() of an already compiled program
+    end_to_end   Expression(...).evaluation with the compile cache cleared
+
+Each phase reports the best of --repeat runs (asv style) as seconds per
+batch, expressions/s and MB/s of source text. Peak traced memory is
+measured over one end-to-end pass per workload.
+
+    $ python -m benchmarks.bench_suite --save baseline.json
+    $ python -m benchmarks.bench_suite --compare baseline.json --threshold 1.2
+
+With --compare the exit status is 1 when any phase is slower than the
+baseline by more than the threshold factor.
+"""
+import argparse
+import datetime
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+
+from benchmarks.timing import best
+from benchmarks.workloads import BINDINGS, WORKLOADS, Workload, generate
+from graphalith.cache import CACHE, compile_expression
+from graphalith.expression import Expression
+from graphalith.lexer import tokenize
+from graphalith.parser import parse
+
+PHASES = ("tokenize", "validate", "parse", "evaluate", "end_to_end")
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _phases(expressions: list) -> dict:
+    """Returns a callable per phase that processes the whole batch once"""
+    streams = [tokenize(text) for text in expressions]
+    programs = []
+    for text in expressions:
+        compiled = compile_expression(text)
+        programs.append((compiled, tuple(BINDINGS[name] for name in compiled.variables)))
+
+    def run_tokenize():
+        for text in expressions:
+            tokenize(text)
+
+    def run_validate():
+        for text in expressions:
+            Expression(value = text).valid
+
+    def run_parse():
+        for tokens in streams:
+            parse(tokens)
+
+    def run_evaluate():
+        for compiled, values in programs:
+            compiled.run(values)
+
+    def run_end_to_end():
+        CACHE.clear()
+        for text in expressions:
+            Expression(value = text).evaluation
+
+    return {"tokenize": run_tokenize,
+            "validate": run_validate,
+            "parse": run_parse,
+            "evaluate": run_evaluate,
+            "end_to_end": run_end_to_end}
+
+def _peak_memory(function) -> int:
+    """Returns the peak traced memory of one call in bytes"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _commit() -> str:
+    """Returns the current git commit, or an empty string outside a checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output = True, text = True).stdout.strip()
+    except OSError:
+        return ""
+
+
+######################################
+#                 API                #
+######################################
+
+def run_workload(workload: Workload, repeat: int = 5) -> dict:
+    """Benchmarks every phase of one workload
+    Returns: Dictionary of phase results and peak memory"""
+    expressions = generate(workload)
+    size = sum(map(len, expressions)) / 1e6
+    phases = _phases(expressions)
+
+    results = {}
+    for phase in PHASES:
+        seconds = best(phases[phase], repeat)
+        results[phase] = {"seconds": seconds,
+                          "expressions_per_second": len(expressions) / seconds,
+                          "mb_per_second": size / seconds}
+
+    CACHE.clear()
+    return {"parameters": workload._asdict(),
+            "phases": results,
+            "peak_memory_bytes": _peak_memory(phases["end_to_end"])}
+
+def run_suite(workloads: list, repeat: int = 5) -> dict:
+    """Benchmarks a list of workloads
+    Returns: Dictionary ready to be saved as a JSON baseline"""
+    return {"meta": {"commit": _commit(),
+                     "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec = "seconds"),
+                     "python": platform.python_version(),
+                     "machine": platform.machine(),
+                     "repeat": repeat},
+            "workloads": {workload.name: run_workload(workload, repeat) for workload in workloads}}
+
+def compare(current: dict, baseline: dict, threshold: float = 1.2) -> list:
+    """Compares two suite results phase by phase
+    Returns: List of (workload, phase, ratio, regressed) with ratio = current / baseline time"""
+    rows = []
+    for name, result in current["workloads"].items():
+        # Only identical workloads are comparable (count and seed included)
+        previous = baseline["workloads"].get(name)
+        if previous is None or previous["parameters"] != result["parameters"]:
+            continue
+        for phase, timing in result["phases"].items():
+            before = previous["phases"].get(phase)
+            if before is None or before["seconds"] <= 0:
+                continue
+            ratio = timing["seconds"] / before["seconds"]
+            rows.append((name, phase, ratio, ratio > threshold))
+        ratio = result["peak_memory_bytes"] / max(previous["peak_memory_bytes"], 1)
+        rows.append((name, "peak_memory", ratio, ratio > threshold))
+    return rows
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--workload", action = "append", help = "run only the named workload(s)")
+    parser.add_argument("--repeat", type = int, default = 5, help = "timed runs per phase, best is kept")
+    parser.add_argument("--scale", type = float, default = 1.0, help = "multiply every workload's expression count")
+    parser.add_argument("--save", metavar = "PATH", help = "write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar = "PATH", help = "compare against a saved JSON baseline")
+    parser.add_argument("--threshold", type = float, default = 1.2, help = "slowdown factor counted as a regression")
+    args = parser.parse_args(argv)
+
+    workloads = [workload._replace(count = max(1, int(workload.count * args.scale))) for workload in WORKLOADS
+                 if not args.workload or workload.name in args.workload]
+    results = run_suite(workloads, args.repeat)
+
+    for name, result in results["workloads"].items():
+        print(f"{name}  (peak {result['peak_memory_bytes'] / 1024:.0f} KiB)")
+        for phase, timing in result["phases"].items():
+            print(f"  {phase:<12} {timing['seconds'] * 1e3:10.3f} ms {timing['expressions_per_second']:12.0f} expr/s "
+                  f"{timing['mb_per_second']:8.2f} MB/s")
+
+    if args.save:
+        with open(args.save, "w", encoding = "utf8") as output:
+            json.dump(results, output, indent = 2)
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding = "utf8") as baseline:
+            rows = compare(results, json.load(baseline), args.threshold)
+        print(f"\ncompared with {args.compare} (threshold {args.threshold}x)")
+        for name, phase, ratio, regressed in rows:
+            print(f"  {name:<18} {phase:<12} {ratio:6.2f}x {'REGRESSION' if regressed else ''}")
+            status |= regressed
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
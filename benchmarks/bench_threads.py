@@ -0,0 +1,59 @@
+"""Thread scaling benchmark: one shared compiled expression evaluated on 1..N threads.
+
+Two paths, each timed per thread count with the speedup over one thread:
+
+    rows      evaluate_rows over binding mappings; pure Python, so it only
+              scales on a free-threaded CPython build (python3.13t and later)
+    columns   evaluate_columns over NumPy arrays; the ufuncs release the GIL,
+              so it scales on any build once slices are large enough
+
+The header says whether the GIL is enabled, since that decides how the rows path can scale.
+
+    $ python -m benchmarks.bench_threads --threads 1 2 4 8 --rows 200000 --columns 4000000
+"""
+import argparse
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+from benchmarks.timing import best
+from graphalith.cache import compile_expression
+from graphalith.threads import evaluate_columns, evaluate_rows, gil_enabled
+
+EXPRESSION = "(x - 1) * [y + 2.5] / {x * x + 1} - (y * 3 - x) / (y * y + 4)"
+
+
+def main(argv = None) -> list:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--threads", type = int, nargs = "+", default = [1, 2, 4, 8])
+    parser.add_argument("--rows", type = int, default = 200000, help = "bindings for the rows path")
+    parser.add_argument("--columns", type = int, default = 4000000, help = "array length for the columns path")
+    parser.add_argument("--repeat", type = int, default = 3)
+    args = parser.parse_args(argv)
+
+    compiled = compile_expression(EXPRESSION)
+    compiled.evaluate(x = 0, y = 0)
+    rng = random.Random(0)
+    rows = [{"x": rng.random(), "y": rng.random()} for _ in range(args.rows)]
+    x = numpy.random.default_rng(0).random(args.columns)
+    y = numpy.random.default_rng(1).random(args.columns)
+
+    print(f"{os.cpu_count()} CPUs, GIL {'enabled' if gil_enabled() else 'disabled'}")
+    print(f"{'path':<8} {'threads':>7} {'time':>10} {'speedup':>8}")
+    results = []
+    for path, run in [("rows", lambda pool, threads: evaluate_rows(compiled, rows, executor = pool)),
+                      ("columns", lambda pool, threads: evaluate_columns(compiled, jobs = threads, executor = pool, x = x, y = y))]:
+        baseline = None
+        for threads in args.threads:
+            with ThreadPoolExecutor(threads) as pool:
+                seconds = best(lambda: run(pool, threads), args.repeat)
+            baseline = baseline or seconds
+            results.append({"path": path, "threads": threads, "seconds": seconds, "speedup": baseline / seconds})
+            print(f"{path:<8} {threads:>7} {seconds * 1e3:>8.1f}ms {baseline / seconds:>7.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Load generator for the evaluation server.
+
+Starts `python -m graphalith.server` on a free loopback port (or connects
+to --host/--port), opens --connections clients that each keep
+--concurrency pipelined requests in flight, and reports client-side
+p50/p90/p99 latency and throughput, followed by the server's own counters.
+
+    $ python -m benchmarks.loadgen --requests 20000 --connections 8 --concurrency 32
+    $ python -m benchmarks.loadgen --port 8765 --workload long
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks.workloads import BINDINGS, WORKLOADS, generate
+from graphalith.client import AsyncClient
+
+
+def percentile(samples: list, percent: float) -> float:
+    """Returns the nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(percent / 100 * len(samples)) - 1))
+    return samples[index]
+
+def start_server(jobs: int, max_batch: int, max_delay: float) -> tuple:
+    """Starts a server subprocess on a free port
+    Returns: (process, host, port)"""
+    process = subprocess.Popen([sys.executable, "-m", "graphalith.server", "--port", "0", "--jobs", str(jobs),
+                                "--max-batch", str(max_batch), "--max-delay", str(max_delay)],
+                               stdout = subprocess.PIPE, text = True)
+    banner = process.stdout.readline().strip()
+    if not banner:
+        process.kill()
+        raise RuntimeError("loadgen: server did not start")
+    host, port = banner.rsplit(" ", 1)[1].rsplit(":", 1)
+    return process, host, int(port)
+
+async def run_load(host: str, port: int, expressions: list, requests: int, connections: int, concurrency: int) -> dict:
+    """Sends `requests` evaluations spread over the connections
+    Returns: Dictionary of client-side results and the server stats"""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(client: AsyncClient):
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.request({"id": i, "expression": expressions[i % len(expressions)], "bindings": BINDINGS})
+            latencies.append(time.perf_counter() - start)
+            errors += response.get("error") is not None
+
+    clients = [await AsyncClient.connect(host, port) for _ in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = await clients[0].stats()
+    for client in clients:
+        await client.close()
+
+    latencies.sort()
+    return {"requests": len(latencies),
+            "errors": errors,
+            "seconds": elapsed,
+            "requests_per_second": len(latencies) / elapsed,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+            "server": stats}
+
+def main(argv = None) -> dict:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--host", default = "127.0.0.1", help = "server address when --port is given")
+    parser.add_argument("--port", type = int, help = "use a running server instead of starting one")
+    parser.add_argument("--requests", type = int, default = 10000)
+    parser.add_argument("--connections", type = int, default = 4)
+    parser.add_argument("--concurrency", type = int, default = 16, help = "requests in flight per connection")
+    parser.add_argument("--workload", default = "short", choices = [workload.name for workload in WORKLOADS])
+    parser.add_argument("--jobs", type = int, default = 2, help = "worker processes of the started server")
+    parser.add_argument("--max-batch", type = int, default = 256)
+    parser.add_argument("--max-delay", type = float, default = 0.002)
+    parser.add_argument("--json", action = "store_true", help = "print the results as JSON")
+    args = parser.parse_args(argv)
+
+    workload = next(workload for workload in WORKLOADS if workload.name == args.workload)
+    expressions = generate(workload)
+
+    process = None
+    host, port = args.host, args.port
+    if port is None:
+        process, host, port = start_server(args.jobs, args.max_batch, args.max_delay)
+    try:
+        results = asyncio.run(run_load(host, port, expressions, args.requests, args.connections, args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(results, indent = 2))
+    else:
+        print(f"{results['requests']} requests in {results['seconds']:.2f} s "
+              f"({results['requests_per_second']:.0f} req/s, {results['errors']} errors)")
+        print("latency  " + "  ".join(f"{key} {results[key] * 1e3:.2f} ms" for key in ("p50", "p90", "p99", "max")))
+        server = results["server"]
+        print(f"server   {server['batches']} batches, mean batch {server['mean_batch']:.1f}, "
+              f"p50 {server['latency']['p50'] * 1e3:.2f} ms, p99 {server['latency']['p99'] * 1e3:.2f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    main()
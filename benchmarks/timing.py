@@ -0,0 +1,13 @@
+"""Wall-clock timing helpers shared by the benchmarks."""
+import time
+
+
+def timed(function) -> float:
+    """Returns the wall time of one call in seconds"""
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def best(function, repeat: int) -> float:
+    """Returns the best wall time of `repeat` calls in seconds"""
+    return min(timed(function) for _ in range(repeat))
@@ -0,0 +1,78 @@
+"""Generated expression workloads for the benchmark suite.
+
+A workload is a reproducible batch of random expressions controlled by
+operand count (length), delimiter nesting depth, operator mix and the
+delimiters used for grouping. Every expression is valid, and the numbers
+are nonzero fractions, so evaluation never divides by an exact zero.
+"""
+import random
+from typing import NamedTuple
+
+######################################
+#            CONSTANTS               #
+######################################
+
+VARIABLES = ("a", "b", "c", "x", "y", "z")
+BINDINGS = {name: 1.25 + i for i, name in enumerate(VARIABLES)}
+DELIMITER_PAIRS = {"(": ")", "[": "]", "{": "}"}
+
+
+class Workload(NamedTuple):
+    """Parameters of one generated batch of expressions"""
+    name: str
+    length: int                 # operands per expression
+    depth: int                  # nesting depth of delimiter groups
+    operators: str = "+-*/"
+    delimiters: str = "("       # opening delimiters to choose from
+    count: int = 200            # expressions in the batch
+    seed: int = 0
+
+
+# The default grid: size, depth, operator mix and delimiter variety each vary on their own
+WORKLOADS = [Workload("short", length = 8, depth = 2),
+             Workload("medium", length = 64, depth = 4),
+             Workload("long", length = 1024, depth = 8, count = 20),
+             Workload("deep", length = 256, depth = 120, count = 20),
+             Workload("additive", length = 64, depth = 4, operators = "+-"),
+             Workload("multiplicative", length = 64, depth = 4, operators = "*/"),
+             Workload("mixed-delimiters", length = 64, depth = 4, delimiters = "([{")]
+
+
+######################################
+#                 API                #
+######################################
+
+def generate_expression(rng: random.Random, length: int, depth: int, operators: str = "+-*/", delimiters: str = "(") -> str:
+    """Generates one valid expression with `length` operands and `depth` nested groups"""
+    depth = min(depth, length)
+
+    # Nested groups: opening positions rise while closing positions fall
+    opens = sorted(rng.randrange(0, (length + 1) // 2) for _ in range(depth))
+    closes = sorted((rng.randrange(length // 2, length) for _ in range(depth)), reverse = True)
+
+    prefix = [""] * length
+    suffix = [""] * length
+    for start, end in zip(opens, closes):
+        opener = rng.choice(delimiters)
+        prefix[start] += opener
+        suffix[end] = DELIMITER_PAIRS[opener] + suffix[end]
+
+    parts = []
+    for i in range(length):
+        if i:
+            parts.append(f" {rng.choice(operators)} ")
+        if rng.random() < 0.5:
+            operand = rng.choice(VARIABLES)
+        else:
+            operand = f"{rng.randint(1, 999)}.{rng.randint(1, 99)}"
+        if rng.random() < 0.05:
+            operand = "-" + operand
+        parts.append(prefix[i] + operand + suffix[i])
+    return "".join(parts)
+
+def generate(workload: Workload) -> list:
+    """Generates the expressions of a workload (deterministic for its seed)
+    Returns: List of strings"""
+    rng = random.Random(workload.seed)
+    return [generate_expression(rng, workload.length, workload.depth, workload.operators, workload.delimiters)
+            for _ in range(workload.count)]
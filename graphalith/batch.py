@@ -0,0 +1,121 @@
+"""
+graphalith batch module.
+
+Streams expressions through the evaluator in fixed-size chunks, optionally
+fanning the chunks out to a process pool. Results come back in input order
+and only a bounded window of chunks is ever in flight, so memory stays
+constant however large the input is.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Optional
+import json
+import math
+
+from graphalith.cache import compile_expression
+from graphalith.numeric import NumericMode
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+DEFAULT_CHUNK_SIZE = 1024
+
+CSV_HEADER = "line,expression,value,error"
+
+# Chunks in flight per worker process
+WINDOW_PER_JOB = 2
+
+
+class Result(NamedTuple):
+    """Outcome of evaluating one input line"""
+    line: int
+    expression: str
+    value: Optional[float]
+    error: Optional[str]
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _chunks(lines: Iterable[str], chunk_size: int) -> Iterator[list]:
+    """Groups non-blank lines into chunks of (line number, expression) pairs"""
+    numbered = ((number, line.strip()) for number, line in enumerate(lines, 1))
+    numbered = (pair for pair in numbered if pair[1])
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _csv_field(text: str) -> str:
+    """Quotes a CSV field when it contains separators or quotes"""
+    if any(ch in text for ch in ',"\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+######################################
+#                 API                #
+######################################
+
+def evaluate_line(number: int, expression: str, mode = NumericMode.FLOAT) -> Result:
+    """Evaluates one expression, capturing any error instead of raising
+    Returns: Result"""
+    try:
+        return Result(number, expression, compile_expression(expression, mode).evaluate(), None)
+    except Exception as error:
+        return Result(number, expression, None, f"{type(error).__name__}: {error}")
+
+def evaluate_chunk(chunk: list, mode = NumericMode.FLOAT) -> list:
+    """Evaluates a chunk of (line number, expression) pairs (runs in worker processes)
+    Returns: List of Results"""
+    return [evaluate_line(number, expression, mode) for number, expression in chunk]
+
+def stream_results(lines: Iterable[str], jobs: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   mode = NumericMode.FLOAT) -> Iterator[Result]:
+    """Evaluates every non-blank line, yielding results in input order
+    With jobs > 1 chunks are evaluated in a process pool, keeping at most
+    jobs * WINDOW_PER_JOB chunks in flight."""
+    chunks = _chunks(lines, chunk_size)
+
+    if jobs <= 1:
+        for chunk in chunks:
+            yield from evaluate_chunk(chunk, mode)
+        return
+
+    with ProcessPoolExecutor(max_workers = jobs) as pool:
+        pending: deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(evaluate_chunk, chunk, mode))
+            if len(pending) >= jobs * WINDOW_PER_JOB:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def json_value(value):
+    """Converts a result to a JSON-compatible value (exact modes and non-finite floats become strings)
+    EX: json_value(float("inf")) -> "inf"
+    Returns: None, int, finite float or string"""
+    if value is None or isinstance(value, int) or (isinstance(value, float) and math.isfinite(value)):
+        return value
+    return str(value)
+
+def format_result(result: Result, output_format: str = "csv") -> str:
+    """Formats a result as a CSV row or a JSON line (without the newline)
+    Returns: String"""
+    if output_format == "json":
+        return json.dumps(result._replace(value = json_value(result.value))._asdict(), allow_nan = False)
+
+    value = result.value
+    if value is not None and not isinstance(value, (int, float)):
+        # Exact modes (Fraction, Decimal) are written as their string form
+        value = str(value)
+
+    field = "" if value is None else str(value)
+    error = "" if result.error is None else result.error
+    return ",".join([str(result.line), _csv_field(result.expression), field, _csv_field(error)])
@@ -0,0 +1,291 @@
+"""
+graphalith bulk module.
+
+Evaluates very large files of constant expressions, one per line, without
+creating a str or an Expression per line. The input is memory-mapped and
+split at newline boundaries into spans that worker processes evaluate
+independently. Each worker tokenizes a block of lines at once, straight
+from the mapped bytes (the lexer's bytes pattern), then parses every line's
+token range with a ValueBuilder that computes the value in the same pass.
+
+Results go to a columnar file with one row per input line (row i is line
+i + 1, blank lines included):
+
+    value   f64  the result (exact modes are converted to float), NaN on error
+    status  u8   a Status code
+    offset  u64  byte offset of the line in the input
+
+    b"GLXC", u16 version, u16 mode, u64 rows, u16 columns,
+    then per column: 8-byte name, 1-byte typecode, u64 offset;
+    each column is stored contiguously, 8-byte aligned.
+
+read_columns() maps the file back as zero-copy memoryviews (numpy.frombuffer
+accepts them directly).
+
+    $ python -m graphalith.bulk expressions.txt results.glxc --jobs 8
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from enum import IntEnum
+from typing import NamedTuple, Optional
+import argparse
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+
+from graphalith.lexer import tokenize
+from graphalith.numeric import NumericMode, ValueBuilder, get_arithmetic
+from graphalith.parser import ParseError, parse
+from graphalith.serialize import CODE_MODES, MODE_CODES
+
+
+class Status(IntEnum):
+    """Enum class for the outcome of one input line"""
+    OK = 0
+    EMPTY = 1
+    PARSE_ERROR = 2
+    NAME_ERROR = 3
+    ZERO_DIVISION = 4
+    ARITHMETIC_ERROR = 5
+    VALUE_ERROR = 6
+
+
+class BulkReport(NamedTuple):
+    """Summary of one bulk evaluation"""
+    rows: int
+    expressions: int
+    errors: int
+    bytes: int
+    seconds: float
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    @property
+    def expressions_per_second(self) -> float:
+        return self.expressions / self.seconds if self.seconds else 0.0
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+COLUMNS_MAGIC = b"GLXC"
+COLUMNS_VERSION = 1
+
+# (name, typecode) of each output column, in file order
+COLUMNS = (("value", "d"), ("status", "B"), ("offset", "Q"))
+
+# Bytes of input tokenized at once by a worker
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Spans per worker process, so faster workers pick up the slack
+SPANS_PER_JOB = 4
+
+_HEADER = struct.Struct("<4sHHQH")    # magic, version, mode, rows, columns
+_COLUMN = struct.Struct("<8scQ")      # name, typecode, offset
+
+_NAN = float("nan")
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    """Maps a file read-only (None for an empty file)"""
+    with open(path, "rb") as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(source.fileno(), 0, access = mmap.ACCESS_READ)
+
+def _status(error: Exception) -> Status:
+    """Classifies an evaluation error"""
+    if isinstance(error, ParseError):
+        return Status.PARSE_ERROR
+    if isinstance(error, NameError):
+        return Status.NAME_ERROR
+    if isinstance(error, ZeroDivisionError):
+        return Status.ZERO_DIVISION
+    if isinstance(error, ArithmeticError):
+        return Status.ARITHMETIC_ERROR
+    return Status.VALUE_ERROR
+
+def _part_path(output: str, part: int, column: str) -> str:
+    return f"{output}.part{part}.{column}"
+
+def _evaluate_block(data, start: int, end: int, builder: ValueBuilder, columns: dict) -> int:
+    """Evaluates the lines of data[start:end], appending to the column arrays
+    Returns: Number of errors"""
+    values, statuses, offsets = columns["value"], columns["status"], columns["offset"]
+    exact = builder.number is not None
+    tokens = tokenize(data, start, end)
+    starts = tokens.starts
+    count = len(tokens)
+    errors = 0
+    j = 0
+
+    line = start
+    while line < end:
+        newline = data.find(b"\n", line, end)
+        if newline < 0:
+            newline = end
+
+        lo = j
+        while j < count and starts[j] < newline:
+            j += 1
+
+        offsets.append(line)
+        if lo == j:
+            values.append(_NAN)
+            statuses.append(Status.EMPTY)
+        else:
+            try:
+                value = parse(tokens, lo, j, builder)
+                values.append(float(value) if exact else value)
+                statuses.append(Status.OK)
+            except (ValueError, ArithmeticError, NameError) as error:
+                values.append(_NAN)
+                statuses.append(_status(error))
+                errors += 1
+        line = newline + 1
+    return errors
+
+def evaluate_span(path: str, start: int, end: int, output: str, part: int, mode: str, block_size: int) -> tuple:
+    """Evaluates the lines of path[start:end] into per-column part files (runs in worker processes)
+    Returns: (rows, expressions, errors)"""
+    data = _map(path)
+    builder = ValueBuilder(get_arithmetic(mode))
+    files = {name: open(_part_path(output, part, name), "wb") for name, _ in COLUMNS}
+    rows = expressions = errors = 0
+
+    try:
+        block = start
+        while data is not None and block < end:  # an empty input maps to None
+            # Extend each block to the end of its last line
+            block_end = min(end, block + block_size)
+            if block_end < end:
+                newline = data.find(b"\n", block_end, end)
+                block_end = end if newline < 0 else newline + 1
+
+            columns = {name: array(typecode) for name, typecode in COLUMNS}
+            errors += _evaluate_block(data, block, block_end, builder, columns)
+            rows += len(columns["status"])
+            expressions += len(columns["status"]) - columns["status"].count(Status.EMPTY)
+            for name, column in columns.items():
+                column.tofile(files[name])
+            block = block_end
+    finally:
+        for file in files.values():
+            file.close()
+        if data is not None:
+            data.close()
+    return rows, expressions, errors
+
+def _assemble(output: str, parts: int, rows: int, mode: NumericMode) -> None:
+    """Concatenates the per-part column files into the columnar output and removes them"""
+    position = _HEADER.size + _COLUMN.size * len(COLUMNS)
+    table = []
+    for name, typecode in COLUMNS:
+        position += -position % 8
+        table.append(_COLUMN.pack(name.encode("ascii"), typecode.encode("ascii"), position))
+        position += rows * array(typecode).itemsize
+
+    with open(output, "wb") as columns:
+        columns.write(_HEADER.pack(COLUMNS_MAGIC, COLUMNS_VERSION, MODE_CODES[mode], rows, len(COLUMNS)))
+        columns.write(b"".join(table))
+        for name, _ in COLUMNS:
+            columns.write(b"\0" * (-columns.tell() % 8))
+            for part in range(parts):
+                with open(_part_path(output, part, name), "rb") as piece:
+                    shutil.copyfileobj(piece, columns)
+                os.remove(_part_path(output, part, name))
+
+
+######################################
+#                 API                #
+######################################
+
+def partition(data, parts: int) -> list:
+    """Splits a buffer into at most `parts` spans that start right after a newline
+    Returns: List of (start, end) byte offsets"""
+    size = len(data) if data is not None else 0
+    bounds = [0]
+    for k in range(1, parts):
+        target = size * k // parts
+        if target <= bounds[-1]:
+            continue
+        newline = data.find(b"\n", target)
+        if newline < 0 or newline + 1 >= size:
+            break
+        bounds.append(newline + 1)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+def evaluate_file(path: str, output: str, jobs: int = 1, mode = NumericMode.FLOAT,
+                  block_size: int = DEFAULT_BLOCK_SIZE) -> BulkReport:
+    """Evaluates every line of path into a columnar output file
+    Returns: BulkReport"""
+    mode = NumericMode(mode)
+    started = time.perf_counter()
+
+    data = _map(path)
+    size = len(data) if data is not None else 0
+    spans = partition(data, max(1, jobs) * SPANS_PER_JOB if jobs > 1 else 1)
+    if data is not None:
+        data.close()
+
+    arguments = [(path, start, end, output, part, mode.value, block_size) for part, (start, end) in enumerate(spans)]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers = jobs) as pool:
+            counts = list(pool.map(evaluate_span, *zip(*arguments))) if arguments else []
+    else:
+        counts = [evaluate_span(*args) for args in arguments]
+
+    rows = sum(count[0] for count in counts)
+    _assemble(output, len(spans), rows, mode)
+    return BulkReport(rows, sum(count[1] for count in counts), sum(count[2] for count in counts),
+                      size, time.perf_counter() - started)
+
+def read_columns(path: str) -> dict:
+    """Maps a columnar output file and returns its columns as typed memoryviews
+    The mapping stays open as long as any returned view is alive
+    Returns: Dictionary of column name to memoryview, plus "mode" (NumericMode)"""
+    data = _map(path)
+    if data is None:
+        raise ValueError(f"read_columns: {path} is empty")
+    magic, version, mode, rows, count = _HEADER.unpack_from(data)
+    if magic != COLUMNS_MAGIC or version != COLUMNS_VERSION:
+        raise ValueError(f"read_columns: {path} is not a version {COLUMNS_VERSION} columnar file")
+
+    view = memoryview(data)
+    columns: dict[str, object] = {"mode": CODE_MODES[mode]}
+    for i in range(count):
+        name, typecode, offset = _COLUMN.unpack_from(data, _HEADER.size + i * _COLUMN.size)
+        typecode = typecode.decode("ascii")
+        size = rows * array(typecode).itemsize
+        columns[name.rstrip(b"\0").decode("ascii")] = view[offset:offset + size].cast(typecode)
+    return columns
+
+def main(argv = None) -> None:  # pragma: no cover
+    """Entry point: `python -m graphalith.bulk INPUT OUTPUT`"""
+    parser = argparse.ArgumentParser(prog = "graphalith-bulk", description = "Evaluate a file of expressions into columns.")
+    parser.add_argument("input", help = "file with one expression per line")
+    parser.add_argument("output", help = "columnar output file")
+    parser.add_argument("--jobs", "-j", type = int, default = os.cpu_count() or 1, help = "worker processes (default: CPU count)")
+    parser.add_argument("--mode", choices = [mode.value for mode in NumericMode], default = "float", help = "numeric mode (default: float)")
+    parser.add_argument("--block-size", type = int, default = DEFAULT_BLOCK_SIZE, help = "bytes tokenized at once (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = evaluate_file(args.input, args.output, args.jobs, args.mode, args.block_size)
+    print(f"{report.rows} lines, {report.expressions} expressions, {report.errors} errors in {report.seconds:.2f} s: "
+          f"{report.mb_per_second:.1f} MB/s, {report.expressions_per_second:.0f} expr/s", file = sys.stderr)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,193 @@
+"""
+graphalith cache module.
+
+Process-wide, thread-safe LRU cache from normalized expression text to its
+CompiledExpression (one entry per numeric mode and backend). Repeated formulas skip formatting, tokenizing, parsing
+and compilation entirely after their first appearance.
+
+The cache is bounded both by entry count and by an estimated memory
+budget; the least recently used entries are evicted first.
+"""
+
+from collections import OrderedDict
+from decimal import Context
+from typing import Iterable, Optional
+import sys
+import threading
+
+from graphalith import profiling
+from graphalith.codegen import Backend
+from graphalith.compiler import CompiledExpression
+from graphalith.lexer import normalize, tokenize
+from graphalith.numeric import NumericMode, get_arithmetic
+from graphalith.parser import ParseError
+from graphalith.profiling import profiled
+from graphalith.tree import FlatTree
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _sizeof(key: tuple, compiled: CompiledExpression) -> int:
+    """Estimates the memory held by one cache entry in bytes"""
+    size = sys.getsizeof(key) + sys.getsizeof(compiled) + sys.getsizeof(compiled.source)
+    size += sys.getsizeof(compiled.program) + sum(map(sys.getsizeof, compiled.program))
+    size += sys.getsizeof(compiled.constants) + sum(map(sys.getsizeof, compiled.constants))
+    size += sys.getsizeof(compiled.variables) + sum(map(sys.getsizeof, compiled.variables))
+    return size
+
+@profiled("compile")
+def _compile_normalized(text: str, mode: NumericMode, backend: Backend = Backend.AUTO) -> CompiledExpression:
+    """Compiles already-normalized expression text"""
+    arithmetic = get_arithmetic(mode)
+    number = None if mode == NumericMode.FLOAT else arithmetic.number
+    compiled = CompiledExpression.from_tree(FlatTree.from_tokens(tokenize(text), number), text, arithmetic)
+    return compiled if backend == Backend.AUTO else compiled.with_backend(backend)
+
+
+class ExpressionCache:
+    """Thread-safe LRU cache of compiled expressions keyed on (normalized text, numeric mode, backend)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+        self._entries = OrderedDict()  # type: OrderedDict[tuple[str, NumericMode, Backend], tuple[CompiledExpression, int]]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return self.contains(text)
+
+    def __repr__(self) -> str:
+        return f"ExpressionCache({len(self)}/{self.max_entries} entries, {self.bytes}/{self.max_bytes} bytes)"
+
+    def __evict(self) -> None:
+        """Evicts least recently used entries until both budgets are met (lock held)"""
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last = False)
+            self.bytes -= size
+            self.evictions += 1
+
+    ## Lookup
+    def contains(self, text: str, mode = NumericMode.FLOAT, backend = Backend.AUTO) -> bool:
+        """Determines if text is cached for the given numeric mode and backend
+        Returns: Boolean"""
+        return (normalize(text), NumericMode(mode), Backend(backend)) in self._entries
+
+    def get(self, text: str, mode = NumericMode.FLOAT, backend = Backend.AUTO) -> CompiledExpression:
+        """Returns the compiled form of text, compiling and caching it on a miss
+        Returns: CompiledExpression"""
+        mode = NumericMode(mode)
+        backend = Backend(backend)
+        key = (normalize(text), mode, backend)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if profiling.ACTIVE is not None:
+                    profiling.ACTIVE.count("cache_hits")
+                return entry[0]
+            self.misses += 1
+
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.count("cache_misses")
+
+        # Compile outside the lock so concurrent misses do not serialize
+        compiled = _compile_normalized(key[0], mode, backend)
+        size = _sizeof(key, compiled)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (compiled, size)
+                self.bytes += size
+                self.__evict()
+        return compiled
+
+    ## Management
+    def resize(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        """Changes the cache budgets, evicting entries if they are now exceeded"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self.__evict()
+
+    def clear(self) -> None:
+        """Removes every entry and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.bytes = 0
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the cache counters
+        Returns: Dictionary"""
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "bytes": self.bytes,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions}
+
+    ## Warming
+    def warm(self, formulas: Iterable[str]) -> int:
+        """Compiles every formula into the cache, skipping blanks, # comments and invalid lines
+        Returns: Number of formulas loaded"""
+        loaded = 0
+        for line in formulas:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                self.get(line)
+            except ParseError:
+                continue
+            loaded += 1
+        return loaded
+
+    def warm_from_file(self, path: str) -> int:
+        """Warms the cache from a file with one formula per line
+        Returns: Number of formulas loaded"""
+        with open(path, encoding = "utf8") as formulas:
+            return self.warm(formulas)
+
+
+######################################
+#                 API                #
+######################################
+
+CACHE = ExpressionCache()
+
+def compile_expression(text: str, mode = NumericMode.FLOAT, context: Optional[Context] = None,
+                       backend = Backend.AUTO) -> CompiledExpression:
+    """Compiles text in the given numeric mode and backend through the process-wide cache
+    A decimal context is attached to the cached program without recompiling it
+    Returns: CompiledExpression"""
+    compiled = CACHE.get(text, mode, backend)
+    if context is not None:
+        compiled = compiled.using(context)
+    return compiled
+
+def warm_cache(path: str) -> int:
+    """Warms the process-wide cache from a file of formulas at startup
+    Returns: Number of formulas loaded"""
+    return CACHE.warm_from_file(path)
@@ -0,0 +1,224 @@
+"""
+graphalith canonical module.
+
+Canonical forms and structural hashes of expressions, for deduplicating and
+grouping large corpora.
+
+An expression is first simplified (constants folded, identities removed,
+hash-consed; see graphalith.simplify), which also erases delimiter styles
+since `[x]`, `(x)` and `{x}` compile alike. Then every node gets a 128-bit
+blake2b digest, bottom-up:
+
+    constant        digest of its type and value
+    variable        digest of its name
+    -a, a-b, a/b    digest of the operator and the children's digests
+    + and *         chains of the same operator are flattened into one
+                    operand list, constant operands are folded together,
+                    and the operand digests are sorted before hashing
+
+so `2+3` and `3+2`, `x*(y*2)` and `2*y*x`, or `a + 1 + b + 2` and
+`b + a + 3` share one digest. Only sums and products are reordered; the
+canonical form identifies expressions equal up to commutativity and
+associativity of + and *, which is what corpus deduplication needs, not a
+promise of bit-identical float evaluation.
+
+The 64- and 128-bit structural hashes are prefixes of the digest.
+"""
+
+from functools import reduce
+from hashlib import blake2b
+from typing import Iterable, Iterator, Union
+
+from graphalith.compiler import CompiledExpression
+from graphalith.lexer import normalize, tokenize
+from graphalith.numeric import NumericMode, get_arithmetic
+from graphalith.parser import ParseError
+from graphalith.simplify import COMMUTATIVE, Dag, simplify
+from graphalith.tree import FlatTree, Opcode
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+DIGEST_SIZE = 16
+
+IDENTITIES: dict[int, int] = {Opcode.ADD: 0, Opcode.MULTIPLY: 1}
+
+_TAGS: dict[int, bytes] = {Opcode.NEGATE: b"n", Opcode.ADD: b"a", Opcode.SUBTRACT: b"s", Opcode.MULTIPLY: b"m", Opcode.DIVIDE: b"d"}
+
+_SYMBOLS: dict[int, str] = {Opcode.ADD: " + ", Opcode.SUBTRACT: " - ", Opcode.MULTIPLY: " * ", Opcode.DIVIDE: " / "}
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _digest(data: bytes) -> bytes:
+    return blake2b(data, digest_size = DIGEST_SIZE).digest()
+
+def _constant_digest(value) -> bytes:
+    return _digest(b"c" + f"{type(value).__name__}:{value!r}".encode("utf8"))
+
+def _needed(dag: Dag) -> bytearray:
+    """Marks the nodes that need their own digest: the root and every node
+    used other than as a link in a chain of the same + or * operator"""
+    opcodes, lefts, rights = dag.opcodes, dag.lefts, dag.rights
+    needed = bytearray(len(opcodes))
+    needed[-1] = 1
+    for node, opcode in enumerate(opcodes):
+        if opcode == Opcode.CONSTANT or opcode == Opcode.LOAD:
+            continue
+        children = (lefts[node],) if opcode == Opcode.NEGATE else (lefts[node], rights[node])
+        for child in children:
+            if opcode not in COMMUTATIVE or opcodes[child] != opcode:
+                needed[child] = 1
+    return needed
+
+def _operands(dag: Dag, node: int) -> list:
+    """Returns the operand nodes of the flattened + or * chain rooted at node"""
+    opcode = dag.opcodes[node]
+    operands = []
+    pending = [dag.rights[node], dag.lefts[node]]
+    while pending:
+        child = pending.pop()
+        if dag.opcodes[child] == opcode:
+            pending += [dag.rights[child], dag.lefts[child]]
+        else:
+            operands.append(child)
+    return operands
+
+def _fold(dag: Dag, opcode: int, operands: list) -> tuple:
+    """Folds the constant operands of a flattened chain into one value
+    Returns: (non-constant operand nodes, folded constant or None)"""
+    constants = [dag.constants[dag.lefts[node]] for node in operands if dag.opcodes[node] == Opcode.CONSTANT]
+    others = [node for node in operands if dag.opcodes[node] != Opcode.CONSTANT]
+    if not constants:
+        return others, None
+    try:
+        value = reduce(dag.arithmetic.operations[opcode], sorted(constants))
+    except (ArithmeticError, TypeError):
+        return operands, None
+    if value == IDENTITIES[opcode] and others:
+        return others, None
+    return others, value
+
+def _simplified(expression, mode) -> Dag:
+    """Simplifies text, a compiled expression or an Expression into a DAG
+    Text (an Expression's value included) is parsed straight into a flat tree, bypassing the
+    expression cache so a pass over a large corpus does not evict the formulas actually in use"""
+    if isinstance(expression, CompiledExpression):
+        return expression.simplify()
+
+    text, context = expression, None
+    if not isinstance(expression, str):
+        text, mode, context = expression.value, expression.mode, expression.context
+    arithmetic = get_arithmetic(mode)
+    number = None if arithmetic.mode == NumericMode.FLOAT else arithmetic.number
+    tree = FlatTree.from_tokens(tokenize(text), number)
+    return simplify(tree, arithmetic if context is None else get_arithmetic(mode, context))
+
+
+######################################
+#                 API                #
+######################################
+
+def dag_digests(dag: Dag) -> list:
+    """Computes the canonical digest of every node of a simplified DAG that needs one, bottom-up
+    Returns: List of bytes (None for nodes absorbed into a longer + or * chain)"""
+    opcodes, lefts, rights = dag.opcodes, dag.lefts, dag.rights
+    needed = _needed(dag)
+    digests: list = [None] * len(opcodes)  # bytes once computed
+
+    for node, opcode in enumerate(opcodes):
+        if not needed[node]:
+            continue
+        if opcode == Opcode.CONSTANT:
+            digest = _constant_digest(dag.constants[lefts[node]])
+        elif opcode == Opcode.LOAD:
+            digest = _digest(b"v" + dag.variables[lefts[node]].encode("utf8"))
+        elif opcode == Opcode.NEGATE:
+            digest = _digest(b"n" + digests[lefts[node]])
+        elif opcode in COMMUTATIVE:
+            others, value = _fold(dag, opcode, _operands(dag, node))
+            parts = sorted(digests[other] for other in others)
+            if value is not None:
+                parts.append(_constant_digest(value))
+                parts.sort()
+            digest = parts[0] if len(parts) == 1 else _digest(_TAGS[opcode] + b"".join(parts))
+        else:
+            digest = _digest(_TAGS[opcode] + digests[lefts[node]] + digests[rights[node]])
+        digests[node] = digest
+    return digests
+
+def canonical_digest(expression: Union[str, CompiledExpression], mode = NumericMode.FLOAT) -> bytes:
+    """Returns the 128-bit canonical digest of an expression (text, compiled, or an Expression)
+    Returns: Bytes"""
+    return dag_digests(_simplified(expression, mode))[-1]
+
+def canonical_key(expression, mode = NumericMode.FLOAT) -> bytes:
+    """Returns the canonical digest of an expression, or a digest of its normalized text if it does not compile
+    Returns: Bytes"""
+    try:
+        return canonical_digest(expression, mode)
+    except (ParseError, ValueError):
+        text = expression if isinstance(expression, str) else getattr(expression, "value", str(expression))
+        return _digest(b"!" + normalize(text).encode("utf8"))
+
+def structural_hash(expression: Union[str, CompiledExpression], bits: int = 64, mode = NumericMode.FLOAT) -> int:
+    """Returns the 64- or 128-bit structural hash of an expression
+    Returns: Integer"""
+    if bits not in (64, 128):
+        raise ValueError("structural_hash: bits must be 64 or 128")
+    return int.from_bytes(canonical_digest(expression, mode)[:bits // 8], "little")
+
+def canonical_text(expression: Union[str, CompiledExpression], mode = NumericMode.FLOAT) -> str:
+    """Returns the canonical form as text: parentheses only, sums and products in digest order
+    EX: [3 + x] * (2 + 2) -> 4.0 * (3.0 + x)
+    Returns: String"""
+    dag = _simplified(expression, mode)
+    digests = dag_digests(dag)
+    opcodes, lefts, rights = dag.opcodes, dag.lefts, dag.rights
+    texts: list = [None] * len(opcodes)  # str once computed
+
+    def operand(text: str) -> str:
+        return text if text.replace(".", "").replace("_", "").isalnum() else f"({text})"
+
+    for node, opcode in enumerate(opcodes):
+        if digests[node] is None:
+            continue
+        if opcode == Opcode.CONSTANT:
+            text = str(dag.constants[lefts[node]])
+        elif opcode == Opcode.LOAD:
+            text = dag.variables[lefts[node]]
+        elif opcode == Opcode.NEGATE:
+            text = "-" + operand(texts[lefts[node]])
+        elif opcode in COMMUTATIVE:
+            others, value = _fold(dag, opcode, _operands(dag, node))
+            parts = [(digests[other], texts[other]) for other in others]
+            if value is not None:
+                parts.append((_constant_digest(value), str(value)))
+            parts.sort()
+            text = parts[0][1] if len(parts) == 1 else _SYMBOLS[opcode].join(operand(part) for _, part in parts)
+        else:
+            text = operand(texts[lefts[node]]) + _SYMBOLS[opcode] + operand(texts[rights[node]])
+        texts[node] = text
+    return texts[-1]
+
+def group(expressions: Iterable, mode = NumericMode.FLOAT) -> dict:
+    """Groups expressions by canonical digest in one pass (expressions that do not compile group by text)
+    Returns: Dictionary of 128-bit digest to list of expressions"""
+    groups: dict[bytes, list] = {}
+    for expression in expressions:
+        groups.setdefault(canonical_key(expression, mode), []).append(expression)
+    return groups
+
+def dedupe(expressions: Iterable, mode = NumericMode.FLOAT) -> Iterator:
+    """Yields the first expression of each canonical class, in one pass
+    Returns: Iterator"""
+    seen = set()
+    for expression in expressions:
+        key = canonical_key(expression, mode)
+        if key not in seen:
+            seen.add(key)
+            yield expression
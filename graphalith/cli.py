@@ -1,37 +1,160 @@
 """CLI interface for graphalith project.
 
-Be creative! do whatever you want!
+    $ graphalith -e "2 * (3 + 4)"         # one-shot: print the value, exit 0 (1 on error)
+    $ graphalith -e "x / y" -D x=1 -D y=4 # bind variables
+    $ graphalith --file exprs.txt         # one-shot over a file ('-' for stdin), one value per line
+    $ graphalith                         # interactive prompt
+    $ graphalith --batch < exprs.txt     # stream stdin, one expression per line
+    $ graphalith exprs.txt --format json --jobs 4 -o results.jsonl
+    $ graphalith --profile --batch < exprs.txt    # per-phase timings on stderr
 
-- Install click or typer and create a CLI app
-- Use builtin argparse
-- Start a web application
-- Import things from your .base module
+The one-shot modes only load the lexer, parser, node, tree, numeric and
+profiling modules (profiling because --profile is read before any mode
+runs, tree for the opcode tables numeric evaluates with). They evaluate
+while parsing (see graphalith.numeric.ValueBuilder), so shell pipelines
+that start one process per expression do not pay for the expression cache,
+code generation or the process pool. Everything else is imported by the
+mode that needs it.
 """
-from graphalith.base import*
+from graphalith import profiling
+from graphalith.numeric import NumericMode
+import argparse
+import sys
 
-def main():  # pragma: no cover
-    """
-    The main function executes on commands:
-    `python -m graphalith` and `$ graphalith `.
+######################################
+#            CONSTANTS               #
+######################################
 
-    This is your program's entry point.
+EXIT_OK = 0
+EXIT_ERROR = 1   # an expression could not be evaluated
+EXIT_USAGE = 2   # bad command line (argparse's own status)
+
+
+def parse_args(argv = None) -> argparse.Namespace:
+    """Parses the command line arguments"""
+    parser = argparse.ArgumentParser(prog = "graphalith", description = "Evaluate algebraic expressions.")
+    parser.add_argument("files", nargs = "*", help = "files with one expression per line ('-' for stdin); implies --batch")
+    parser.add_argument("--expression", "-e", action = "append", default = [], help = "evaluate an expression, print its value and exit (repeatable)")
+    parser.add_argument("--file", "-f", action = "append", default = [], help = "evaluate each line of a file ('-' for stdin), print the values and exit")
+    parser.add_argument("--define", "-D", action = "append", default = [], metavar = "NAME=VALUE", help = "bind a variable for -e/--file")
+    parser.add_argument("--batch", action = "store_true", help = "stream expressions from stdin instead of prompting")
+    parser.add_argument("--format", choices = ["csv", "json"], default = "csv", help = "batch output format (default: csv)")
+    parser.add_argument("--mode", choices = [mode.value for mode in NumericMode], default = "float", help = "numeric mode (default: float)")
+    parser.add_argument("--jobs", "-j", type = int, default = 1, help = "worker processes for batch evaluation (default: 1)")
+    parser.add_argument("--chunk-size", type = int, default = None, help = "expressions per work unit (default: the batch module's)")
+    parser.add_argument("--output", "-o", default = "-", help = "batch output file (default: stdout)")
+    parser.add_argument("--profile", action = "store_true", help = "print per-phase timings and counters to stderr on exit")
+    args = parser.parse_args(argv)
+
+    if args.define and not (args.expression or args.file):
+        parser.error("--define only applies to -e/--file; batch input is evaluated without bindings")
+
+    bindings = {}
+    for definition in args.define:
+        name, separator, value = definition.partition("=")
+        if not separator or not name.strip():
+            parser.error(f"--define expects NAME=VALUE, got {definition!r}")
+        bindings[name.strip()] = value.strip()
+    args.bindings = bindings
+    return args
+
+def read_lines(paths: list):
+    """Yields lines from each path in turn, '-' meaning stdin"""
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(path, encoding = "utf8") as lines:
+            yield from lines
+
+def run_oneshot(args: argparse.Namespace) -> int:
+    """Evaluates the -e expressions and --file lines, printing one value per line
+    Errors go to stderr and evaluation continues with the next expression
+    Returns: Exit status (EXIT_ERROR if any expression failed)"""
+    from graphalith.lexer import tokenize
+    from graphalith.numeric import ValueBuilder, get_arithmetic
+    from graphalith.parser import parse
+
+    arithmetic = get_arithmetic(args.mode)
+    try:
+        builder = ValueBuilder(arithmetic, {name: arithmetic.number(value) for name, value in args.bindings.items()})
+    except (ValueError, ArithmeticError) as error:
+        print(f"graphalith: error: bad --define value: {error}", file = sys.stderr)
+        return EXIT_USAGE
+
+    expressions = list(args.expression)
+    for line in read_lines(args.file):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            expressions.append(line)
+
+    status = EXIT_OK
+    output = []
+    for text in expressions:
+        try:
+            output.append(arithmetic.format(parse(tokenize(text), builder = builder)))
+        except (ValueError, ArithmeticError, NameError) as error:
+            print(f"graphalith: {text}: {type(error).__name__}: {error}", file = sys.stderr)
+            output.append("")
+            status = EXIT_ERROR
+    sys.stdout.write("\n".join(output) + "\n")
+    return status
+
+def run_batch(args: argparse.Namespace) -> int:
+    """Streams every input line through the evaluator and writes one result per line
+    Returns: Exit status"""
+    from graphalith.batch import CSV_HEADER, DEFAULT_CHUNK_SIZE, format_result, stream_results
+
+    results = stream_results(read_lines(args.files or ["-"]), args.jobs, args.chunk_size or DEFAULT_CHUNK_SIZE, NumericMode(args.mode))
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding = "utf8")
+    try:
+        if args.format == "csv":
+            output.write(CSV_HEADER + "\n")
+        for result in results:
+            output.write(format_result(result, args.format) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+def run_interactive() -> int:
+    """Prompts for expressions until end of input
+    Returns: Exit status"""
+    from graphalith.expression import Expression
 
-    You can change this function to do whatever you want.
-    Examples:
-        * Run a test suite
-        * Run a server
-        * Do some other stuff
-        * Run a command line application (Click, Typer, ArgParse)
-        * List all available tasks
-        * Run an application (Flask, FastAPI, Django, etc.)
-    """
-        # prompt for input string
     while True:
         try:
             input_string = input("\nEnter an expression string: ")
-        except ValueError:
-            print("Oops!  That was no valid string.  Try again...")
-    
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return 0
+
         expression = Expression(value=input_string, auto_format=True, auto_eval=True)
         print(expression)
 
+def main(argv = None):  # pragma: no cover
+    """
+    The main function executes on commands:
+    `python -m graphalith` and `$ graphalith `.
+
+    Without arguments it runs an interactive prompt. -e and --file evaluate
+    and exit with EXIT_OK or EXIT_ERROR. With --batch or input files it
+    streams expressions and writes CSV or JSON lines instead.
+    --profile reports where the time went (worker processes are not included).
+    """
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    try:
+        if args.expression or args.file:
+            status = run_oneshot(args)
+        elif args.batch or args.files:
+            status = run_batch(args)
+        else:
+            status = run_interactive()
+    finally:
+        if args.profile:
+            profiling.disable()
+            print(profiling.PROFILER.format(), file = sys.stderr)
+    sys.exit(status)
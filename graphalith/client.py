@@ -0,0 +1,103 @@
+"""
+graphalith client module.
+
+asyncio client for the evaluation server (see graphalith.server). One
+connection carries any number of concurrent, pipelined requests; the
+server answers them in order, so responses are matched to requests
+without waiting for each round trip.
+
+    async with await AsyncClient.connect("127.0.0.1", 8765) as client:
+        value = await client.evaluate("2 * (x + 1)", x = 3)
+"""
+
+from collections import deque
+import asyncio
+import json
+
+from graphalith.server import DEFAULT_HOST, DEFAULT_PORT, MAX_LINE
+
+
+class AsyncClient:
+    """Pipelined NDJSON client for one server connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._pending: deque[asyncio.Future] = deque()  # awaiting responses, in request order
+        self._receiver = asyncio.get_running_loop().create_task(self.__receive())
+
+    def __repr__(self) -> str:
+        return f"AsyncClient({len(self._pending)} pending)"
+
+    async def __aenter__(self) -> 'AsyncClient':
+        return self
+
+    async def __aexit__(self, *exception) -> None:
+        await self.close()
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> 'AsyncClient':
+        """Opens a TCP connection to a server
+        Returns: AsyncClient"""
+        reader, writer = await asyncio.open_connection(host, port, limit = MAX_LINE)
+        return cls(reader, writer)
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> 'AsyncClient':
+        """Opens a Unix socket connection to a server
+        Returns: AsyncClient"""
+        reader, writer = await asyncio.open_unix_connection(path, limit = MAX_LINE)
+        return cls(reader, writer)
+
+    async def __receive(self) -> None:
+        """Resolves pending requests with the responses as they arrive"""
+        error: Exception = ConnectionError("AsyncClient: connection closed")
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(json.loads(line))
+        except Exception as exception:
+            error = exception
+        finally:
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(error)
+
+    async def request(self, payload: dict) -> dict:
+        """Sends one raw request object and waits for its response
+        Returns: Dictionary"""
+        if self._receiver.done():
+            raise ConnectionError("AsyncClient: connection closed")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(json.dumps(payload).encode("utf8") + b"\n")
+        await self._writer.drain()
+        return await future
+
+    async def evaluate(self, expression: str, mode: str = "float", **bindings):
+        """Evaluates an expression on the server
+        Returns: Number (a string for the fraction and decimal modes)"""
+        response = await self.request({"expression": expression, "mode": mode, "bindings": bindings})
+        if response["error"] is not None:
+            raise RuntimeError(f"evaluate: {response['error']}")
+        return response["value"]
+
+    async def stats(self) -> dict:
+        """Returns the server counters and latency histogram
+        Returns: Dictionary"""
+        return await self.request({"stats": True})
+
+    async def close(self) -> None:
+        """Closes the connection, failing any requests still pending"""
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._receiver
@@ -0,0 +1,138 @@
+"""
+graphalith codegen module.
+
+Compiles a postfix program to a native Python function of its variables.
+The program is turned into a Python `ast` (never into source text), checked
+against a whitelist, passed to compile() and evaluated into a lambda such as
+
+    lambda v0, v1: (v0 + 2.0) * -v1
+
+Only our own program is ever translated: variables become positional
+parameters v0..vn whatever their names are, float and int constants are
+literals, and everything else (exact constants, mode-specific operations
+such as int division or a decimal context) is looked up by a generated
+name in a namespace without builtins. The result equals the interpreter's
+because each node performs the same operation, in the same order, as
+run_program().
+
+Very deep programs are not generated (CPython's compiler recurses on
+nesting); they keep running on the interpreter.
+"""
+
+from enum import Enum
+import ast
+
+from graphalith.numeric import Arithmetic
+from graphalith.profiling import profiled
+from graphalith.tree import OPERATIONS, Opcode
+
+
+class Backend(Enum):
+    """Enum class for evaluation backends"""
+    AUTO = "auto"                 # interpreter, switching to codegen after CODEGEN_THRESHOLD evaluations
+    INTERPRETER = "interpreter"
+    CODEGEN = "codegen"
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+# Evaluations after which an AUTO expression is compiled to bytecode
+CODEGEN_THRESHOLD = 64
+
+# Deepest program nesting that is compiled to bytecode
+MAX_DEPTH = 400
+
+BINARY_NODES = {Opcode.ADD: ast.Add,
+                Opcode.SUBTRACT: ast.Sub,
+                Opcode.MULTIPLY: ast.Mult,
+                Opcode.DIVIDE: ast.Div}
+
+ALLOWED_NODES = (ast.Expression, ast.Lambda, ast.arguments, ast.arg, ast.Load,
+                 ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Constant,
+                 ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub)
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _check(tree: ast.AST, parameters: set, namespace: dict) -> None:
+    """Raises ValueError unless the tree only uses whitelisted nodes and generated names"""
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"codegen: {type(node).__name__} node is not allowed")
+        if isinstance(node, ast.Name) and node.id not in parameters and node.id not in namespace:
+            raise ValueError(f"codegen: unknown name {node.id!r}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            raise ValueError(f"codegen: {type(node.value).__name__} literal is not allowed")
+        if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.keywords):
+            raise ValueError("codegen: only calls of generated names are allowed")
+
+def build(program: tuple, constants: tuple, variables: int, arithmetic: Arithmetic) -> tuple:
+    """Translates a postfix program into a lambda AST
+    Returns: (ast.Expression, namespace of the names it refers to)"""
+    namespace: dict[str, object] = {"__builtins__": {}}
+    stack: list[tuple[ast.expr, int]] = []  # node, nesting depth
+    node: ast.expr
+
+    def name(identifier: str, value) -> ast.Name:
+        namespace[identifier] = value
+        return ast.Name(id = identifier, ctx = ast.Load())
+
+    for opcode, arg in program:
+        if opcode == Opcode.CONSTANT:
+            value = constants[arg]
+            node = ast.Constant(value = value) if type(value) in (int, float) else name(f"c{arg}", value)
+            depth = 1
+        elif opcode == Opcode.LOAD:
+            node = ast.Name(id = f"v{arg}", ctx = ast.Load())
+            depth = 1
+        elif opcode == Opcode.NEGATE:
+            operand, depth = stack.pop()
+            if arithmetic.negate is None:
+                node = ast.UnaryOp(op = ast.USub(), operand = operand)
+            else:
+                node = ast.Call(func = name("negate", arithmetic.negate), args = [operand], keywords = [])
+            depth += 1
+        else:
+            right, right_depth = stack.pop()
+            left, left_depth = stack.pop()
+            operation = arithmetic.operations[opcode]
+            if operation is OPERATIONS[opcode]:
+                node = ast.BinOp(left = left, op = BINARY_NODES[opcode](), right = right)
+            else:
+                node = ast.Call(func = name(f"op{int(opcode)}", operation), args = [left, right], keywords = [])
+            depth = max(left_depth, right_depth) + 1
+
+        if depth > MAX_DEPTH:
+            raise ValueError(f"codegen: program nesting exceeds {MAX_DEPTH}")
+        stack.append((node, depth))
+
+    parameters = [ast.arg(arg = f"v{i}") for i in range(variables)]
+    arguments = ast.arguments(posonlyargs = [], args = parameters, vararg = None, kwonlyargs = [],
+                              kw_defaults = [], kwarg = None, defaults = [])
+    tree = ast.Expression(body = ast.Lambda(args = arguments, body = stack[-1][0]))
+    ast.fix_missing_locations(tree)
+
+    _check(tree, {parameter.arg for parameter in parameters}, namespace)
+    return tree, namespace
+
+
+######################################
+#                 API                #
+######################################
+
+@profiled("codegen")
+def generate(program: tuple, constants: tuple, variables: int, arithmetic: Arithmetic):
+    """Compiles a postfix program into a function taking the variable values positionally
+    Raises ValueError if the program is too deep to compile
+    Returns: Function"""
+    tree, namespace = build(program, constants, variables, arithmetic)
+    return eval(compile(tree, "<graphalith>", "eval"), namespace)
+
+def source(program: tuple, constants: tuple, variables: int, arithmetic: Arithmetic) -> str:
+    """Returns the generated lambda as Python source, for inspection
+    Returns: String"""
+    return ast.unparse(build(program, constants, variables, arithmetic)[0])
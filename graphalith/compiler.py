@@ -0,0 +1,190 @@
+"""
+graphalith compiler module.
+
+Compiles an expression into a flat postfix program once, so it can be
+evaluated many times with different variable bindings without any string
+work or Expression allocation per call.
+
+Constants and results are native numbers of the expression's numeric mode
+(see graphalith.numeric); nothing is formatted to a string on the way.
+
+A program is a tuple of (opcode, argument) instructions run on a value stack:
+    CONSTANT i  pushes constants[i]
+    LOAD i      pushes the binding of variables[i]
+    NEGATE      negates the top of the stack
+    ADD, SUBTRACT, MULTIPLY, DIVIDE pop two values and push the result
+
+Programs run on the interpreter loop (run_program) until they have been
+evaluated CODEGEN_THRESHOLD times, after which they are compiled to a
+native Python function (see graphalith.codegen). with_backend() pins an
+expression to either backend.
+
+A CompiledExpression can be shared by any number of threads. Its public
+fields never change; the only internal state is the run counter and the
+generated function, which are updated under the expression's own lock
+during the first CODEGEN_THRESHOLD runs, so unrelated expressions never
+contend. After that, evaluation reads one attribute and takes
+no lock, and every run keeps its values on its own stack.
+"""
+
+from array import array
+from decimal import Context
+from typing import Callable, Optional
+import threading
+from graphalith import codegen
+from graphalith.codegen import Backend
+from graphalith.node import Node
+from graphalith.numeric import Arithmetic, NumericMode, get_arithmetic
+from graphalith.profiling import profiled
+from graphalith.simplify import Dag, simplify
+from graphalith.tree import FlatTree, run_program
+
+class CompiledExpression:
+    """Immutable, thread-safe compiled form of an expression"""
+
+    __slots__ = ("source", "program", "constants", "variables", "arithmetic", "backend", "_function", "_evaluations", "_lock")
+
+    # Slots are filled once through object.__setattr__; declared here for type checkers
+    source: str
+    program: tuple
+    constants: tuple
+    variables: tuple
+    arithmetic: Arithmetic
+    backend: Backend
+    _function: Optional[Callable]
+    _evaluations: int
+    _lock: threading.Lock
+
+    def __init__(self, program: tuple, constants: tuple, variables: tuple, source: str = "", arithmetic: Optional[Arithmetic] = None,
+                 backend = Backend.AUTO) -> None:
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "program", program)
+        object.__setattr__(self, "constants", constants)
+        object.__setattr__(self, "variables", variables)
+        object.__setattr__(self, "arithmetic", arithmetic if arithmetic is not None else get_arithmetic())
+        object.__setattr__(self, "backend", Backend(backend))
+        object.__setattr__(self, "_function", None)  # generated function, once compiled to bytecode
+        object.__setattr__(self, "_evaluations", 0)  # interpreted runs so far, -1 once codegen has failed
+        object.__setattr__(self, "_lock", threading.Lock())  # guards the two above while an AUTO expression is counting
+
+        if self.backend == Backend.CODEGEN:
+            object.__setattr__(self, "_function", self.__generate())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledExpression is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledExpression is immutable")
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r}, variables={self.variables!r}, mode={self.mode.value!r})"
+
+    def __len__(self) -> int:
+        return len(self.program)
+
+    def __reduce__(self):
+        """Pickles through the compact binary format (see graphalith.serialize)"""
+        from graphalith.serialize import dumps, restore
+        return (restore, (dumps(self), self.arithmetic.context, self.backend.value))
+
+    @property
+    def mode(self) -> NumericMode:
+        """The numeric mode the expression evaluates in"""
+        return self.arithmetic.mode
+
+    @classmethod
+    def from_tree(cls, tree: FlatTree, source: str = "", arithmetic: Optional[Arithmetic] = None) -> 'CompiledExpression':
+        """Freezes a flat tree into a compiled expression"""
+        return cls(tuple(zip(tree.opcodes, tree.operands)), tuple(tree.constants), tuple(tree.variables), source, arithmetic)
+
+    def using(self, context: Context) -> 'CompiledExpression':
+        """Returns a copy that evaluates with an explicit decimal context (decimal mode only)
+        Returns: CompiledExpression"""
+        return CompiledExpression(self.program, self.constants, self.variables, self.source, get_arithmetic(self.mode, context), self.backend)
+
+    def with_backend(self, backend) -> 'CompiledExpression':
+        """Returns a copy pinned to a backend ("interpreter", "codegen" or "auto")
+        Pinning to codegen compiles immediately and raises ValueError if the program is too deep
+        Returns: CompiledExpression"""
+        return CompiledExpression(self.program, self.constants, self.variables, self.source, self.arithmetic, backend)
+
+    @property
+    def generated(self) -> bool:
+        """Whether evaluation currently runs generated bytecode"""
+        return self._function is not None
+
+    def __generate(self):
+        """Compiles the program to a native function (raises ValueError if too deep)"""
+        return codegen.generate(self.program, self.constants, len(self.variables), self.arithmetic)
+
+    def __promote(self) -> None:
+        """Switches an AUTO expression to generated bytecode, or stops counting if that fails (lock held)"""
+        try:
+            object.__setattr__(self, "_function", self.__generate())
+        except (ValueError, RecursionError):
+            object.__setattr__(self, "_evaluations", -1)
+
+    def to_tree(self) -> FlatTree:
+        """Returns the program as a (mutable) flat tree"""
+        opcodes = array("B", [opcode for opcode, _ in self.program])
+        operands = array("i", [arg for _, arg in self.program])
+        return FlatTree(opcodes, operands, list(self.constants), list(self.variables))
+
+    def simplify(self) -> Dag:
+        """Constant-folds, removes identities and hash-conses the program into a DAG
+        The DAG evaluates like this expression, visiting each distinct subexpression once
+        Returns: Dag"""
+        return simplify(self.to_tree(), self.arithmetic)
+
+    def run(self, values: tuple) -> float:
+        """Runs the program with values given positionally in `variables` order"""
+        function = self._function
+        if function is not None:
+            return function(*values)
+
+        if self.backend == Backend.AUTO and self._evaluations >= 0:
+            # Counted under the lock so concurrent runs neither lose counts nor generate twice
+            with self._lock:
+                if self._function is None and self._evaluations >= 0:
+                    evaluations = self._evaluations + 1
+                    object.__setattr__(self, "_evaluations", evaluations)
+                    if evaluations >= codegen.CODEGEN_THRESHOLD:
+                        self.__promote()
+                function = self._function
+            if function is not None:
+                return function(*values)
+
+        arithmetic = self.arithmetic
+        return run_program(self.program, self.constants, values, arithmetic.operations, arithmetic.negate)
+
+    @profiled("evaluate")
+    def evaluate(self, **bindings) -> float:
+        """Evaluates the expression with the given variable bindings
+        Returns: Number"""
+        try:
+            values = tuple([bindings[name] for name in self.variables])
+        except KeyError as error:
+            missing = [name for name in self.variables if name not in bindings]
+            raise NameError(f"evaluate: unbound variable(s) {', '.join(missing)}") from error
+
+        coerce = self.arithmetic.coerce
+        if coerce is not None:
+            values = tuple([coerce(value) for value in values])
+        return self.run(values)
+
+    def evaluate_array(self, out = None, **arrays):
+        """Evaluates the expression elementwise over arrays of bindings (requires numpy)
+        Returns: numpy.ndarray"""
+        from graphalith.vectorize import evaluate_array
+        return evaluate_array(self, out, **arrays)
+
+
+######################################
+#                 API                #
+######################################
+
+def compile_tree(root: Node, source: str = "", mode = NumericMode.FLOAT) -> CompiledExpression:
+    """Compiles an expression tree into a postfix program in the given numeric mode"""
+    arithmetic = get_arithmetic(mode)
+    number = None if arithmetic.mode == NumericMode.FLOAT else arithmetic.number
+    return CompiledExpression.from_tree(FlatTree.from_node(root, number), source, arithmetic)
@@ -1,8 +1,14 @@
-from collections import deque
 from enum import Enum
-from typing import Callable as function
-from graphalith.node import*
-import re
+from typing import Any, Optional
+from graphalith import profiling
+from graphalith.cache import compile_expression
+from graphalith.canonical import canonical_key
+from graphalith.codegen import Backend
+from graphalith.compiler import CompiledExpression
+from graphalith.lexer import TokenKind, TokenStream, normalize, tokenize
+from graphalith.numeric import NumericMode
+from graphalith.profiling import profiled
+from graphalith.validator import validate
 
 class ExpressionType(Enum):
         #TODO: Add nested expression types 
@@ -20,8 +26,31 @@ class ExpressionType(Enum):
         OPERATOR_DIVIDE = 9
         
 
+# Marks a lazily computed attribute that has not been computed yet
+_UNSET: Any = object()
+
+
 class Expression: 
-    """Class for representing mathematical expressions"""
+    """Class for representing mathematical expressions
+    Construction only records its arguments; the token stream, type, diagnostics,
+    validity, simplification, canonical key and evaluation are each computed on first access and cached
+    Expressions compare and hash by canonical form (see graphalith.canonical), so `2+x` == `[x]+2`
+    Assigning value changes the hash: do not change the value of an expression held in a set or used as a dict key
+    An Expression is mutable and not thread-safe; share its immutable compile() form across threads instead"""
+
+    __slots__ = ("name", "auto_format", "auto_eval", "mode", "context", "backend", "_value", "_pending_format",
+                 "_tokens", "_type", "_diagnostics", "_valid", "_simplified", "_canonical", "_evaluation")
+
+    # Private slots, declared for type checkers; the lazy ones hold _UNSET until computed
+    _value: str
+    _pending_format: bool
+    _tokens: TokenStream
+    _type: ExpressionType
+    _diagnostics: list
+    _valid: bool
+    _simplified: bool
+    _canonical: bytes
+    _evaluation: Optional['Expression']
 
     ######################################
     #            CONSTANTS               #
@@ -34,25 +63,41 @@ class Expression:
                  "*": ExpressionType.OPERATOR_MULTIPLY, 
                  "/": ExpressionType.OPERATOR_DIVIDE}
 
+    SIGNS = (TokenKind.OPERATOR_ADD, TokenKind.OPERATOR_SUBTRACT)
+
+    TOKEN_TYPES: dict[int, ExpressionType] = {TokenKind.NUMBER: ExpressionType.NUMERIC,
+                   TokenKind.DELIMITER_OPEN: ExpressionType.DELIMITER_OPEN,
+                   TokenKind.DELIMITER_CLOSED: ExpressionType.DELIMITER_CLOSED,
+                   TokenKind.OPERATOR_ADD: ExpressionType.OPERATOR_ADD,
+                   TokenKind.OPERATOR_SUBTRACT: ExpressionType.OPERATOR_SUBTRACT,
+                   TokenKind.OPERATOR_MULTIPLY: ExpressionType.OPERATOR_MULTIPLY,
+                   TokenKind.OPERATOR_DIVIDE: ExpressionType.OPERATOR_DIVIDE}
+
   
     ######################################
     #            PRIVATE METHODS         #
     ######################################
     
     def __init__(self, **kwargs):
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.count("Expression")
         self.name =  kwargs.get('name', "default")
-        self.value = kwargs.get('value', "")
-
         self.auto_format = kwargs.get('auto_format', False)
-        if self.auto_format:
-            self.__format_value()
-
-        self.type = self.__determine_type()
         self.auto_eval = kwargs.get('auto_eval', False)
-        self.evaluation = None
+        self.mode = NumericMode(kwargs.get('mode', NumericMode.FLOAT))
+        self.context = kwargs.get('context', None)
+        self.backend = Backend(kwargs.get('backend', Backend.AUTO))
+        self.value = kwargs.get('value', "")
 
-        self.valid = self.__is_valid_expression()
-        self.simplified = self.__is_simplified()
+    def __reset(self) -> None:
+        """Forgets every lazily computed attribute"""
+        self._tokens = _UNSET
+        self._type = _UNSET
+        self._diagnostics = _UNSET
+        self._valid = _UNSET
+        self._simplified = _UNSET
+        self._canonical = _UNSET
+        self._evaluation = _UNSET
 
 
     def __repr__(self):
@@ -67,338 +112,168 @@ class Expression:
         return f"""\nValue: {self.value}\nType: {self.type}\nValid: {self.valid}\nEvaluation: {evaluation}"""
 
     def __eq__(self, other) -> bool:
-        """Checks if two expressions are equal"""
+        """Checks if two expressions have the same canonical form"""
         if not isinstance(other, Expression):
             return False
         
-        if not (self.simplified and other.simplified):
-            raise AttributeError("__eq__: Expressions must be simplified before checking equality")
-        
-        return (self.value, self.type) == (other.value, other.type)
+        return self.canonical == other.canonical
+
+    def __hash__(self) -> int:
+        """Returns the 64-bit structural hash of the expression"""
+        return int.from_bytes(self.canonical[:8], "little")
     
     def __format_value(self) -> 'str':
         """Preprocesses the expression string"""
 
-        # Remove all white spaces
-        self.value = re.sub('[ ]', '', self.value)
-
-        # Wrap parantheses around multiplication/divison if not already wrapped
-        self.value = re.sub(r'([0-9]+)([*/])([0-9]+)', r'(\1\2\3)', self.value)
-
-        # Replace -- with +
-        self.value = re.sub(r'--', '+', self.value)
-
-        # Replace ++ with +
-        self.value = re.sub(r'\+\+', '+', self.value)
-
-        # Replace -+ with -
-        self.value = re.sub(r'-\+', '-', self.value)
-
-        # Replace +- with -
-        self.value = re.sub(r'\+-', '-', self.value)
+        # Remove white spaces and collapse sign runs (--, ++, -+, +-)
+        return normalize(self._value)
 
 
+    @profiled("type")
     def __determine_type(self) -> ExpressionType:
         """Determines the type of the expression"""
-        # TODO: Use regex to determine raw expression
-        remove_chars = "-/+*()[]<>{}"
-        raw_exp = "".join([ch for ch in self.value if ch not in remove_chars and ch != " "])
+        kinds = self.tokens.kinds
 
-        try:
-            float(self.value)
+        # A lone, optionally signed number; `inf` and `nan` are names, as the lexer sees them
+        if kinds and kinds[-1] == TokenKind.NUMBER and (len(kinds) == 1 or (len(kinds) == 2 and kinds[0] in Expression.SIGNS)):
             return ExpressionType.NUMERIC
-        except:
-            pass
 
-        if self.value.isalpha():
-            return ExpressionType.ALPHA
-        
-        if raw_exp.isalnum():
+        if len(kinds) == 1:
+            kind = kinds[0]
+            if kind == TokenKind.NAME:
+                return ExpressionType.ALPHA if self.value.strip().isalpha() else ExpressionType.ALPHANUMERIC
+            if kind in Expression.TOKEN_TYPES:
+                return Expression.TOKEN_TYPES[kind]
+
+        if TokenKind.UNKNOWN not in kinds and (TokenKind.NUMBER in kinds or TokenKind.NAME in kinds):
             return ExpressionType.ALPHANUMERIC
-        
-        if self.value in Expression.DELIMITERS.keys():
-            return ExpressionType.DELIMITER_OPEN
-        
-        if self.value in Expression.DELIMITERS.values():
-            return ExpressionType.DELIMITER_CLOSED
-        
-        if self.value in Expression.OPERATORS.keys():
-            return Expression.OPERATORS[self.value]
-        
+
         return ExpressionType.UNKNOWN
-        
-    def __get_corresponding_delimiter(self) -> 'Expression':
-        """Returns the corresponding delimiter for the expression"""
-        if self.type == ExpressionType.DELIMITER_OPEN:
-            if self.value not in Expression.DELIMITERS:
-                raise TypeError("__get_corresponding_delimiter: Open delimiter type error")
-            return Expression(value = Expression.DELIMITERS[self.value])
-        
-        if self.type == ExpressionType.DELIMITER_CLOSED:
-            REVERSED_DELIMITERS = {Expression.DELIMITERS[key]:key for key in Expression.DELIMITERS.keys()}
-            if self.value not in Expression.DELIMITERS.values():
-                raise TypeError("__get_corresponding_delimiter: Closed delimiter type error")
-            return Expression(value = REVERSED_DELIMITERS[self.value])
-        
-        raise TypeError("__get_corresponding_delimiter: not a delimiter")
 
     def __is_simplified(self) -> bool:
-        """Determines if the expression is simplified
+        """Determines if the expression is simplified (no constant folding or identity applies)
         Returns: Boolean"""
-
-        # TODO: Implement expression simplification
-        return True
-    
-    def __is_operable(self) -> bool:
-        """Determines if the expression is operable (can be operated on immediately)
-        Returns: Boolean"""
-        return self.type in [ExpressionType.NUMERIC]
-    
-    def __is_delimiter_balanced(self) -> bool:
-        """Determines if the expression has balanced delimiters"""
-        if len(self.value) == 0:
+        if self.type == ExpressionType.NUMERIC:
             return True
-        
-        if len(self.value) == 1:
-            return self.type != ExpressionType.DELIMITER_OPEN and self.type != ExpressionType.DELIMITER_CLOSED 
-        
-        stack = deque()  # type: deque[Expression]
-
-        for ch in self.value:
-            ch_expression = Expression(value = ch)
-            if ch_expression.type == ExpressionType.DELIMITER_OPEN:
-                stack.append(ch_expression)
-            elif ch_expression.type == ExpressionType.DELIMITER_CLOSED:
-                if stack.pop() != ch_expression.__get_corresponding_delimiter():
-                    return False
-                
-        return len(stack) == 0
 
+        try:
+            dag = self.compile().simplify()
+        except ValueError:
+            return False
+        return dag.rewrites == 0
+    
     def __is_valid_expression(self) -> bool:
         """Determines if the expression is valid for evaluation"""
-        if not self.__is_delimiter_balanced():
+        if self.diagnostics:
             return False
         
         if self.auto_eval:
-            try:
-                self.evaluation = self.__evaluate_expression()
-                return True
-            except:
-                return False
+            return self.evaluation is not None
         
-        #TODO: Implement expression validation w/o evaluation
         return True
     
-    def __perform_operation(self, other: 'Expression', operator: function) -> 'Expression':
-        """Performs an operation on two expressions"""
-        if not (self.__is_operable() and other.__is_operable()):
-            raise TypeError("__perform_expression: Expressions must be operable to perform operation")
-        
-        if self.type == ExpressionType.NUMERIC and other.type == ExpressionType.NUMERIC:
-            new_value = operator(float(self.value), float(other.value))
-            return Expression(value = str(new_value))
-        
-        return None
-    
-    def __is_operator(self) -> bool:
-        """Determines if the expression is an operator"""
-        if self is None:
-            return False
-        return self.type in [ExpressionType.OPERATOR_ADD, ExpressionType.OPERATOR_SUBTRACT, ExpressionType.OPERATOR_MULTIPLY, ExpressionType.OPERATOR_DIVIDE]
-    
-    def __is_delimiter(self) -> bool:
-        """Determines if the expression is a delimiter"""
-        if self is None:
-            return False
-        return self.type in [ExpressionType.DELIMITER_OPEN, ExpressionType.DELIMITER_CLOSED]
-    
-    
-    def __add(x1: float, x2: float) -> float:
-        """Adds two expressions together (x1 + x2)"""
-        return x1 + x2
-    
-    def __subtract(x1: float, x2: float) -> 'float':
-        """Subtracts two expressions (x1 - x2)"""
-        return x1 - x2
-    
-    def __multiply(x1: float, x2: float) -> 'float':
-        """Multiplies two expressions (x1 * x2)"""
-        return x1*x2
-    
-    def __divide(x1: float, x2: float) -> 'float':
-        """Divides two expressions (x1 / x2)"""
-        return x1/x2
-    
-    def __join_expressions(self, expressions: list['Expression'], split: str = "") -> 'Expression':
-        """Joins a list of expressions together"""
-        return Expression(value = split.join([exp.value for exp in expressions]))
-    
-    def __outermost_delimiter_indicies(self) -> tuple[int, int]:
-        """Returns the indices of the FIRST outermost delimiter in an expression"""
-        exp_lst = self.__construct_expression_list()
-        return Expression.__outermost_delimiter_indicies(exp_lst)
-    
-    def __outermost_delimiter_indicies(expressions: list['Expression']) -> tuple[int, int]:
-        """Returns the indices of the FIRST outermost delimiter in an expression list"""
-        #TODO: Implement a more efficient algorithm + generalize
-        stack = deque() # type: deque[int]
-
-        start_index = None
-        i = 0
-        while i < len(expressions):
-            if expressions[i].type == ExpressionType.DELIMITER_OPEN:
-                if len(stack) == 0:
-                    start_index = i
-                stack.append(i)
-            elif expressions[i].type == ExpressionType.DELIMITER_CLOSED:
-                open_delim_index = stack.pop()
-                assert expressions[open_delim_index] == expressions[i].__get_corresponding_delimiter() 
-                
-                if len(stack) == 0:
-                    break
-            i += 1
-
-        return (start_index, i)
-    
-    def __construct_expression_list(self) -> list['Expression']:
-        """Constructs a list of expressions from the expression
-        EX: 3 - 2 * (5 + 1) -> [3, -, 2, *, (, 5, +, 1, )]"""
-        #TODO: ADD SUPPORT FOR UNARY OPERATORS
-
-        # Base Case: Expression is a number or None
-        if self.value is None or self.type == ExpressionType.NUMERIC:
-            return [self]
-        
-        # split the expression by operators and delimiters
-        SPLITS = list(Expression.DELIMITERS.keys()) + list(Expression.DELIMITERS.values()) + list(Expression.OPERATORS.keys())
-
-        # Combine the split points into a regex pattern
-        split_pattern = "|".join(map(re.escape, SPLITS)) + "|[^" + "".join(map(re.escape, SPLITS)) + "]+"
-
-        result = re.findall(split_pattern, self.value)
-        result = [Expression(value = x) for x in result if len(x) > 0 and x != ' ']
-
-        return result
-    
-    def __construct_expression_tree(self) -> Node:
-        """Constructs an expression tree from the expression
-        Runtime: O(n^2)
-        Space Comlexity: O(n)
-
-        TODO: Implement O(n) solution using stack
-        """
-        # Base Case: Expression is a number or None
-        if self.value is None or self.type == ExpressionType.NUMERIC:
-            return Node(val = self)
-        
-        # Construct expression list from expression
-        exp_lst = self.__construct_expression_list()
-        assert len(exp_lst) >= 3
-
-        #TODO: Collapase Case 1 and Case 2 to reduce code
-       
-        # Case 1: Expression is a single number. Return the number operated with remaining expression
-        if exp_lst[0].type == ExpressionType.NUMERIC:
-            # Ensure next item is an operator
-            # TODO: Add support for multiplication without * (ex: 3(2+1))
-            assert exp_lst[1].__is_operator()
-            parent = Node(val = exp_lst[1])
-
-            left_child = Node(val = exp_lst[0])
-            right_child = self.__join_expressions(exp_lst[2:]).__construct_expression_tree()
-
-            parent.left = left_child
-            parent.right = right_child
-
-            return parent
-        
-        # Case 2: Expression is a single delimiter. Construct tree with expression inside delimiter
-        if exp_lst[0].__is_delimiter():
-            i = Expression.__outermost_delimiter_indicies(exp_lst)[1]
-
-            new_exp = self.__join_expressions(exp_lst[1:i])  # type: Expression
-            new_exp = new_exp.__construct_expression_tree() # type: Node
-
-            # If no other expressions, return the tree from the expression inside the delimiter
-            if i >= len(exp_lst) - 1:
-                return new_exp
-            
-            # Otherwise, construct tree with remaining expression
-            # TODO: Add support for multiplication without * (ex: 3(2+1))
-            assert exp_lst[i+1].__is_operator() 
-
-            parent = Node(val = exp_lst[i+1])
-            parent.left = new_exp
-            parent.right = self.__join_expressions(exp_lst[i+2:]).__construct_expression_tree() # type: Node
-            return parent
-        
-
-        if exp_lst[0].__is_operator():
-            # TODO: Implement unary operators (e.g. -5, -3*(2+1), -(3+2), +3 + 5)
-            
-            raise NotImplementedError("Expression.__construct_expression_tree: Unary operators not implemented")
-
-        
-    def __collapse_expression_tree(head: Node) -> Node:
-        """Collapses an expression tree into a single expression node (evaluates the expression)"""
-        # Base Case: Head is None
-        if head is None:
-            return None
-        
-        # Base Case: Head is a number
-        if head.val.type == ExpressionType.NUMERIC:
-            assert head.left is None and head.right is None
-            return head
-
-        if head.val.__is_operator():
-            # Collapse left and right subtrees
-            left_tree = Expression.__collapse_expression_tree(head.left)
-            assert left_tree is not None 
-            left_exp = left_tree.val
-            assert left_exp.type == ExpressionType.NUMERIC
-   
-            right_tree = Expression.__collapse_expression_tree(head.right)
-            assert right_tree is not None 
-            right_exp = right_tree.val
-            assert right_exp.type == ExpressionType.NUMERIC
-     
-            # Construct new expression with collapsed subtrees + operator
-            OPERATOR_TO_FUNC = {ExpressionType.OPERATOR_ADD: Expression.__add,
-                                ExpressionType.OPERATOR_SUBTRACT: Expression.__subtract,
-                                ExpressionType.OPERATOR_MULTIPLY: Expression.__multiply,
-                                ExpressionType.OPERATOR_DIVIDE: Expression.__divide}
-            new_exp = left_exp.__perform_operation(right_exp, OPERATOR_TO_FUNC[head.val.type])
-
-            assert new_exp is not None
-            return Node(val = new_exp)
-    
-        raise RuntimeError("Head value should be operator or number")
-    
     def __evaluate_expression(self) -> 'Expression':
-        # Construct expression tree
-        root = self.__construct_expression_tree()
+        # Single numbers evaluate to themselves
+        if self.type == ExpressionType.NUMERIC:
+            return self
 
-        # Evaluate expression tree
-        root = Expression.__collapse_expression_tree(root)
-
-        return root.val
+        # Evaluate on native numbers, formatting only the final result
+        compiled = self.compile()
+        return Expression(value = compiled.arithmetic.format(compiled.evaluate()), mode = self.mode, context = self.context, backend = self.backend)
 
 
     ######################################
     #                 API                #
     ######################################
+
+    ## Lazy attributes
+    @property
+    def value(self) -> str:
+        """The expression string, formatted on first access when auto_format is set"""
+        if self._pending_format:
+            self._value = self.__format_value()
+            self._pending_format = False
+        return self._value
+
+    @value.setter
+    def value(self, value: str) -> None:
+        self._value = value
+        self._pending_format = self.auto_format
+        self.__reset()
+
+    @property
+    def tokens(self) -> TokenStream:
+        """The token stream of the expression"""
+        if self._tokens is _UNSET:
+            self._tokens = tokenize(self.value)
+        return self._tokens
+
+    @property
+    def type(self) -> ExpressionType:
+        """The type of the expression"""
+        if self._type is _UNSET:
+            self._type = self.__determine_type()
+        return self._type
+
+    @property
+    def diagnostics(self) -> list:
+        """The problems found by validating the expression without evaluating it"""
+        if self._diagnostics is _UNSET:
+            self._diagnostics = validate(self.tokens)
+        return self._diagnostics
+
+    @property
+    def valid(self) -> bool:
+        """Whether the expression is valid for evaluation"""
+        if self._valid is _UNSET:
+            self._valid = self.__is_valid_expression()
+        return self._valid
+
+    @property
+    def simplified(self) -> bool:
+        """Whether the expression is simplified"""
+        if self._simplified is _UNSET:
+            self._simplified = self.__is_simplified()
+        return self._simplified
+
+    @property
+    def canonical(self) -> bytes:
+        """The 128-bit canonical digest (of the normalized text, for expressions that do not compile)"""
+        if self._canonical is _UNSET:
+            self._canonical = canonical_key(self, self.mode)
+        return self._canonical
+
+    @property
+    def evaluation(self) -> Optional['Expression']:
+        """The evaluated expression, or None if it cannot be evaluated"""
+        if self._evaluation is _UNSET:
+            try:
+                self._evaluation = None if self.diagnostics else self.__evaluate_expression()
+            except Exception:
+                self._evaluation = None
+        return self._evaluation
     
     ## Evaluation
     def expression_evaluate(self) ->'Expression':
         """Evaluates the expression
         Returns: Evaluated Expression Object"""
-        if self.evaluation is not None:
-            return self.evaluation
+        if self._evaluation is not _UNSET and self._evaluation is not None:
+            return self._evaluation
         
         if not self.valid: 
             raise RuntimeError("Not a valid a expression.")
         
-        return self.__evaluate_expression()
+        self._evaluation = self.__evaluate_expression()
+        return self._evaluation
+
+    ## Compilation
+    def expression_compile(self) -> CompiledExpression:
+        """Compiles the expression once for repeated evaluation
+        Identical formulas share one compiled form through the process-wide cache
+        Returns: CompiledExpression"""
+        return compile_expression(self.value, self.mode, self.context, self.backend)
+
+    compile = expression_compile
 
 
     ## GETTERS
@@ -0,0 +1,185 @@
+"""
+graphalith lexer module.
+
+Scans an expression once and produces a TokenStream: parallel arrays of
+token kinds, span offsets and parsed numeric values. Operator and delimiter
+tokens are shared singletons, so only numbers and names ever allocate a
+Token object, and only when one is explicitly requested.
+
+The lexer accepts `str` as well as any bytes-like object (bytes, bytearray,
+memoryview, mmap), in which case spans index directly into the buffer.
+"""
+
+from array import array
+from enum import IntEnum
+from typing import Iterator, NamedTuple, Optional, Union
+import re
+
+from graphalith.profiling import profiled
+
+
+class TokenKind(IntEnum):
+    """Enum class for token kinds"""
+    UNKNOWN = 0
+    NUMBER = 1
+    NAME = 2
+    DELIMITER_OPEN = 3
+    DELIMITER_CLOSED = 4
+    OPERATOR_ADD = 5
+    OPERATOR_SUBTRACT = 6
+    OPERATOR_MULTIPLY = 7
+    OPERATOR_DIVIDE = 8
+
+
+class Token(NamedTuple):
+    """A single lexeme. Operators and delimiters are shared singletons"""
+    kind: TokenKind
+    text: str
+    value: Optional[float] = None
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+DELIMITERS = {"<": ">", "(": ")", "{": "}", "[": "]"}
+
+OPERATOR_KINDS = frozenset((TokenKind.OPERATOR_ADD,
+                            TokenKind.OPERATOR_SUBTRACT,
+                            TokenKind.OPERATOR_MULTIPLY,
+                            TokenKind.OPERATOR_DIVIDE))
+
+SYMBOL_TOKENS = {"+": Token(TokenKind.OPERATOR_ADD, "+"),
+                 "-": Token(TokenKind.OPERATOR_SUBTRACT, "-"),
+                 "*": Token(TokenKind.OPERATOR_MULTIPLY, "*"),
+                 "/": Token(TokenKind.OPERATOR_DIVIDE, "/")}
+SYMBOL_TOKENS.update({ch: Token(TokenKind.DELIMITER_OPEN, ch) for ch in DELIMITERS})
+SYMBOL_TOKENS.update({ch: Token(TokenKind.DELIMITER_CLOSED, ch) for ch in DELIMITERS.values()})
+
+# Lookup tables keyed by the raw lexeme, for both str and bytes sources
+_SYMBOL_KINDS: dict[Union[str, bytes], TokenKind] = {}
+for _ch, _token in SYMBOL_TOKENS.items():
+    _SYMBOL_KINDS[_ch] = _token.kind
+    _SYMBOL_KINDS[_ch.encode()] = _token.kind
+
+# Groups: 1 number, 2 name, 3 operator, 4 open delimiter, 5 closed delimiter, 6 anything else
+_PATTERN_SOURCE = (r"\s*(?:"
+                   r"((?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)"
+                   r"|([A-Za-z_][A-Za-z0-9_]*)"
+                   r"|([-+*/])"
+                   r"|([(\[{<])"
+                   r"|([)\]}>])"
+                   r"|(\S))")
+
+PATTERN = re.compile(_PATTERN_SOURCE, re.DOTALL)
+BYTES_PATTERN = re.compile(_PATTERN_SOURCE.encode(), re.DOTALL)
+
+_GROUP_NUMBER = 1
+_GROUP_NAME = 2
+_GROUP_UNKNOWN = 6
+
+# Normalization patterns: whitespace runs and runs of sign characters
+_WHITESPACE = re.compile(r"\s+")
+_SIGN_RUN = re.compile(r"[-+]{2,}")
+_WORD_CHARS = frozenset("0123456789.abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+
+
+class TokenStream:
+    """Compact, array-backed sequence of tokens scanned from a source"""
+
+    __slots__ = ("source", "kinds", "starts", "ends", "values")
+
+    def __init__(self, source) -> None:
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.values = array("d")
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, i: int) -> Token:
+        """Returns the token at index i (a shared singleton for symbols)"""
+        kind = self.kinds[i]
+        text = self.text(i)
+        if kind == TokenKind.NUMBER:
+            return Token(TokenKind.NUMBER, text, self.values[i])
+        if kind in (TokenKind.NAME, TokenKind.UNKNOWN):
+            return Token(TokenKind(kind), text)
+        return SYMBOL_TOKENS[text]
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(len(self.kinds)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"TokenStream({[token.text for token in self]!r})"
+
+    def text(self, i: int) -> str:
+        """Returns the source text of the token at index i
+        Returns: String"""
+        text = self.source[self.starts[i]:self.ends[i]]
+        if not isinstance(text, str):
+            text = bytes(text).decode(errors="replace")
+        return text
+
+
+def _collapse_whitespace(match: re.Match) -> str:
+    """Drops a whitespace run unless it separates two lexemes that would merge"""
+    text = match.string
+    start, end = match.span()
+    if 0 < start and end < len(text) and text[start-1] in _WORD_CHARS and text[end] in _WORD_CHARS:
+        return " "
+    return ""
+
+def _collapse_signs(match: re.Match) -> str:
+    """Replaces a run of + and - with the single sign it is equivalent to"""
+    return "-" if match.group().count("-") % 2 else "+"
+
+
+######################################
+#                 API                #
+######################################
+
+@profiled("normalize")
+def normalize(text: str) -> str:
+    """Returns the canonical spelling of an expression string
+    Whitespace is removed (kept as one space only where two lexemes would
+    otherwise merge) and sign runs are collapsed (--, ++, -+, +-, ...)
+    EX: 2 --  3 * +-x -> 2+3*-x"""
+    text = _WHITESPACE.sub(_collapse_whitespace, text)
+    return _SIGN_RUN.sub(_collapse_signs, text)
+
+@profiled("tokenize")
+def tokenize(source, pos: int = 0, endpos: Optional[int] = None) -> TokenStream:
+    """Scans source[pos:endpos] once and returns its token stream
+    EX: 3 - 2 * (5 + 1) -> [3, -, 2, *, (, 5, +, 1, )]"""
+    stream = TokenStream(source)
+    kinds, starts, ends, values = stream.kinds, stream.starts, stream.ends, stream.values
+
+    pattern = PATTERN if isinstance(source, str) else BYTES_PATTERN
+    if endpos is None:
+        endpos = len(source)
+
+    for match in pattern.finditer(source, pos, endpos):
+        group = match.lastindex or 0  # always set: every alternative is a group
+        lexeme = match.group(group)
+
+        if group == _GROUP_NUMBER:
+            kinds.append(TokenKind.NUMBER)
+            values.append(float(lexeme))
+        else:
+            if group == _GROUP_NAME:
+                kinds.append(TokenKind.NAME)
+            elif group == _GROUP_UNKNOWN:
+                kinds.append(TokenKind.UNKNOWN)
+            else:
+                kinds.append(_SYMBOL_KINDS[lexeme])
+            values.append(0.0)
+
+        start, end = match.span(group)
+        starts.append(start)
+        ends.append(end)
+
+    return stream
@@ -1,9 +1,15 @@
+from collections import deque
+
+from graphalith import profiling
+
 class Node:
     """Node class for graphalith"""
     def __init__(self, val = None, left = None, right = None) -> None:
         self.val = val
         self.left = left
         self.right = right
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.count("Node")
 
     def bfs(self):
         """Breadth first search for node class"""
@@ -11,14 +17,12 @@ class Node:
             return []
         
         ret = []
-        queue = [self]
+        queue = deque([self])
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             ret.append(node.val)
-            if node.left:
+            if node.left is not None:
                 queue.append(node.left)
-            if node.right:
+            if node.right is not None:
                 queue.append(node.right)
         return ret
-
-
@@ -0,0 +1,151 @@
+"""
+graphalith numeric module.
+
+Selectable number systems for evaluation. Values stay native numbers from
+the constant pool to the result; they are only turned into strings at the
+output boundary (Arithmetic.format).
+
+    float     binary floating point (default, fastest)
+    int       exact integers; division must be exact or ArithmeticError is raised
+    fraction  exact rationals (fractions.Fraction)
+    decimal   decimal.Decimal, using an explicit context if one is given and
+              the calling thread's current context otherwise
+"""
+
+from decimal import Context, Decimal
+from enum import Enum
+from fractions import Fraction
+from typing import Callable, Optional
+
+from graphalith.lexer import TokenKind, TokenStream
+from graphalith.tree import OPERATIONS, TOKEN_OPCODES, Opcode
+
+
+class NumericMode(Enum):
+    """Enum class for numeric evaluation modes"""
+    FLOAT = "float"
+    INT = "int"
+    FRACTION = "fraction"
+    DECIMAL = "decimal"
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _int_literal(text: str) -> int:
+    """Parses an integral literal such as '12', '12.0' or '1.2e1'"""
+    value = Fraction(text)
+    if value.denominator != 1:
+        raise ValueError(f"int mode: {text!r} is not an integer")
+    return value.numerator
+
+def _int_coerce(value) -> int:
+    """Converts an integral binding to int"""
+    if isinstance(value, int):
+        return value
+    return _int_literal(str(value))
+
+def _int_divide(x1: int, x2: int) -> int:
+    """Divides two integers exactly (x1 / x2)"""
+    quotient, remainder = divmod(x1, x2)
+    if remainder:
+        raise ArithmeticError(f"int mode: {x1} / {x2} is not an integer")
+    return quotient
+
+
+class Arithmetic:
+    """Number parsing, operations and formatting for one numeric mode"""
+
+    __slots__ = ("mode", "context", "number", "coerce", "operations", "negate")
+
+    def __init__(self, mode = NumericMode.FLOAT, context: Optional[Context] = None) -> None:
+        self.mode = mode = NumericMode(mode)
+        if context is not None and mode != NumericMode.DECIMAL:
+            raise ValueError(f"Arithmetic: a context only applies to decimal mode, not {mode.value}")
+
+        self.context = context
+        self.operations: dict = OPERATIONS
+        self.negate: Optional[Callable] = None  # None means the unary - operator
+        self.number: Callable
+        self.coerce: Optional[Callable]
+
+        if mode == NumericMode.FLOAT:
+            self.number = float
+            self.coerce = None
+        elif mode == NumericMode.INT:
+            self.number = _int_literal
+            self.coerce = _int_coerce
+            self.operations = dict(OPERATIONS)
+            self.operations[Opcode.DIVIDE] = _int_divide
+        elif mode == NumericMode.FRACTION:
+            self.number = Fraction
+            self.coerce = Fraction
+        elif context is None:
+            self.number = Decimal
+            self.coerce = Decimal
+        else:
+            self.number = Decimal
+            self.coerce = context.create_decimal
+            self.operations = {Opcode.ADD: context.add,
+                               Opcode.SUBTRACT: context.subtract,
+                               Opcode.MULTIPLY: context.multiply,
+                               Opcode.DIVIDE: context.divide}
+            self.negate = context.minus
+
+    def __repr__(self) -> str:
+        return f"Arithmetic({self.mode.value!r})"
+
+    def format(self, value) -> str:
+        """Converts a result to its output string
+        Returns: String"""
+        return str(value)
+
+
+class ValueBuilder:
+    """Parser builder that computes values instead of building a tree
+    Passed to parse(), it evaluates an expression in one pass with no
+    intermediate structure; names are looked up in `bindings`"""
+
+    __slots__ = ("arithmetic", "number", "operations", "negate_value", "bindings")
+
+    def __init__(self, arithmetic: Arithmetic, bindings: Optional[dict] = None) -> None:
+        self.arithmetic = arithmetic
+        bindings = bindings or {}
+        if arithmetic.coerce is not None:
+            bindings = {name: arithmetic.coerce(value) for name, value in bindings.items()}
+        self.bindings = bindings
+        self.number = None if arithmetic.mode == NumericMode.FLOAT else arithmetic.number
+        self.operations = {kind: arithmetic.operations[opcode] for kind, opcode in TOKEN_OPCODES.items()}
+        self.negate_value = arithmetic.negate
+
+    def operand(self, tokens: TokenStream, i: int):
+        if tokens.kinds[i] == TokenKind.NAME:
+            name = tokens.text(i)
+            if name not in self.bindings:
+                raise NameError(f"evaluate: unbound variable(s) {name}")
+            return self.bindings[name]
+        if self.number is None:
+            return tokens.values[i]
+        return self.number(tokens.text(i))
+
+    def negate(self, operand):
+        return -operand if self.negate_value is None else self.negate_value(operand)
+
+    def binary(self, kind: TokenKind, left, right):
+        return self.operations[kind](left, right)
+
+
+######################################
+#                 API                #
+######################################
+
+# Shared, context-free arithmetic for each mode
+ARITHMETICS = {mode: Arithmetic(mode) for mode in NumericMode}
+
+def get_arithmetic(mode = NumericMode.FLOAT, context: Optional[Context] = None) -> Arithmetic:
+    """Returns the arithmetic for mode (shared unless a decimal context is given)
+    Returns: Arithmetic"""
+    if context is None:
+        return ARITHMETICS[NumericMode(mode)]
+    return Arithmetic(mode, context)
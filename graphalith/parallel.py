@@ -0,0 +1,245 @@
+"""
+graphalith parallel module.
+
+Evaluates one very large compiled expression on several cores.
+
+In a postfix program every subtree is a contiguous slice ending at its root,
+so the plan is made without building any tree. Starting from the root, any
+subtree larger than the target size (the program split into PIECES_PER_JOB
+pieces per worker) is broken into its children; what is left is a frontier
+of disjoint subtrees under a small residual program (for a long sum, the
+spine of additions). Consecutive frontier subtrees are grouped into
+batches of about the target size, and each batch becomes one stand-alone
+CompiledExpression (its own constants and variables) whose program leaves
+one value per subtree on the stack. Batches are serialized once in the
+compact binary format of graphalith.serialize and evaluated in a process
+pool; their results are substituted as constants into the residual program,
+which runs in the calling process.
+
+Every operation is applied to the same operands as in sequential
+evaluation, so results are identical, not merely close. Decimal batches
+run under the caller's context (its explicit one, or the calling thread's
+current context), never the worker's own default. Programs under
+PARALLEL_THRESHOLD instructions are simply evaluated in-process.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from decimal import Context
+from typing import Optional
+import decimal
+import os
+
+from graphalith.compiler import CompiledExpression
+from graphalith.numeric import NumericMode, get_arithmetic
+from graphalith.serialize import dumps, restore
+from graphalith.tree import Opcode, run_program, run_stack
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+# Instructions below which an expression is evaluated in-process
+PARALLEL_THRESHOLD = 100000
+
+# Batches planned per worker, so uneven batches still balance
+PIECES_PER_JOB = 4
+
+# Smallest subtree shipped to a worker; smaller ones stay in the residual program
+MIN_SUBTREE = 8
+
+# Decoded batches each worker keeps, keyed by their serialized record
+WORKER_CACHE_SIZE = 64
+
+_LOADED: dict[bytes, CompiledExpression] = {}  # per worker process
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _subtree_starts(program: tuple) -> list:
+    """Returns, for each instruction, the index where its subtree begins"""
+    starts = []
+    stack: list[int] = []
+    for k, (opcode, _) in enumerate(program):
+        if opcode == Opcode.CONSTANT or opcode == Opcode.LOAD:
+            start = k
+        elif opcode == Opcode.NEGATE:
+            start = stack.pop()
+        else:
+            stack.pop()
+            start = stack.pop()
+        stack.append(start)
+        starts.append(start)
+    return starts
+
+def _frontier(program: tuple, starts: list, target: int) -> list:
+    """Breaks every subtree larger than target into its children
+    Returns: Sorted list of (start, root) of the disjoint subtrees worth shipping"""
+    frontier = []
+    pending = [len(program) - 1]
+    while pending:
+        root = pending.pop()
+        size = root - starts[root] + 1
+        if size <= target:
+            if size >= MIN_SUBTREE:
+                frontier.append((starts[root], root))
+        elif program[root][0] == Opcode.NEGATE:
+            pending.append(root - 1)
+        else:
+            pending += [starts[root - 1] - 1, root - 1]
+    frontier.sort()
+    return frontier
+
+def _batches(frontier: list, target: int) -> list:
+    """Groups consecutive subtrees into batches of about target instructions
+    Returns: List of lists of (start, root)"""
+    batches, batch, size = [], [], 0
+    for start, root in frontier:
+        batch.append((start, root))
+        size += root - start + 1
+        if size >= target:
+            batches.append(batch)
+            batch, size = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _extract(compiled: CompiledExpression, spans: list) -> tuple:
+    """Copies the subtrees program[start:root + 1] into one stand-alone multi-result expression
+    Returns: (serialized record, indices of its variables in the whole expression)"""
+    constants: list = []
+    variables: list[int] = []
+    constant_index: dict[int, int] = {}
+    variable_index: dict[int, int] = {}
+    program = []
+    for start, root in spans:
+        for opcode, arg in compiled.program[start:root + 1]:
+            if opcode == Opcode.CONSTANT:
+                if arg not in constant_index:
+                    constant_index[arg] = len(constants)
+                    constants.append(compiled.constants[arg])
+                arg = constant_index[arg]
+            elif opcode == Opcode.LOAD:
+                if arg not in variable_index:
+                    variable_index[arg] = len(variables)
+                    variables.append(arg)
+                arg = variable_index[arg]
+            program.append((opcode, arg))
+
+    names = tuple(compiled.variables[i] for i in variables)
+    batch = CompiledExpression(tuple(program), tuple(constants), names, "", compiled.arithmetic)
+    return dumps(batch), tuple(variables)
+
+def evaluate_batch(record: bytes, values: tuple, context: Optional[Context] = None) -> list:
+    """Evaluates one serialized batch of subtrees (runs in worker processes)
+    A decimal context applies to this call only; cached batches stay context-free
+    Returns: List of the subtree values, in order"""
+    compiled = _LOADED.get(record)
+    if compiled is None:
+        if len(_LOADED) >= WORKER_CACHE_SIZE:
+            _LOADED.clear()
+        compiled = _LOADED[record] = restore(record, None, "interpreter")
+    arithmetic = compiled.arithmetic if context is None else get_arithmetic(compiled.mode, context)
+    return run_stack(compiled.program, compiled.constants, values, arithmetic.operations, arithmetic.negate)
+
+
+######################################
+#                 API                #
+######################################
+
+class ParallelEvaluator:
+    """Evaluates one large compiled expression across a process pool
+    The expression is partitioned and serialized once; each evaluate() ships the batches and variable values,
+    and workers decode each batch only the first time they see it"""
+
+    def __init__(self, compiled: CompiledExpression, jobs: Optional[int] = None, threshold: int = PARALLEL_THRESHOLD,
+                 executor: Optional[Executor] = None) -> None:
+        self.compiled = compiled
+        self.jobs = (os.cpu_count() or 1) if jobs is None else jobs
+        self.threshold = threshold
+        self.pieces: list[tuple[bytes, tuple]] = []  # batch record, variable indices
+        self.residual = compiled.program
+
+        self._executor: Optional[Executor] = executor
+        self._owned = False
+
+        if len(compiled) >= threshold and self.jobs > 1:
+            self.__plan()
+
+    def __plan(self) -> None:
+        """Chooses the subtrees to ship, batches them and builds the residual program around them"""
+        compiled = self.compiled
+        program = compiled.program
+        target = max(MIN_SUBTREE, len(program) // (self.jobs * PIECES_PER_JOB))
+        batches = _batches(_frontier(program, _subtree_starts(program), target), target)
+        self.pieces = [_extract(compiled, batch) for batch in batches]
+
+        # The j-th shipped subtree becomes constant len(constants) + j of the residual program
+        residual: list[tuple[int, int]] = []
+        slot = len(compiled.constants)
+        k = 0
+        for batch in batches:
+            for start, root in batch:
+                residual.extend(program[k:start])
+                residual.append((Opcode.CONSTANT, slot))
+                slot += 1
+                k = root + 1
+        residual.extend(program[k:])
+        self.residual = tuple(residual)
+
+    def __enter__(self) -> 'ParallelEvaluator':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ParallelEvaluator({len(self.compiled)} instructions, {len(self.pieces)} batches, residual {len(self.residual)})"
+
+    @property
+    def parallel(self) -> bool:
+        """Whether evaluation is split across processes"""
+        return bool(self.pieces)
+
+    def evaluate(self, **bindings):
+        """Evaluates the expression with the given variable bindings
+        Returns: Number"""
+        compiled = self.compiled
+        if not self.pieces:
+            return compiled.evaluate(**bindings)
+
+        try:
+            values = tuple([bindings[name] for name in compiled.variables])
+        except KeyError as error:
+            missing = [name for name in compiled.variables if name not in bindings]
+            raise NameError(f"evaluate: unbound variable(s) {', '.join(missing)}") from error
+        arithmetic = compiled.arithmetic
+        if arithmetic.coerce is not None:
+            values = tuple([arithmetic.coerce(value) for value in values])
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers = self.jobs)
+            self._owned = True
+        context = None
+        if arithmetic.mode == NumericMode.DECIMAL:
+            # Workers have their own default context; send a copy of the one this evaluation runs under
+            context = (arithmetic.context or decimal.getcontext()).copy()
+        futures = [self._executor.submit(evaluate_batch, record, tuple([values[i] for i in indices]), context)
+                   for record, indices in self.pieces]
+        results = [value for future in futures for value in future.result()]
+        return run_program(self.residual, compiled.constants + tuple(results), values, arithmetic.operations, arithmetic.negate)
+
+    def close(self) -> None:
+        """Shuts down the process pool if this evaluator started it"""
+        if self._owned and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._owned = False
+
+def evaluate_parallel(compiled: CompiledExpression, jobs: Optional[int] = None, threshold: int = PARALLEL_THRESHOLD, **bindings):
+    """Evaluates a compiled expression once, in parallel when it has at least `threshold` instructions
+    Returns: Number"""
+    with ParallelEvaluator(compiled, jobs, threshold) as evaluator:
+        return evaluator.evaluate(**bindings)
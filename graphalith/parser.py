@@ -0,0 +1,192 @@
+"""
+graphalith parser module.
+
+Builds expression trees from a TokenStream in a single left-to-right pass
+using the shunting-yard algorithm. The parser never recurses, so neither
+long operator chains nor deeply nested delimiters can exhaust the stack.
+
+Precedence, from loosest to tightest binding:
+    1. binary + and -           (left associative)
+    2. binary * and /           (left associative, includes implicit products
+                                 such as `3(2+1)`, `2x` and `(a)(b)`)
+    3. unary + and -            (prefix, so `-3*(4-6)` is `(-3)*(4-6)`)
+
+By default the result is a tree of Node objects whose `val` is a Token.
+Binary operators have both children, unary minus only has a right child, and
+unary plus is dropped entirely. Operators are reduced in postfix order, so a
+different builder can emit other representations (e.g. a flat postfix
+program) without an intermediate Node tree.
+"""
+
+from typing import Optional
+
+from graphalith.lexer import DELIMITERS, OPERATOR_KINDS, SYMBOL_TOKENS, TokenKind, TokenStream
+from graphalith.node import Node
+from graphalith.profiling import profiled
+
+
+class ParseError(ValueError):
+    """Raised when a token stream does not form a valid expression"""
+
+    def __init__(self, message: str, position: int) -> None:
+        super().__init__(f"{message} (at offset {position})")
+        self.position = position
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+# Operator stack entries that are not binary operator kinds
+_OPEN = -1
+_NEGATE = -2
+
+PRECEDENCE = {_OPEN: 0,
+              TokenKind.OPERATOR_ADD: 1,
+              TokenKind.OPERATOR_SUBTRACT: 1,
+              TokenKind.OPERATOR_MULTIPLY: 2,
+              TokenKind.OPERATOR_DIVIDE: 2,
+              _NEGATE: 3}
+
+OPERATOR_TOKENS = {token.kind: token for token in SYMBOL_TOKENS.values() if token.kind in OPERATOR_KINDS}
+
+
+class TreeBuilder:
+    """Builds Node trees as the parser reduces operands and operators
+    Other builders implement the same three methods; they are called in postfix order"""
+
+    def operand(self, tokens: TokenStream, i: int) -> Node:
+        """Returns the result for the number or name token at index i"""
+        return Node(val = tokens[i])
+
+    def negate(self, operand: Node) -> Node:
+        """Returns the result of unary minus applied to operand"""
+        return Node(val = OPERATOR_TOKENS[TokenKind.OPERATOR_SUBTRACT], right = operand)
+
+    def binary(self, kind: TokenKind, left: Node, right: Node) -> Node:
+        """Returns the result of the binary operator kind applied to left and right"""
+        return Node(val = OPERATOR_TOKENS[kind], left = left, right = right)
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _reduce(operators: list, operands: list, builder: TreeBuilder) -> None:
+    """Pops one operator and replaces its operands with the combined result"""
+    code = operators.pop()
+    right = operands.pop()
+    if code == _NEGATE:
+        operands.append(builder.negate(right))
+    else:
+        left = operands.pop()
+        operands.append(builder.binary(code, left, right))
+
+def _push_binary(code: int, operators: list, operands: list, builder: TreeBuilder) -> None:
+    """Reduces every stacked operator that binds at least as tightly, then pushes code"""
+    precedence = PRECEDENCE[code]
+    while operators and PRECEDENCE[operators[-1]] >= precedence:
+        _reduce(operators, operands, builder)
+    operators.append(code)
+
+
+######################################
+#                 API                #
+######################################
+
+class Parser:
+    """Incremental shunting-yard parser
+    Token spans are fed in order (possibly from different TokenStreams) and
+    reduced as soon as precedence allows, so the stacks only ever hold one
+    pending operand per nesting level and precedence tier"""
+
+    __slots__ = ("builder", "operands", "operators", "opened", "expect_operand", "end")
+
+    def __init__(self, builder: Optional[TreeBuilder] = None) -> None:
+        self.builder = TreeBuilder() if builder is None else builder
+        self.operands: list[Node] = []
+        self.operators: list[int] = []
+        self.opened: list[tuple[str, int]] = []  # text and offset of each open delimiter
+        self.expect_operand = True
+        self.end = 0  # offset just past the last token fed
+
+    def feed(self, tokens: TokenStream, lo: int = 0, hi: Optional[int] = None, offset: int = 0) -> None:
+        """Consumes the token span tokens[lo:hi]
+        `offset` is added to token positions in error messages (the stream's place in a larger input)"""
+        builder = self.builder
+        operands, operators, opened = self.operands, self.operators, self.opened
+        expect_operand = self.expect_operand
+        kinds = tokens.kinds
+        starts = tokens.starts
+        if hi is None:
+            hi = len(kinds)
+
+        for i in range(lo, hi):
+            kind = kinds[i]
+
+            if kind == TokenKind.NUMBER or kind == TokenKind.NAME:
+                if not expect_operand:
+                    _push_binary(TokenKind.OPERATOR_MULTIPLY, operators, operands, builder)
+                operands.append(builder.operand(tokens, i))
+                expect_operand = False
+
+            elif kind in OPERATOR_KINDS:
+                if not expect_operand:
+                    _push_binary(kind, operators, operands, builder)
+                    expect_operand = True
+                elif kind == TokenKind.OPERATOR_SUBTRACT:
+                    operators.append(_NEGATE)
+                elif kind != TokenKind.OPERATOR_ADD:
+                    raise ParseError(f"parse: operator {tokens.text(i)!r} is missing its left operand", starts[i] + offset)
+
+            elif kind == TokenKind.DELIMITER_OPEN:
+                if not expect_operand:
+                    _push_binary(TokenKind.OPERATOR_MULTIPLY, operators, operands, builder)
+                operators.append(_OPEN)
+                opened.append((tokens.text(i), starts[i] + offset))
+                expect_operand = True
+
+            elif kind == TokenKind.DELIMITER_CLOSED:
+                if expect_operand:
+                    raise ParseError(f"parse: expected an operand before {tokens.text(i)!r}", starts[i] + offset)
+                while operators and operators[-1] != _OPEN:
+                    _reduce(operators, operands, builder)
+                if not operators:
+                    raise ParseError(f"parse: unmatched closing delimiter {tokens.text(i)!r}", starts[i] + offset)
+                operators.pop()
+                text, _ = opened.pop()
+                if DELIMITERS[text] != tokens.text(i):
+                    raise ParseError(f"parse: {tokens.text(i)!r} does not close {text!r}", starts[i] + offset)
+
+            else:
+                raise ParseError(f"parse: unexpected character {tokens.text(i)!r}", starts[i] + offset)
+
+        self.expect_operand = expect_operand
+        if hi > lo:
+            self.end = tokens.ends[hi - 1] + offset
+
+    def finish(self) -> Node:
+        """Reduces what is left once every token has been fed
+        Returns: The builder's result for the whole input"""
+        if self.expect_operand:
+            raise ParseError("parse: expression ended while expecting an operand", self.end)
+
+        operators, operands = self.operators, self.operands
+        while operators:
+            if operators[-1] == _OPEN:
+                raise ParseError(f"parse: unclosed delimiter {self.opened[-1][0]!r}", self.opened[-1][1])
+            _reduce(operators, operands, self.builder)
+
+        assert len(operands) == 1
+        return operands[0]
+
+
+@profiled("parse")
+def parse(tokens: TokenStream, lo: int = 0, hi: Optional[int] = None, builder: Optional[TreeBuilder] = None) -> Node:
+    """Constructs an expression tree from the token span tokens[lo:hi]
+    Runtime: O(n)
+    Space Complexity: O(n)
+    Returns: The builder's result for the whole span (a Node by default)"""
+    parser = Parser(builder)
+    parser.feed(tokens, lo, hi)
+    return parser.finish()
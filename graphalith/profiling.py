@@ -0,0 +1,159 @@
+"""
+graphalith profiling module.
+
+Opt-in instrumentation of the evaluation pipeline. While a Profiler is
+active it records, per phase, the number of calls and the wall time spent,
+plus counters such as allocated Expression/Node objects and compile cache
+hits and misses.
+
+    with Profiler() as profiler:
+        Expression(value = "2 * (x + 1)").compile().evaluate(x = 3)
+    print(profiler.format())
+
+or through the process-wide registry:
+
+    profiling.enable()
+    ...
+    profiling.report()
+
+Phase times are inclusive: "compile" contains the "tokenize" and "parse"
+calls made while compiling. Recording covers the current process only;
+worker processes of a parallel batch are not profiled.
+
+When no profiler is active every hook is a single global lookup and a
+comparison with None, so the hooks stay in production code.
+"""
+
+from functools import wraps
+from time import perf_counter
+from typing import Optional
+import threading
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+# The profiler currently recording, or None (read directly by the hooks)
+ACTIVE: Optional["Profiler"] = None
+
+
+class Profiler:
+    """Collects per-phase call counts and wall time, and named counters"""
+
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._previous: list[Optional[Profiler]] = []  # profilers active before each start()
+
+    def __repr__(self) -> str:
+        return f"Profiler({len(self.calls)} phases, {len(self.counters)} counters, active={ACTIVE is self})"
+
+    def __enter__(self) -> 'Profiler':
+        return self.start()
+
+    def __exit__(self, *exception) -> None:
+        self.stop()
+
+    ## Activation
+    def start(self) -> 'Profiler':
+        """Makes this the active profiler until stop()
+        Returns: Profiler"""
+        global ACTIVE
+        self._previous.append(ACTIVE)
+        ACTIVE = self
+        return self
+
+    def stop(self) -> None:
+        """Restores the profiler that was active before start()"""
+        global ACTIVE
+        ACTIVE = self._previous.pop()
+
+    ## Recording
+    def record(self, phase: str, seconds: float) -> None:
+        """Adds one call of a phase that took `seconds`"""
+        with self._lock:
+            self.calls[phase] = self.calls.get(phase, 0) + 1
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Adds amount to a named counter"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def reset(self) -> None:
+        """Clears everything recorded so far"""
+        with self._lock:
+            self.calls.clear()
+            self.seconds.clear()
+            self.counters.clear()
+
+    ## Reporting
+    def report(self) -> dict:
+        """Returns a snapshot of the recorded phases and counters
+        Returns: Dictionary"""
+        with self._lock:
+            return {"phases": {phase: {"calls": calls, "seconds": self.seconds[phase]}
+                               for phase, calls in self.calls.items()},
+                    "counters": dict(self.counters)}
+
+    def format(self) -> str:
+        """Returns the report as a human readable table, slowest phase first
+        Returns: String"""
+        report = self.report()
+        lines = [f"{'phase':<20} {'calls':>10} {'total ms':>12} {'us/call':>10}"]
+        for phase, entry in sorted(report["phases"].items(), key = lambda item: -item[1]["seconds"]):
+            lines.append(f"{phase:<20} {entry['calls']:>10} {entry['seconds'] * 1e3:>12.3f} "
+                         f"{entry['seconds'] * 1e6 / entry['calls']:>10.2f}")
+        for counter, value in sorted(report["counters"].items()):
+            lines.append(f"{counter:<20} {value:>10}")
+        return "\n".join(lines)
+
+
+######################################
+#                 API                #
+######################################
+
+def profiled(phase: str):
+    """Decorator recording every call of the function as `phase` while a profiler is active"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = ACTIVE
+            if profiler is None:
+                return function(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.record(phase, perf_counter() - start)
+        return wrapper
+    return decorator
+
+def count(counter: str, amount: int = 1) -> None:
+    """Adds amount to a counter of the active profiler, if any"""
+    profiler = ACTIVE
+    if profiler is not None:
+        profiler.count(counter, amount)
+
+# Process-wide registry
+PROFILER = Profiler()
+
+def enable() -> Profiler:
+    """Starts recording into the process-wide profiler
+    Returns: Profiler"""
+    if ACTIVE is not PROFILER:
+        PROFILER.start()
+    return PROFILER
+
+def disable() -> None:
+    """Stops recording into the process-wide profiler"""
+    if ACTIVE is PROFILER:
+        PROFILER.stop()
+
+def report() -> dict:
+    """Returns the process-wide profiler's report
+    Returns: Dictionary"""
+    return PROFILER.report()
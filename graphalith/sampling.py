@@ -0,0 +1,212 @@
+"""
+graphalith sampling module.
+
+Samples a single-variable expression over an interval for plotting.
+
+The x axis is cut into tiles whose width is a power of two, chosen from the
+requested range so that a view spans TILES_PER_VIEW to twice as many tiles.
+Each tile starts from a coarse, even grid and bisects an interval only where
+its midpoint strays from the chord by more than `tolerance` times the tile's
+vertical extent, so flat stretches keep few samples while bends, steep
+slopes and poles get many. Where refinement hits max_depth without
+settling and the midpoint lies outside its neighbours (a pole, or an
+evaluation error such as division by zero) a NaN sample is emitted, which
+plotting libraries draw as a gap.
+
+Tiles sit on a fixed grid (tile i of level k covers [i 2^k, (i+1) 2^k]) and
+are kept in a thread-safe LRU cache keyed by the compiled program (not its
+source text, which compiled trees may lack), the numeric mode and decimal
+context, the sampling options, level and index. Panning reuses every tile still in view, and zooming back
+to an earlier level finds its tiles already sampled.
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple, Union
+import decimal
+import math
+import threading
+
+from graphalith.cache import compile_expression
+from graphalith.compiler import CompiledExpression
+from graphalith.numeric import NumericMode
+
+
+class Samples(NamedTuple):
+    """Sorted sample points of a curve; a NaN y marks a gap"""
+    xs: array
+    ys: array
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+DEFAULT_TOLERANCE = 1e-3
+DEFAULT_MAX_DEPTH = 12
+DEFAULT_MAX_TILES = 4096
+
+# Minimum number of tiles across a requested range
+TILES_PER_VIEW = 4
+
+# Even intervals each tile starts from before refining
+INITIAL_INTERVALS = 16
+
+_NAN = float("nan")
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _function(compiled: CompiledExpression):
+    """Returns a float function of the expression's single variable, NaN where evaluation fails"""
+    run = compiled.run
+    coerce = compiled.arithmetic.coerce
+
+    def function(x: float) -> float:
+        try:
+            return float(run((x,) if coerce is None else (coerce(x),)) if compiled.variables else run(()))
+        except (ArithmeticError, ValueError):
+            return _NAN
+    return function
+
+def _expression_key(compiled: CompiledExpression) -> tuple:
+    """Identifies what a compiled expression computes: its program, mode and decimal context settings
+    Returns: Hashable tuple"""
+    context = None
+    if compiled.mode == NumericMode.DECIMAL:
+        current = compiled.arithmetic.context or decimal.getcontext()
+        traps = tuple(sorted(signal.__name__ for signal, trapped in current.traps.items() if trapped))
+        context = (current.prec, current.rounding, current.Emin, current.Emax, current.clamp, traps)
+    return (compiled.program, compiled.constants, compiled.variables, compiled.mode, context)
+
+def _sample_tile(function, x0: float, x1: float, tolerance: float, max_depth: int) -> Samples:
+    """Adaptively samples [x0, x1]
+    Returns: Samples including both ends"""
+    step = (x1 - x0) / INITIAL_INTERVALS
+    grid = [x0 + i * step for i in range(INITIAL_INTERVALS)] + [x1]
+    values = [function(x) for x in grid]
+
+    finite = [y for y in values if math.isfinite(y)]
+    threshold = tolerance * (max(finite) - min(finite)) if finite else 0.0
+
+    xs, ys = array("d", grid[:1]), array("d", values[:1])
+    stack = [(grid[i], values[i], grid[i + 1], values[i + 1], 0) for i in reversed(range(INITIAL_INTERVALS))]
+    while stack:
+        left, y_left, right, y_right, depth = stack.pop()
+        middle = (left + right) / 2
+        y_middle = function(middle)
+
+        if math.isfinite(y_left) and math.isfinite(y_middle) and math.isfinite(y_right):
+            settled = abs(y_middle - (y_left + y_right) / 2) <= threshold
+        else:
+            settled = math.isnan(y_left) and math.isnan(y_middle) and math.isnan(y_right)
+
+        if not settled and depth < max_depth:
+            stack.append((middle, y_middle, right, y_right, depth + 1))
+            stack.append((left, y_left, middle, y_middle, depth + 1))
+            continue
+
+        if not settled and not min(y_left, y_right) <= y_middle <= max(y_left, y_right):
+            y_middle = _NAN
+        xs.append(middle)
+        ys.append(y_middle)
+        xs.append(right)
+        ys.append(y_right)
+    return Samples(xs, ys)
+
+
+class TileCache:
+    """Thread-safe LRU cache of sampled tiles"""
+
+    def __init__(self, max_tiles: int = DEFAULT_MAX_TILES) -> None:
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._tiles = OrderedDict()  # type: OrderedDict[tuple, Samples]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def __repr__(self) -> str:
+        return f"TileCache({len(self)}/{self.max_tiles} tiles)"
+
+    def get(self, key: tuple, compute) -> Samples:
+        """Returns the tile stored under key, computing and storing it on a miss
+        Returns: Samples"""
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+
+        tile = compute()
+        with self._lock:
+            self._tiles[key] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last = False)
+                self.evictions += 1
+        return tile
+
+    def clear(self) -> None:
+        """Drops every tile"""
+        with self._lock:
+            self._tiles.clear()
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the cache counters
+        Returns: Dictionary"""
+        with self._lock:
+            return {"tiles": len(self._tiles), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+######################################
+#                 API                #
+######################################
+
+TILES = TileCache()
+
+def tile_level(a: float, b: float) -> int:
+    """Returns the tile level (log2 of the tile width) used for the range [a, b]
+    Returns: Integer"""
+    return math.floor(math.log2((b - a) / TILES_PER_VIEW))
+
+def sample(expression: Union[str, CompiledExpression], a: float, b: float, tolerance: float = DEFAULT_TOLERANCE,
+           max_depth: int = DEFAULT_MAX_DEPTH, cache: TileCache = TILES) -> Samples:
+    """Adaptively samples a single-variable expression over [a, b] through the tile cache
+    Results are floats whatever the numeric mode; NaN samples mark gaps (poles, errors)
+    Returns: Samples from a to b"""
+    if not (math.isfinite(a) and math.isfinite(b) and a < b):
+        raise ValueError(f"sample: invalid range [{a}, {b}]")
+
+    compiled = expression if isinstance(expression, CompiledExpression) else compile_expression(expression)
+    if len(compiled.variables) > 1:
+        raise ValueError(f"sample: expected one variable, got {', '.join(compiled.variables)}")
+    function = _function(compiled)
+
+    level = tile_level(a, b)
+    width = 2.0 ** level
+    key = _expression_key(compiled) + (tolerance, max_depth, level)
+
+    xs, ys = array("d"), array("d")
+    for index in range(math.floor(a / width), math.ceil(b / width)):
+        x0, x1 = index * width, (index + 1) * width
+        tile = cache.get(key + (index,), lambda: _sample_tile(function, x0, x1, tolerance, max_depth))
+
+        # Tiles share their edges; keep the points that fall inside [a, b] once
+        for x, y in zip(tile.xs, tile.ys):
+            if a < x < b and (not xs or x > xs[-1]):
+                xs.append(x)
+                ys.append(y)
+
+    xs.insert(0, a)
+    ys.insert(0, function(a))
+    xs.append(b)
+    ys.append(function(b))
+    return Samples(xs, ys)
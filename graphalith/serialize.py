@@ -0,0 +1,293 @@
+"""
+graphalith serialize module.
+
+Compact, versioned binary format for compiled expressions, and a bulk
+archive of many of them that is read through mmap.
+
+A record (little-endian) is
+
+    u8  format version
+    u8  numeric mode
+    u32 source length,  source (utf-8, normalized text)
+    u32 instructions, u32 constants, u32 variables, u8 operand width (1, 2 or 4)
+    instructions x u8   opcodes
+    instructions x u8/u16/u32 operands (the narrowest width that fits)
+    constants           float mode: f64 each; exact modes: u32 length + text each
+    variables           u16 length + utf-8 name each
+
+The version, mode and source come first and never move, so a record
+written by another format version is still loaded: it is re-parsed from
+its source text instead of decoded.
+
+An archive file is a header, the records back to back, then an index of
+(offset, length, crc32) per record and an optional table of names:
+
+    b"GLXA", u16 archive version, u16 flags, u32 count, u64 index offset, u32 index crc32
+
+Opening an archive maps the file and reads only the header and index;
+each record is decoded straight from the mapping the first time it is
+requested, after its checksum is verified.
+"""
+
+from array import array
+from typing import Iterable, Iterator, Optional, Union
+import mmap
+import struct
+import sys
+import zlib
+
+from graphalith.compiler import CompiledExpression
+from graphalith.numeric import NumericMode, get_arithmetic
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+FORMAT_VERSION = 1
+ARCHIVE_VERSION = 1
+ARCHIVE_MAGIC = b"GLXA"
+
+MODE_CODES = {NumericMode.FLOAT: 0, NumericMode.INT: 1, NumericMode.FRACTION: 2, NumericMode.DECIMAL: 3}
+CODE_MODES = {code: mode for mode, code in MODE_CODES.items()}
+
+_PREFIX = struct.Struct("<BBI")         # version, mode, source length
+_COUNTS = struct.Struct("<IIIB")        # instructions, constants, variables, operand width
+_LENGTH32 = struct.Struct("<I")
+_LENGTH16 = struct.Struct("<H")
+_HEADER = struct.Struct("<4sHHIQI")     # magic, version, flags, count, index offset, index crc
+_ENTRY = struct.Struct("<QII")          # offset, length, crc32
+
+_NAMED = 1  # header flag: a name table follows the index
+
+_WIDTH_CODES = {1: "B", 2: "H", 4: "I"}
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _little_endian(values: array) -> bytes:
+    """Returns the array's bytes in little-endian order"""
+    if sys.byteorder == "big":  # pragma: no cover
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _fallback(data, offset: int) -> CompiledExpression:
+    """Re-parses a record of another format version from its source text"""
+    from graphalith.cache import compile_expression
+
+    _, mode, length = _PREFIX.unpack_from(data, offset)
+    start = offset + _PREFIX.size
+    source = bytes(data[start:start + length]).decode("utf8")
+    return compile_expression(source, CODE_MODES[mode])
+
+
+######################################
+#                 API                #
+######################################
+
+def dumps(compiled: CompiledExpression) -> bytes:
+    """Serializes a compiled expression into one record
+    Returns: Bytes"""
+    source = compiled.source.encode("utf8")
+    operands = [arg for _, arg in compiled.program]
+    width = next(width for width in (1, 2, 4) if max(operands, default = 0) < 1 << 8 * width)
+
+    parts = [_PREFIX.pack(FORMAT_VERSION, MODE_CODES[compiled.mode], len(source)), source,
+             _COUNTS.pack(len(compiled.program), len(compiled.constants), len(compiled.variables), width),
+             bytes([opcode for opcode, _ in compiled.program]),
+             _little_endian(array(_WIDTH_CODES[width], operands))]
+
+    if compiled.mode == NumericMode.FLOAT:
+        parts.append(_little_endian(array("d", compiled.constants)))
+    else:
+        for constant in compiled.constants:
+            text = str(constant).encode("utf8")
+            parts += [_LENGTH32.pack(len(text)), text]
+
+    for name in compiled.variables:
+        text = name.encode("utf8")
+        parts += [_LENGTH16.pack(len(text)), text]
+    return b"".join(parts)
+
+def loads(data, offset: int = 0) -> CompiledExpression:
+    """Deserializes one record from any buffer (bytes, memoryview, mmap) without copying it
+    Records of another format version are re-parsed from their source text
+    Returns: CompiledExpression"""
+    version, mode, length = _PREFIX.unpack_from(data, offset)
+    if version != FORMAT_VERSION:
+        return _fallback(data, offset)
+
+    arithmetic = get_arithmetic(CODE_MODES[mode])
+    position = offset + _PREFIX.size
+    source = str(data[position:position + length], "utf8")
+    position += length
+
+    instructions, constant_count, variable_count, width = _COUNTS.unpack_from(data, position)
+    position += _COUNTS.size
+    opcodes = data[position:position + instructions]
+    position += instructions
+    operands = struct.unpack_from(f"<{instructions}{_WIDTH_CODES[width]}", data, position)
+    position += width * instructions
+
+    constants: Union[tuple, list]
+    if arithmetic.mode == NumericMode.FLOAT:
+        constants = struct.unpack_from(f"<{constant_count}d", data, position)
+        position += 8 * constant_count
+    else:
+        constants = []
+        for _ in range(constant_count):
+            (size,) = _LENGTH32.unpack_from(data, position)
+            position += _LENGTH32.size
+            constants.append(arithmetic.number(str(data[position:position + size], "utf8")))
+            position += size
+
+    variables = []
+    for _ in range(variable_count):
+        (size,) = _LENGTH16.unpack_from(data, position)
+        position += _LENGTH16.size
+        variables.append(str(data[position:position + size], "utf8"))
+        position += size
+
+    return CompiledExpression(tuple(zip(opcodes, operands)), tuple(constants), tuple(variables), source, arithmetic)
+
+def restore(data: bytes, context = None, backend: str = "auto") -> CompiledExpression:
+    """Deserializes a record and reattaches a decimal context and backend (used by pickle)
+    Returns: CompiledExpression"""
+    compiled = loads(data)
+    if context is not None:
+        compiled = compiled.using(context)
+    if backend != compiled.backend.value:
+        compiled = compiled.with_backend(backend)
+    return compiled
+
+def write_archive(path: str, expressions: Iterable[Union[CompiledExpression, tuple]]) -> int:
+    """Writes compiled expressions (or (name, expression) pairs) to an archive file
+    Returns: Number of records written"""
+    entries = []  # type: list[tuple[int, int, int]]
+    names = []  # type: list[str]
+
+    with open(path, "wb") as archive:
+        archive.write(b"\0" * _HEADER.size)
+        offset = _HEADER.size
+        for item in expressions:
+            name, compiled = item if isinstance(item, tuple) else (None, item)
+            record = dumps(compiled)
+            archive.write(record)
+            entries.append((offset, len(record), zlib.crc32(record)))
+            names.append(name)
+            offset += len(record)
+
+        named = any(name is not None for name in names)
+        parts = [_ENTRY.pack(*entry) for entry in entries]
+        if named:
+            for name in names:
+                text = (name or "").encode("utf8")
+                parts += [_LENGTH16.pack(len(text)), text]
+        index = b"".join(parts)
+        archive.write(index)
+
+        archive.seek(0)
+        archive.write(_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, _NAMED if named else 0,
+                                   len(entries), offset, zlib.crc32(index)))
+    return len(entries)
+
+
+class Archive:
+    """Read-only, memory-mapped archive of compiled expressions, decoded lazily per record"""
+
+    def __init__(self, path: str, verify: bool = True) -> None:
+        self.path = path
+        self.verify = verify
+
+        with open(path, "rb") as archive:
+            self._map = mmap.mmap(archive.fileno(), 0, access = mmap.ACCESS_READ)
+        self._view: Optional[memoryview] = memoryview(self._map)
+
+        try:
+            magic, version, flags, count, index_offset, index_crc = _HEADER.unpack_from(self._view)
+        except struct.error:
+            self.close()
+            raise ValueError(f"Archive: {path} is not a graphalith archive")
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            self.close()
+            raise ValueError(f"Archive: {path} is not a version {ARCHIVE_VERSION} graphalith archive")
+        if zlib.crc32(self._view[index_offset:]) != index_crc:
+            self.close()
+            raise ValueError(f"Archive: {path} has a corrupt index")
+
+        self._count = count
+        self._index_offset = index_offset
+        self._flags = flags
+        self._loaded: list[Optional[CompiledExpression]] = [None] * count
+        self._names: Optional[dict[str, int]] = None  # read on first lookup by name
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        loaded = sum(compiled is not None for compiled in self._loaded)
+        return f"Archive({self.path!r}, {self._count} records, {loaded} loaded)"
+
+    def __enter__(self) -> 'Archive':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def __mapping(self) -> memoryview:
+        """Returns the mapped archive, or raises ValueError once it is closed"""
+        if self._view is None:
+            raise ValueError(f"Archive: {self.path} is closed")
+        return self._view
+
+    def __iter__(self) -> Iterator[CompiledExpression]:
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> CompiledExpression:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("Archive: record index out of range")
+
+        compiled = self._loaded[i]
+        if compiled is None:
+            view = self.__mapping()
+            offset, length, crc = _ENTRY.unpack_from(view, self._index_offset + i * _ENTRY.size)
+            record = view[offset:offset + length]
+            if self.verify and zlib.crc32(record) != crc:
+                raise ValueError(f"Archive: record {i} of {self.path} fails its checksum")
+            compiled = self._loaded[i] = loads(record)
+        return compiled
+
+    def names(self) -> dict:
+        """Returns the record index of every name (empty for unnamed archives)
+        Returns: Dictionary"""
+        if self._names is None:
+            self._names = {}
+            if self._flags & _NAMED:
+                view = self.__mapping()
+                position = self._index_offset + self._count * _ENTRY.size
+                for i in range(self._count):
+                    (size,) = _LENGTH16.unpack_from(view, position)
+                    position += _LENGTH16.size
+                    name = str(view[position:position + size], "utf8")
+                    position += size
+                    if name:
+                        self._names[name] = i
+        return self._names
+
+    def get(self, name: str) -> CompiledExpression:
+        """Returns the record stored under a name
+        Returns: CompiledExpression"""
+        return self[self.names()[name]]
+
+    def close(self) -> None:
+        """Releases the mapping; expressions already loaded stay usable"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+            self._map.close()
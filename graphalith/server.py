@@ -0,0 +1,394 @@
+"""
+graphalith server module.
+
+A local evaluation service speaking newline-delimited JSON over TCP or a
+Unix socket. Each request line is an object
+
+    {"id": 7, "expression": "2 * (x + 1)", "bindings": {"x": 3}, "mode": "float"}
+
+("bindings", "mode" and "id" are optional) and is answered, on the same
+connection and in request order, with
+
+    {"id": 7, "value": 8.0, "error": null}
+
+Values that JSON cannot represent are sent as strings: exact modes in their
+text form ("1/3", "0.10"), and non-finite floats as "inf", "-inf" and
+"nan", so every response is strict JSON for any client.
+
+A request {"stats": true} is answered with the server counters and latency
+histogram instead.
+
+Requests from every connection are coalesced into micro-batches: a batch
+closes when it holds `max_batch` requests or `max_delay` seconds after its
+first request arrived. Batches are evaluated in a process pool (a single
+worker thread with jobs=0), so the event loop only moves bytes. All queues
+are bounded: when evaluation falls behind, connections stop being read and
+TCP flow control pushes back on the clients.
+
+    $ python -m graphalith.server --port 8765 --jobs 4
+"""
+
+from bisect import bisect_left
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+
+from graphalith.batch import WINDOW_PER_JOB, json_value
+from graphalith.expression import Expression
+from graphalith.numeric import NumericMode
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_QUEUE_SIZE = 4096
+
+# Requests read ahead of their responses on one connection
+CONNECTION_WINDOW = 256
+
+# Longest accepted request line in bytes
+MAX_LINE = 1024 * 1024
+
+
+class LatencyHistogram:
+    """Log-scale histogram of durations; bucket upper bounds double from `lowest` seconds"""
+
+    def __init__(self, lowest: float = 1e-5, buckets: int = 24) -> None:
+        self.bounds = [lowest * 2 ** i for i in range(buckets)]
+        self.counts = [0] * (buckets + 1)  # the last bucket collects everything above the bounds
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __repr__(self) -> str:
+        return f"LatencyHistogram({self.count} samples, p50={self.percentile(50)}, p99={self.percentile(99)})"
+
+    def record(self, seconds: float) -> None:
+        """Adds one duration"""
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent: float) -> float:
+        """Returns an upper bound of the given percentile (0 when empty)
+        Returns: Seconds"""
+        if not self.count:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Returns the summary statistics and non-empty buckets
+        Returns: Dictionary"""
+        bounds = self.bounds + [float("inf")]
+        return {"count": self.count,
+                "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "max": self.max,
+                "buckets": [[str(bound), count] for bound, count in zip(bounds, self.counts) if count]}
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def evaluate_requests(requests: list) -> list:
+    """Evaluates (expression, mode, bindings) triples (runs in worker processes)
+    Returns: List of (value, error) pairs"""
+    results: list[tuple] = []
+    for expression, mode, bindings in requests:
+        try:
+            compiled = Expression(value = expression, mode = mode).compile()
+            results.append((json_value(compiled.evaluate(**bindings)), None))
+        except Exception as error:
+            results.append((None, f"{type(error).__name__}: {error}"))
+    return results
+
+def _parse_request(request) -> tuple:
+    """Validates a decoded request into (id, (expression, mode, bindings)) or raises ValueError"""
+    if not isinstance(request, dict) or not isinstance(request.get("expression"), str):
+        raise ValueError("request must be an object with an 'expression' string")
+
+    bindings = request.get("bindings") or {}
+    if not isinstance(bindings, dict):
+        raise ValueError("'bindings' must be an object")
+    mode = NumericMode(request.get("mode", NumericMode.FLOAT.value)).value
+    return request.get("id"), (request["expression"], mode, bindings)
+
+
+class EvaluationServer:
+    """asyncio NDJSON evaluation server with micro-batching and bounded queues"""
+
+    def __init__(self, jobs: Optional[int] = None, max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = DEFAULT_MAX_DELAY,
+                 queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        self.jobs = (os.cpu_count() or 1) if jobs is None else jobs
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue_size = queue_size
+
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.connections = 0
+
+        self._queue: Optional[asyncio.Queue] = None  # created on the serving loop
+        self._executor: Optional[Executor] = None
+        self._servers: list[asyncio.AbstractServer] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def __repr__(self) -> str:
+        return f"EvaluationServer(jobs={self.jobs}, {self.requests} requests, {self.batches} batches)"
+
+    ## Lifecycle
+    async def __start(self) -> None:
+        """Creates the queue, executor and batching task on first use"""
+        if self._queue is not None:
+            return
+        queue: asyncio.Queue = asyncio.Queue(maxsize = self.queue_size)
+        self._queue = queue
+        if self.jobs > 0:
+            self._executor = ProcessPoolExecutor(max_workers = self.jobs)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers = 1)
+        self.__spawn(self.__batcher(queue))
+
+    async def start_tcp(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> tuple:
+        """Starts listening on a TCP address (port 0 picks a free port)
+        Returns: The bound (host, port)"""
+        await self.__start()
+        server = await asyncio.start_server(self.__handle, host, port, limit = MAX_LINE)
+        self._servers.append(server)
+        return server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path: str) -> str:
+        """Starts listening on a Unix socket
+        Returns: The socket path"""
+        await self.__start()
+        server = await asyncio.start_unix_server(self.__handle, path, limit = MAX_LINE)
+        self._servers.append(server)
+        return path
+
+    async def serve_forever(self) -> None:
+        """Serves until cancelled"""
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def close(self) -> None:
+        """Stops listening, cancels pending work and shuts the executor down"""
+        for server in self._servers:
+            server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions = True)
+        for server in self._servers:
+            await server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(wait = True, cancel_futures = True)
+        self._servers.clear()
+        self._queue = self._executor = None
+
+    def stats(self) -> dict:
+        """Returns the server counters and end-to-end latency histogram
+        Returns: Dictionary"""
+        return {"requests": self.requests,
+                "batches": self.batches,
+                "mean_batch": self.requests / self.batches if self.batches else 0.0,
+                "errors": self.errors,
+                "connections": self.connections,
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "latency": self.latency.snapshot()}
+
+    def __spawn(self, coroutine) -> asyncio.Task:
+        """Runs a background task that close() cancels"""
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    ## Batching
+    async def __batcher(self, queue: asyncio.Queue) -> None:
+        """Collects queued requests into micro-batches and dispatches them to the executor"""
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(max(self.jobs, 1) * WINDOW_PER_JOB)
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await in_flight.acquire()
+            self.__spawn(self.__dispatch(batch, in_flight))
+
+    async def __dispatch(self, batch: list, in_flight: asyncio.Semaphore) -> None:
+        """Evaluates one batch off the event loop and resolves its futures"""
+        try:
+            loop = asyncio.get_running_loop()
+            payload = [request for request, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, evaluate_requests, payload)
+            except Exception as exception:  # a broken worker fails the whole batch
+                results = [(None, f"{type(exception).__name__}: {exception}")] * len(batch)
+
+            self.batches += 1
+            now = time.perf_counter()
+            for (_, future, started), (value, error) in zip(batch, results):
+                self.latency.record(now - started)
+                self.errors += error is not None
+                if not future.done():
+                    future.set_result((value, error))
+        finally:
+            in_flight.release()
+
+    ## Connections
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves one connection: reads requests and writes their responses in order"""
+        handler = asyncio.current_task()
+        assert handler is not None  # connection callbacks run as tasks
+        self._tasks.add(handler)
+        self.connections += 1
+
+        responses: asyncio.Queue = asyncio.Queue(maxsize = CONNECTION_WINDOW)  # (id, future) in request order
+        sender = asyncio.get_running_loop().create_task(self.__send(responses, writer))
+        # A failed write (peer gone) also stops the reading side
+        sender.add_done_callback(lambda task: task.cancelled() or task.exception() is None or handler.cancel())
+
+        try:
+            await self.__receive(reader, responses)
+            await responses.put(None)
+            await sender
+        except ConnectionError:
+            pass
+        finally:
+            sender.cancel()
+            writer.close()
+            self.connections -= 1
+            self._tasks.discard(handler)
+
+    async def __receive(self, reader: asyncio.StreamReader, responses: asyncio.Queue) -> None:
+        """Reads request lines until end of input, queueing each for evaluation"""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        assert queue is not None  # __start() runs before any connection is accepted
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:  # line longer than MAX_LINE
+                return
+            if not line:
+                return
+            if not line.strip():
+                continue
+
+            future = loop.create_future()
+            try:
+                request = json.loads(line)
+                if request == {"stats": True}:
+                    await responses.put((None, future))
+                    future.set_result(self.stats())
+                    continue
+                request_id, request = _parse_request(request)
+            except ValueError as error:
+                await responses.put((None, future))
+                future.set_result((None, f"ValueError: {error}"))
+                continue
+
+            self.requests += 1
+            await responses.put((request_id, future))
+            await queue.put((request, future, time.perf_counter()))
+
+    async def __send(self, responses: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        """Writes each response once its result is ready, preserving request order"""
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            request_id, future = item
+            result = await future
+            if isinstance(result, dict):
+                line = json.dumps(result, allow_nan = False)
+            else:
+                value, error = result
+                line = json.dumps({"id": request_id, "value": value, "error": error}, allow_nan = False)
+            writer.write(line.encode("utf8") + b"\n")
+            if responses.empty():
+                await writer.drain()
+
+
+######################################
+#                 API                #
+######################################
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: Optional[str] = None, **options) -> None:
+    """Runs an EvaluationServer on a TCP address or Unix socket path until cancelled or terminated"""
+    server = EvaluationServer(**options)
+
+    # SIGTERM shuts down like cancellation, so pool workers are not orphaned
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    assert task is not None  # run by asyncio.run()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, RuntimeError):  # pragma: no cover (Windows, non-main thread)
+        pass
+
+    try:
+        if path is not None:
+            address = await server.start_unix(path)
+        else:
+            address = "%s:%d" % await server.start_tcp(host, port)
+        print(f"graphalith server listening on {address}", flush = True)
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv = None) -> None:  # pragma: no cover
+    """Entry point: `python -m graphalith.server` and `$ graphalith-server`"""
+    parser = argparse.ArgumentParser(prog = "graphalith-server", description = "Serve expression evaluation over NDJSON.")
+    parser.add_argument("--host", default = DEFAULT_HOST, help = "TCP address to bind (default: %(default)s)")
+    parser.add_argument("--port", type = int, default = DEFAULT_PORT, help = "TCP port, 0 for any free port (default: %(default)s)")
+    parser.add_argument("--unix", metavar = "PATH", help = "listen on a Unix socket instead of TCP")
+    parser.add_argument("--jobs", "-j", type = int, default = None, help = "worker processes, 0 for one worker thread (default: CPU count)")
+    parser.add_argument("--max-batch", type = int, default = DEFAULT_MAX_BATCH, help = "requests per micro-batch (default: %(default)s)")
+    parser.add_argument("--max-delay", type = float, default = DEFAULT_MAX_DELAY, help = "seconds a batch waits to fill (default: %(default)s)")
+    parser.add_argument("--queue-size", type = int, default = DEFAULT_QUEUE_SIZE, help = "pending request limit (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, jobs = args.jobs, max_batch = args.max_batch,
+                          max_delay = args.max_delay, queue_size = args.queue_size))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    sys.exit(0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,247 @@
+"""
+graphalith simplify module.
+
+Simplifies a flat expression tree into a hash-consed DAG in one postfix
+pass:
+
+    * constant folding          2*3 + x     -> 6 + x
+    * identity elimination      x*1, 1*x, x/1, x+0, 0+x, x-0 -> x;  0-x -> -x;  --x -> x
+    * hash-consing              every distinct subexpression becomes one
+                                shared node, so (a+b)*(a+b) evaluates a+b once
+
+Operands of + and * are interned in a fixed order, so `a+b` and `b+a` share
+a node. Divisions that would fail at compile time (e.g. 1/0) are left in
+place so the error is raised when the DAG is evaluated.
+
+Evaluation visits each distinct node once, so large generated formulas full
+of repeated subterms cost time proportional to their distinct
+subexpressions rather than to the size of the expanded tree.
+"""
+
+from array import array
+from typing import Optional
+
+from graphalith.profiling import profiled
+from graphalith.numeric import Arithmetic, get_arithmetic
+from graphalith.tree import ARITY, FlatTree, Opcode
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+COMMUTATIVE = frozenset((Opcode.ADD, Opcode.MULTIPLY))
+
+
+class Dag:
+    """Hash-consed expression DAG, nodes in topological order (children first)
+    For node i: CONSTANT/LOAD keep a pool index in `lefts`; NEGATE keeps its
+    child in `lefts`; binary operators keep their children in `lefts`/`rights`"""
+
+    __slots__ = ("opcodes", "lefts", "rights", "constants", "variables", "arithmetic", "nodes_before", "rewrites")
+
+    def __init__(self, arithmetic: Optional[Arithmetic] = None) -> None:
+        self.opcodes = array("B")
+        self.lefts = array("l")
+        self.rights = array("l")
+        self.constants: list = []
+        self.variables: list[str] = []
+        self.arithmetic = arithmetic if arithmetic is not None else get_arithmetic()
+        self.nodes_before = 0
+        self.rewrites = 0
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def __repr__(self) -> str:
+        return f"Dag({self.nodes_before} -> {len(self)} nodes, variables={self.variables!r})"
+
+    def stats(self) -> dict:
+        """Returns the node counts before and after simplification
+        Returns: Dictionary"""
+        return {"nodes_before": self.nodes_before,
+                "nodes_after": len(self),
+                "rewrites": self.rewrites}
+
+    ## Evaluation
+    def run(self, values: tuple):
+        """Evaluates every node once with values given positionally in `variables` order"""
+        operations = self.arithmetic.operations
+        negate = self.arithmetic.negate
+        constants = self.constants
+        lefts = self.lefts
+        rights = self.rights
+        results: list = []
+        push = results.append
+
+        for i, opcode in enumerate(self.opcodes):
+            if opcode == Opcode.CONSTANT:
+                push(constants[lefts[i]])
+            elif opcode == Opcode.LOAD:
+                push(values[lefts[i]])
+            elif opcode == Opcode.NEGATE:
+                value = results[lefts[i]]
+                push(-value if negate is None else negate(value))
+            else:
+                push(operations[opcode](results[lefts[i]], results[rights[i]]))
+
+        return results[-1]
+
+    def evaluate(self, **bindings):
+        """Evaluates the DAG with the given variable bindings"""
+        missing = [name for name in self.variables if name not in bindings]
+        if missing:
+            raise NameError(f"evaluate: unbound variable(s) {', '.join(missing)}")
+
+        values = [bindings[name] for name in self.variables]
+        coerce = self.arithmetic.coerce
+        if coerce is not None:
+            values = [coerce(value) for value in values]
+        return self.run(values)
+
+
+class _Interner:
+    """Builds DAG nodes, returning the existing node for repeated keys"""
+
+    def __init__(self, arithmetic: Arithmetic) -> None:
+        self.arithmetic = arithmetic
+        self.nodes: list[tuple] = []        # (opcode, left, right)
+        self.values: list = []              # constant value per node, or None
+        self.index: dict[tuple, int] = {}
+        self.rewrites = 0
+
+    def intern(self, key: tuple, value = None) -> int:
+        node = self.index.get(key)
+        if node is None:
+            node = self.index[key] = len(self.nodes)
+            self.nodes.append(key)
+            self.values.append(value)
+        return node
+
+    def constant(self, value) -> int:
+        return self.intern((Opcode.CONSTANT, (value, type(value), str(value)), -1), value)
+
+    def is_constant(self, node: int, value = None) -> bool:
+        """Determines if node is a constant (equal to value, when given)"""
+        if self.nodes[node][0] != Opcode.CONSTANT:
+            return False
+        return value is None or self.values[node] == value
+
+    def negate(self, node: int) -> int:
+        opcode, child, _ = self.nodes[node]
+        if opcode == Opcode.NEGATE:
+            self.rewrites += 1
+            return child
+        if opcode == Opcode.CONSTANT:
+            value = self.values[node]
+            negate = self.arithmetic.negate
+            self.rewrites += 1
+            return self.constant(-value if negate is None else negate(value))
+        return self.intern((Opcode.NEGATE, node, -1))
+
+    def binary(self, opcode: int, left: int, right: int) -> int:
+        if self.is_constant(left) and self.is_constant(right):
+            try:
+                value = self.arithmetic.operations[opcode](self.values[left], self.values[right])
+            except ArithmeticError:
+                # Leave failing folds (1/0, inexact int division) for evaluation time
+                value = None
+            if value is not None:
+                self.rewrites += 1
+                return self.constant(value)
+
+        identity = self.__identity(opcode, left, right)
+        if identity is not None:
+            self.rewrites += 1
+            return identity
+
+        if opcode in COMMUTATIVE and left > right:
+            left, right = right, left
+        return self.intern((opcode, left, right))
+
+    def __identity(self, opcode: int, left: int, right: int):
+        """Returns the node equivalent to (left opcode right) if it is an identity, else None"""
+        if opcode == Opcode.ADD:
+            if self.is_constant(right, 0):
+                return left
+            if self.is_constant(left, 0):
+                return right
+        elif opcode == Opcode.SUBTRACT:
+            if self.is_constant(right, 0):
+                return left
+            if self.is_constant(left, 0):
+                return self.negate(right)
+        elif opcode == Opcode.MULTIPLY:
+            if self.is_constant(right, 1):
+                return left
+            if self.is_constant(left, 1):
+                return right
+        elif opcode == Opcode.DIVIDE:
+            if self.is_constant(right, 1):
+                return left
+        return None
+
+
+######################################
+#                 API                #
+######################################
+
+@profiled("simplify")
+def simplify(tree: FlatTree, arithmetic: Optional[Arithmetic] = None) -> Dag:
+    """Folds constants, removes identities and hash-conses a flat tree into a DAG
+    Runtime: O(n) expected
+    Returns: Dag holding only the nodes reachable from the root"""
+    if arithmetic is None:
+        arithmetic = get_arithmetic()
+
+    interner = _Interner(arithmetic)
+    stack = []  # type: list[int]
+
+    for opcode, arg in zip(tree.opcodes, tree.operands):
+        if opcode == Opcode.CONSTANT:
+            stack.append(interner.constant(tree.constants[arg]))
+        elif opcode == Opcode.LOAD:
+            stack.append(interner.intern((Opcode.LOAD, tree.variables[arg], -1)))
+        elif opcode == Opcode.NEGATE:
+            stack.append(interner.negate(stack.pop()))
+        else:
+            right = stack.pop()
+            stack.append(interner.binary(opcode, stack.pop(), right))
+
+    # Keep only the nodes reachable from the root, renumbered in topological order
+    nodes = interner.nodes
+    reachable = bytearray(len(nodes))
+    reachable[stack[-1]] = 1
+    for node in range(len(nodes) - 1, -1, -1):
+        if reachable[node]:
+            opcode, left, right = nodes[node]
+            if ARITY[opcode] >= 1:
+                reachable[left] = 1
+            if ARITY[opcode] == 2:
+                reachable[right] = 1
+
+    dag = Dag(arithmetic)
+    dag.nodes_before = len(tree)
+    dag.rewrites = interner.rewrites
+
+    # Constant and load nodes are already unique, so each gets its own pool slot
+    renumber = {}  # type: dict[int, int]
+    for node, (opcode, left, right) in enumerate(nodes):
+        if not reachable[node]:
+            continue
+        renumber[node] = len(dag.opcodes)
+        dag.opcodes.append(opcode)
+
+        if opcode == Opcode.CONSTANT:
+            dag.lefts.append(len(dag.constants))
+            dag.rights.append(-1)
+            dag.constants.append(interner.values[node])
+        elif opcode == Opcode.LOAD:
+            dag.lefts.append(len(dag.variables))
+            dag.rights.append(-1)
+            dag.variables.append(left)
+        else:
+            dag.lefts.append(renumber[left])
+            dag.rights.append(renumber[right] if right >= 0 else -1)
+
+    return dag
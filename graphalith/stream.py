@@ -0,0 +1,108 @@
+"""
+graphalith stream module.
+
+Evaluates one expression that arrives in chunks (from a generator, a pipe or
+a file) without ever holding its whole text, token list or tree. Each chunk
+is tokenized on its own and fed to an incremental Parser whose ValueBuilder
+computes values as operators are reduced, so a flat sum or product of
+millions of terms runs with stacks whose size depends only on nesting depth.
+
+A token can straddle two chunks, and a number can change meaning with text
+that has not arrived yet (`1.5e` then `-3`), so the last few tokens of each
+chunk are carried over and rescanned together with the next one.
+"""
+
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from graphalith.lexer import tokenize
+from graphalith.numeric import NumericMode, ValueBuilder, get_arithmetic
+from graphalith.parser import Parser
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+# Characters read per chunk from file-like inputs
+CHUNK_SIZE = 1 << 16
+
+# Smaller chunks are joined up to this many characters before they are scanned
+MIN_BLOCK = 1 << 12
+
+# Characters a number match can look past its end before it is decided
+# (the `e` and sign of an exponent that may still follow)
+_LOOKAHEAD = 2
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _blocks(source) -> Iterator[Any]:
+    """Yields the text of a string, a file-like object or an iterable of chunks
+    in blocks of at least MIN_BLOCK characters (small chunks are joined)
+    Blocks keep the source's type: str, or any bytes-like object"""
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        yield source
+        return
+    if hasattr(source, "read"):
+        source = read_chunks(source)
+
+    pending = []
+    size = 0
+    for chunk in source:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= MIN_BLOCK:
+            yield pending[0][:0].join(pending)
+            pending.clear()
+            size = 0
+    if pending:
+        yield pending[0][:0].join(pending)
+
+
+######################################
+#                 API                #
+######################################
+
+def read_chunks(file, size: int = CHUNK_SIZE) -> Iterator[Union[str, bytes]]:
+    """Yields a file-like object's contents in chunks of `size` characters
+    Returns: Iterator of chunks"""
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+def parse_stream(source: Union[str, bytes, Iterable], builder = None):
+    """Parses an expression from a sequence of chunks with the given builder
+    Memory stays bounded by the chunk size and the nesting depth
+    Returns: The builder's result (a Node by default)"""
+    parser = Parser(builder)
+    carry = None
+    offset = 0  # position of the carried text in the whole input
+
+    for chunk in _blocks(source):
+        text = chunk if carry is None else carry + chunk
+        tokens = tokenize(text)
+        ends = tokens.ends
+
+        # Tokens that end too close to the chunk's end may still grow
+        final = len(ends)
+        while final and ends[final - 1] + _LOOKAHEAD >= len(text):
+            final -= 1
+        parser.feed(tokens, 0, final, offset)
+
+        cut = tokens.starts[final] if final < len(ends) else len(text)
+        carry = text[cut:]
+        offset += cut
+
+    if carry:
+        parser.feed(tokenize(carry), offset = offset)
+    return parser.finish()
+
+def evaluate_stream(source: Union[str, bytes, Iterable], mode = NumericMode.FLOAT, context = None, bindings: Optional[dict] = None):
+    """Evaluates an expression read from a string, a file-like object or an iterable of chunks
+    EX: evaluate_stream(f"+{i}" for i in range(10**6)) -> 499999500000.0
+    Returns: Number"""
+    return parse_stream(source, ValueBuilder(get_arithmetic(mode, context), bindings))
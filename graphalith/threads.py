@@ -0,0 +1,127 @@
+"""
+graphalith threads module.
+
+Evaluates one compiled expression over many bindings on a thread pool.
+
+CompiledExpression is immutable and keeps no per-run state on itself (see
+graphalith.compiler), so a single instance, typically the one shared by the
+expression cache, is safe to use from every thread at once with no copying.
+Expression is not: it is a mutable, lazily computed view of a string. Share
+its compile() form between threads, not the Expression.
+
+Two batch paths:
+
+    evaluate_rows     one binding mapping per row, rows split into chunks; the
+                      evaluation loop holds the GIL, so it scales on
+                      free-threaded CPython builds and only interleaves elsewhere
+    evaluate_columns  NumPy arrays of bindings split into row slices, each
+                      evaluated with evaluate_array into a slice of one output
+                      array; NumPy releases the GIL inside its ufuncs, so large
+                      slices run in parallel on any build
+
+Results keep input order and are identical to evaluating sequentially.
+"""
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Iterable, Mapping, Optional
+import os
+import sys
+
+from graphalith.compiler import CompiledExpression
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore[assignment]
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+# Rows per task for evaluate_rows
+DEFAULT_CHUNK_SIZE = 1024
+
+# Smallest slice evaluate_columns hands to a thread; smaller inputs are evaluated in the calling thread
+MIN_SLICE = 16384
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _chunks(rows: Iterable[Mapping], chunk_size: int):
+    """Groups rows into lists of chunk_size"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _evaluate_chunk(compiled: CompiledExpression, chunk: list) -> list:
+    evaluate = compiled.evaluate
+    return [evaluate(**row) for row in chunk]
+
+def _run(executor: Optional[Executor], jobs: Optional[int], work):
+    """Calls work(executor) with the given executor, or with a pool of `jobs` threads started for the call"""
+    if executor is not None:
+        return work(executor)
+    with ThreadPoolExecutor(max_workers = jobs or os.cpu_count() or 1) as pool:
+        return work(pool)
+
+
+######################################
+#                 API                #
+######################################
+
+def gil_enabled() -> bool:
+    """Whether this interpreter runs with the GIL (always True before CPython 3.13)
+    Returns: Boolean"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def evaluate_rows(compiled: CompiledExpression, rows: Iterable[Mapping], jobs: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, executor: Optional[Executor] = None) -> list:
+    """Evaluates a compiled expression once per mapping of bindings, on a thread pool
+    The first error raised by any row is re-raised
+    EX: evaluate_rows(compile_expression("x * y"), [{"x": 1, "y": 2}, {"x": 3, "y": 4}]) -> [2, 12]
+    Returns: List of numbers, in row order"""
+    if chunk_size < 1:
+        raise ValueError("evaluate_rows: chunk_size must be positive")
+    chunks = _chunks(rows, chunk_size)
+
+    evaluate_chunk = partial(_evaluate_chunk, compiled)
+    return _run(executor, jobs, lambda pool: [value for values in pool.map(evaluate_chunk, chunks) for value in values])
+
+def evaluate_columns(compiled: CompiledExpression, jobs: Optional[int] = None, executor: Optional[Executor] = None, out = None, **arrays):
+    """Evaluates a compiled expression elementwise over arrays of bindings, in row slices on a thread pool
+    Takes the same arguments and gives the same result as CompiledExpression.evaluate_array
+    Returns: numpy.ndarray"""
+    from graphalith.vectorize import evaluate_array
+
+    if numpy is None:  # pragma: no cover
+        raise ImportError("graphalith.threads: numpy is required for evaluate_columns")
+
+    inputs = {name: numpy.asarray(arrays[name], dtype = numpy.float64) for name in compiled.variables if name in arrays}
+    shape = numpy.broadcast_shapes(*[array.shape for array in inputs.values()]) if inputs else ()
+    jobs = jobs or os.cpu_count() or 1
+    slices = min(jobs, shape[0] // MIN_SLICE) if shape else 0
+    if slices < 2:
+        return evaluate_array(compiled, out, **arrays)
+
+    if out is None:
+        out = numpy.empty(shape, dtype = numpy.float64)
+    elif out.shape != shape:
+        raise ValueError(f"evaluate_columns: out has shape {out.shape}, expected {shape}")
+    inputs = {name: numpy.broadcast_to(array, shape) for name, array in inputs.items()}
+    bounds = [shape[0] * k // slices for k in range(slices + 1)]
+
+    def evaluate_slice(k: int):
+        lo, hi = bounds[k], bounds[k + 1]
+        return evaluate_array(compiled, out[lo:hi], **{name: array[lo:hi] for name, array in inputs.items()})
+
+    _run(executor, jobs, lambda pool: list(pool.map(evaluate_slice, range(slices))))
+    return out
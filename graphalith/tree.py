@@ -0,0 +1,286 @@
+"""
+graphalith tree module.
+
+Flat, array-backed expression trees. A FlatTree stores its nodes in postfix
+order as two parallel arrays: a 1-byte opcode and a 4-byte operand (an index
+into the constant pool for CONSTANT, into the variable table for LOAD, unused
+otherwise). The shape is implicit in the postfix order, so a tree costs five
+bytes per node plus its deduplicated constants and names.
+
+Every traversal and evaluation here is iterative, so depth is unbounded.
+"""
+
+from array import array
+from collections import deque
+from enum import IntEnum
+from typing import Iterable, Iterator, Optional
+
+from graphalith.lexer import Token, TokenKind, TokenStream
+from graphalith.node import Node
+from graphalith.parser import OPERATOR_TOKENS, parse
+
+
+class Opcode(IntEnum):
+    """Enum class for postfix program opcodes"""
+    CONSTANT = 0
+    LOAD = 1
+    NEGATE = 2
+    ADD = 3
+    SUBTRACT = 4
+    MULTIPLY = 5
+    DIVIDE = 6
+
+
+######################################
+#            OPERATIONS              #
+######################################
+
+def _add(x1: float, x2: float) -> float:
+    """Adds two values together (x1 + x2)"""
+    return x1 + x2
+
+def _subtract(x1: float, x2: float) -> float:
+    """Subtracts two values (x1 - x2)"""
+    return x1 - x2
+
+def _multiply(x1: float, x2: float) -> float:
+    """Multiplies two values (x1 * x2)"""
+    return x1*x2
+
+def _divide(x1: float, x2: float) -> float:
+    """Divides two values (x1 / x2)"""
+    return x1/x2
+
+OPERATIONS = {Opcode.ADD: _add,
+              Opcode.SUBTRACT: _subtract,
+              Opcode.MULTIPLY: _multiply,
+              Opcode.DIVIDE: _divide}
+
+TOKEN_OPCODES = {TokenKind.OPERATOR_ADD: Opcode.ADD,
+                 TokenKind.OPERATOR_SUBTRACT: Opcode.SUBTRACT,
+                 TokenKind.OPERATOR_MULTIPLY: Opcode.MULTIPLY,
+                 TokenKind.OPERATOR_DIVIDE: Opcode.DIVIDE}
+
+OPCODE_TOKENS = {opcode: OPERATOR_TOKENS[kind] for kind, opcode in TOKEN_OPCODES.items()}
+OPCODE_TOKENS[Opcode.NEGATE] = OPERATOR_TOKENS[TokenKind.OPERATOR_SUBTRACT]
+
+ARITY = {Opcode.CONSTANT: 0, Opcode.LOAD: 0, Opcode.NEGATE: 1,
+         Opcode.ADD: 2, Opcode.SUBTRACT: 2, Opcode.MULTIPLY: 2, Opcode.DIVIDE: 2}
+
+
+def run_program(program: Iterable, constants, values, operations: dict = OPERATIONS, negate = None):
+    """Runs (opcode, operand) instructions on a value stack
+    `operations` maps binary opcodes to functions; `negate` replaces unary - when given
+    Returns: The value left on top of the stack"""
+    return run_stack(program, constants, values, operations, negate)[-1]
+
+def run_stack(program: Iterable, constants, values, operations: dict = OPERATIONS, negate = None) -> list:
+    """Runs instructions like run_program(), for programs that leave several values
+    Returns: The whole value stack"""
+    stack: list = []
+    push = stack.append
+    pop = stack.pop
+
+    for opcode, arg in program:
+        if opcode == Opcode.CONSTANT:
+            push(constants[arg])
+        elif opcode == Opcode.LOAD:
+            push(values[arg])
+        elif opcode == Opcode.NEGATE:
+            stack[-1] = -stack[-1] if negate is None else negate(stack[-1])
+        else:
+            right = pop()
+            stack[-1] = operations[opcode](stack[-1], right)
+
+    return stack
+
+
+class FlatTree:
+    """Expression tree stored as postfix struct-of-arrays"""
+
+    __slots__ = ("opcodes", "operands", "constants", "variables")
+
+    def __init__(self, opcodes: Optional[array] = None, operands: Optional[array] = None, constants: Optional[list] = None,
+                 variables: Optional[list] = None) -> None:
+        self.opcodes = opcodes if opcodes is not None else array("B")
+        self.operands = operands if operands is not None else array("i")
+        self.constants = constants if constants is not None else []
+        self.variables = variables if variables is not None else []
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def __repr__(self) -> str:
+        return f"FlatTree({len(self)} nodes, {len(self.constants)} constants, variables={self.variables!r})"
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the node arrays"""
+        return len(self.opcodes) * self.opcodes.itemsize + len(self.operands) * self.operands.itemsize
+
+    def label(self, i: int):
+        """Returns the constant value, variable name or Opcode of node i"""
+        opcode = self.opcodes[i]
+        if opcode == Opcode.CONSTANT:
+            return self.constants[self.operands[i]]
+        if opcode == Opcode.LOAD:
+            return self.variables[self.operands[i]]
+        return Opcode(opcode)
+
+    ## Traversal
+    def children(self) -> tuple:
+        """Computes child links in one pass (-1 where a child is absent)
+        Returns: (left, right) arrays indexed by node"""
+        size = len(self.opcodes)
+        left = array("l", [-1]) * size
+        right = array("l", [-1]) * size
+        stack = []  # type: list[int]
+
+        for i, opcode in enumerate(self.opcodes):
+            arity = ARITY[opcode]
+            if arity >= 1:
+                right[i] = stack.pop()
+            if arity == 2:
+                left[i] = stack.pop()
+            stack.append(i)
+
+        return left, right
+
+    def postorder(self) -> Iterator[int]:
+        """Yields node indices in post-order (children before parents)"""
+        return iter(range(len(self.opcodes)))
+
+    def dfs(self) -> Iterator[int]:
+        """Yields node indices in pre-order (parents before children, left first)"""
+        if not self.opcodes:
+            return
+        left, right = self.children()
+        stack = [len(self.opcodes) - 1]
+        while stack:
+            i = stack.pop()
+            yield i
+            if right[i] >= 0:
+                stack.append(right[i])
+            if left[i] >= 0:
+                stack.append(left[i])
+
+    def bfs(self) -> Iterator[int]:
+        """Yields node indices level by level from the root"""
+        if not self.opcodes:
+            return
+        left, right = self.children()
+        queue = deque([len(self.opcodes) - 1])
+        while queue:
+            i = queue.popleft()
+            yield i
+            if left[i] >= 0:
+                queue.append(left[i])
+            if right[i] >= 0:
+                queue.append(right[i])
+
+    ## Evaluation
+    def run(self, values: tuple):
+        """Evaluates the tree with values given positionally in `variables` order"""
+        return run_program(zip(self.opcodes, self.operands), self.constants, values)
+
+    def evaluate(self, **bindings):
+        """Evaluates the tree with the given variable bindings"""
+        missing = [name for name in self.variables if name not in bindings]
+        if missing:
+            raise NameError(f"evaluate: unbound variable(s) {', '.join(missing)}")
+        return self.run(tuple([bindings[name] for name in self.variables]))
+
+    ## Conversion
+    @classmethod
+    def from_tokens(cls, tokens: TokenStream, number = None) -> 'FlatTree':
+        """Parses a token stream directly into a flat tree, without building Nodes
+        `number` converts literal text to constants (default: the lexer's floats)"""
+        builder = FlatTreeBuilder(number)
+        parse(tokens, builder = builder)
+        return builder.tree
+
+    @classmethod
+    def from_node(cls, root: Node, number = None) -> 'FlatTree':
+        """Flattens a Node tree (as built by the parser)
+        `number` converts literal text to constants (default: the lexer's floats)"""
+        builder = FlatTreeBuilder(number)
+        stack = [(root, False)]  # type: list[tuple[Node, bool]]
+        while stack:
+            node, visited = stack.pop()
+            token = node.val
+
+            if token.kind == TokenKind.NUMBER:
+                builder.constant(token.value if number is None else number(token.text))
+            elif token.kind == TokenKind.NAME:
+                builder.load(token.text)
+            elif not visited:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                if node.left is not None:
+                    stack.append((node.left, False))
+            elif node.left is None:
+                builder.negate(None)
+            else:
+                builder.binary(token.kind, None, None)
+        return builder.tree
+
+    def to_node(self) -> Node:
+        """Rebuilds the equivalent Node tree
+        Returns: Root Node"""
+        stack = []  # type: list[Node]
+        for i, opcode in enumerate(self.opcodes):
+            if opcode == Opcode.CONSTANT:
+                value = self.constants[self.operands[i]]
+                stack.append(Node(val = Token(TokenKind.NUMBER, str(value), value)))
+            elif opcode == Opcode.LOAD:
+                stack.append(Node(val = Token(TokenKind.NAME, self.variables[self.operands[i]])))
+            elif opcode == Opcode.NEGATE:
+                stack.append(Node(val = OPCODE_TOKENS[opcode], right = stack.pop()))
+            else:
+                right = stack.pop()
+                stack.append(Node(val = OPCODE_TOKENS[opcode], left = stack.pop(), right = right))
+        return stack[-1]
+
+
+class FlatTreeBuilder:
+    """Parser builder that appends postfix instructions to a FlatTree"""
+
+    def __init__(self, number = None) -> None:
+        self.tree = FlatTree()
+        self.number = number
+        self._constants = {}  # type: dict[tuple, int]
+        self._variables = {}  # type: dict[str, int]
+
+    def constant(self, value) -> None:
+        """Appends a CONSTANT node, sharing one pool slot per distinct value"""
+        # Key on the type and spelling too, so Decimal('1.0') and Decimal('1') stay distinct
+        key = (value, type(value), str(value))
+        index = self._constants.get(key)
+        if index is None:
+            index = self._constants[key] = len(self.tree.constants)
+            self.tree.constants.append(value)
+        self.tree.opcodes.append(Opcode.CONSTANT)
+        self.tree.operands.append(index)
+
+    def load(self, name: str) -> None:
+        """Appends a LOAD node, sharing one table slot per distinct name"""
+        index = self._variables.get(name)
+        if index is None:
+            index = self._variables[name] = len(self.tree.variables)
+            self.tree.variables.append(name)
+        self.tree.opcodes.append(Opcode.LOAD)
+        self.tree.operands.append(index)
+
+    def operand(self, tokens: TokenStream, i: int) -> None:
+        if tokens.kinds[i] == TokenKind.NUMBER:
+            self.constant(tokens.values[i] if self.number is None else self.number(tokens.text(i)))
+        else:
+            self.load(tokens.text(i))
+
+    def negate(self, operand) -> None:
+        self.tree.opcodes.append(Opcode.NEGATE)
+        self.tree.operands.append(0)
+
+    def binary(self, kind: TokenKind, left, right) -> None:
+        self.tree.opcodes.append(TOKEN_OPCODES[kind])
+        self.tree.operands.append(0)
@@ -0,0 +1,135 @@
+"""
+graphalith validator module.
+
+Checks an expression without evaluating it. One left-to-right pass over the
+token stream tracks only whether an operand is expected next and a stack of
+open delimiters, and reports every problem it finds as a Diagnostic with the
+character span it refers to:
+
+    unknown characters (`2 + @`)
+    missing operands (`2 *`, `* 3`, `2 + * 3`, `()`)
+    unmatched, mismatched and unclosed delimiters (`(2]`, `2)`, `(2`)
+    division by a literal zero (`5 / 0`, `5 / -0.0`)
+
+Anything validate() accepts is parsed by the parser; names are not checked
+against bindings, and only literal zero divisors are detected.
+"""
+
+from enum import Enum
+from typing import NamedTuple, Optional, Union
+
+from graphalith.lexer import DELIMITERS, OPERATOR_KINDS, TokenKind, TokenStream, tokenize
+from graphalith.profiling import profiled
+
+
+class Issue(Enum):
+    """Enum class for the problems the validator reports"""
+    EMPTY = "empty expression"
+    UNKNOWN_CHARACTER = "unknown character"
+    MISSING_OPERAND = "missing operand"
+    UNMATCHED_DELIMITER = "unmatched closing delimiter"
+    MISMATCHED_DELIMITER = "mismatched delimiter"
+    UNCLOSED_DELIMITER = "unclosed delimiter"
+    DIVISION_BY_ZERO = "division by zero"
+
+
+class Diagnostic(NamedTuple):
+    """A problem found by the validator, located at source[start:end]"""
+    issue: Issue
+    message: str
+    start: int
+    end: int
+
+    def __str__(self) -> str:
+        return f"{self.message} (at offset {self.start})"
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _zero_divisor(tokens: TokenStream, i: int, hi: int) -> int:
+    """Returns the index of a literal zero divisor following the division at i, or -1"""
+    kinds = tokens.kinds
+    j = i + 1
+    while j < hi and kinds[j] in (TokenKind.OPERATOR_ADD, TokenKind.OPERATOR_SUBTRACT):
+        j += 1
+    if j < hi and kinds[j] == TokenKind.NUMBER and tokens.values[j] == 0:
+        return j
+    return -1
+
+
+######################################
+#                 API                #
+######################################
+
+@profiled("validate")
+def validate(source: Union[str, TokenStream], limit: Optional[int] = None) -> list:
+    """Checks an expression (text or token stream) in O(n) without evaluating it
+    Stops after `limit` diagnostics when given
+    Returns: List of Diagnostic, empty when the expression is valid"""
+    tokens = tokenize(source) if isinstance(source, str) else source
+    kinds, starts, ends = tokens.kinds, tokens.starts, tokens.ends
+    count = len(kinds)
+    diagnostics: list[Diagnostic] = []
+    opened: list[int] = []  # token index of each open delimiter
+    expect_operand = True
+
+    def report(issue: Issue, message: str, i: int, j: Optional[int] = None) -> bool:
+        diagnostics.append(Diagnostic(issue, message, starts[i], ends[i if j is None else j]))
+        return limit is not None and len(diagnostics) >= limit
+
+    if count == 0:
+        return [Diagnostic(Issue.EMPTY, "validate: expression is empty", 0, len(tokens.source))]
+
+    for i in range(count):
+        kind = kinds[i]
+
+        if kind == TokenKind.NUMBER or kind == TokenKind.NAME:
+            expect_operand = False
+
+        elif kind in OPERATOR_KINDS:
+            if expect_operand and kind != TokenKind.OPERATOR_ADD and kind != TokenKind.OPERATOR_SUBTRACT:
+                if report(Issue.MISSING_OPERAND, f"validate: operator {tokens.text(i)!r} is missing its left operand", i):
+                    return diagnostics
+            elif kind == TokenKind.OPERATOR_DIVIDE:
+                j = _zero_divisor(tokens, i, count)
+                if j >= 0 and report(Issue.DIVISION_BY_ZERO, "validate: division by a literal zero", i, j):
+                    return diagnostics
+            expect_operand = True
+
+        elif kind == TokenKind.DELIMITER_OPEN:
+            opened.append(i)
+            expect_operand = True
+
+        elif kind == TokenKind.DELIMITER_CLOSED:
+            if expect_operand:
+                if report(Issue.MISSING_OPERAND, f"validate: expected an operand before {tokens.text(i)!r}", i):
+                    return diagnostics
+            if not opened:
+                if report(Issue.UNMATCHED_DELIMITER, f"validate: unmatched closing delimiter {tokens.text(i)!r}", i):
+                    return diagnostics
+            else:
+                j = opened.pop()
+                if DELIMITERS[tokens.text(j)] != tokens.text(i):
+                    if report(Issue.MISMATCHED_DELIMITER, f"validate: {tokens.text(i)!r} does not close {tokens.text(j)!r}", j, i):
+                        return diagnostics
+            expect_operand = False
+
+        else:
+            if report(Issue.UNKNOWN_CHARACTER, f"validate: unexpected character {tokens.text(i)!r}", i):
+                return diagnostics
+            expect_operand = False
+
+    if expect_operand:
+        if report(Issue.MISSING_OPERAND, "validate: expression ended while expecting an operand", count - 1):
+            return diagnostics
+    for j in reversed(opened):
+        if report(Issue.UNCLOSED_DELIMITER, f"validate: unclosed delimiter {tokens.text(j)!r}", j):
+            return diagnostics
+    return diagnostics
+
+def is_valid(source: Union[str, TokenStream]) -> bool:
+    """Checks an expression, stopping at the first problem
+    Returns: Boolean"""
+    return not validate(source, limit = 1)
@@ -0,0 +1,157 @@
+"""
+graphalith vectorize module.
+
+Evaluates a CompiledExpression over whole arrays of bindings at once. Each
+instruction of the postfix program becomes a single NumPy ufunc call over
+the full array, writing into scratch buffers that are recycled between
+instructions, so evaluating a program allocates at most one buffer per
+level of stack depth. The last instruction writes straight into `out`.
+
+Division by zero never raises: those elements are set to NaN.
+
+NumPy is an optional dependency (`pip install graphalith[vector]`).
+"""
+
+from graphalith.compiler import CompiledExpression
+from graphalith.numeric import NumericMode
+from graphalith.tree import OPERATIONS, Opcode
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore[assignment]
+
+
+######################################
+#            CONSTANTS               #
+######################################
+
+if numpy is not None:
+    UFUNCS = {Opcode.ADD: numpy.add,
+              Opcode.SUBTRACT: numpy.subtract,
+              Opcode.MULTIPLY: numpy.multiply,
+              Opcode.DIVIDE: numpy.divide}
+    assert UFUNCS.keys() == OPERATIONS.keys()
+else:  # pragma: no cover
+    UFUNCS = {}
+
+
+######################################
+#            PRIVATE METHODS         #
+######################################
+
+def _require_numpy():
+    """Returns the numpy module or raises if it is not installed"""
+    if numpy is None:  # pragma: no cover
+        raise ImportError("graphalith.vectorize: numpy is required for vectorized evaluation")
+    return numpy
+
+def _scalar_operation(opcode: Opcode, left: float, right: float) -> float:
+    """Applies a binary opcode to two scalars, with NaN for division by zero"""
+    if opcode == Opcode.DIVIDE and right == 0:
+        return float("nan")
+    return OPERATIONS[opcode](left, right)
+
+
+######################################
+#                 API                #
+######################################
+
+def evaluate_array(compiled: CompiledExpression, out = None, **arrays):
+    """Evaluates a compiled expression elementwise over arrays of bindings
+    Bindings may be NumPy arrays, any buffer-protocol object or scalars, and
+    are broadcast against each other. If `out` is given the result is written
+    into it and no result array is allocated.
+    Returns: numpy.ndarray"""
+    np = _require_numpy()
+
+    if compiled.mode != NumericMode.FLOAT:
+        raise ValueError(f"evaluate_array: only float mode can be vectorized, not {compiled.mode.value}")
+
+    missing = [name for name in compiled.variables if name not in arrays]
+    if missing:
+        raise NameError(f"evaluate_array: unbound variable(s) {', '.join(missing)}")
+
+    inputs = [np.asarray(arrays[name], dtype = np.float64) for name in compiled.variables]
+    shape = np.broadcast_shapes(*[array.shape for array in inputs]) if inputs else ()
+
+    if out is None:
+        out = np.empty(shape, dtype = np.float64)
+    elif out.shape != shape:
+        raise ValueError(f"evaluate_array: out has shape {out.shape}, expected {shape}")
+
+    constants = compiled.constants
+    program = compiled.program
+    last = len(program) - 1
+
+    stack: list = []        # arrays or Python scalars
+    owned: list[bool] = []  # True when the stack entry is a scratch buffer
+    free: list = []         # scratch buffers ready for reuse
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        for step, (opcode, arg) in enumerate(program):
+            if opcode == Opcode.CONSTANT:
+                stack.append(constants[arg])
+                owned.append(False)
+                continue
+
+            if opcode == Opcode.LOAD:
+                stack.append(inputs[arg])
+                owned.append(False)
+                continue
+
+            if opcode == Opcode.NEGATE:
+                value, value_owned = stack.pop(), owned.pop()
+                if not isinstance(value, np.ndarray):
+                    stack.append(-value)
+                    owned.append(False)
+                    continue
+                if step == last:
+                    target = out
+                elif value_owned:
+                    target = value
+                else:
+                    target = free.pop() if free else np.empty(shape, dtype = np.float64)
+                np.negative(value, out = target)
+                stack.append(target)
+                owned.append(True)
+                continue
+
+            right, right_owned = stack.pop(), owned.pop()
+            left, left_owned = stack.pop(), owned.pop()
+
+            # Fold scalar-only operations without touching any buffer
+            if not isinstance(left, np.ndarray) and not isinstance(right, np.ndarray):
+                stack.append(_scalar_operation(opcode, left, right))
+                owned.append(False)
+                continue
+
+            if step == last:
+                target = out
+            elif left_owned:
+                target = left
+            elif right_owned:
+                target = right
+            else:
+                target = free.pop() if free else np.empty(shape, dtype = np.float64)
+
+            if opcode == Opcode.DIVIDE:
+                zero = np.equal(right, 0)
+                np.divide(left, right, out = target)
+                np.copyto(target, np.nan, where = zero)
+            else:
+                UFUNCS[opcode](left, right, out = target)
+
+            # Hand back whichever operand buffers were not reused as the target
+            if left_owned and left is not target:
+                free.append(left)
+            if right_owned and right is not target:
+                free.append(right)
+
+            stack.append(target)
+            owned.append(True)
+
+    result = stack[-1]
+    if result is not out:
+        np.copyto(out, result)
+    return out
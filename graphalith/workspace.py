@@ -0,0 +1,241 @@
+"""
+graphalith workspace module.
+
+A spreadsheet-like collection of named, interdependent expressions. Each
+formula's variables are references to other names in the workspace; the
+references form a dependency graph that must stay acyclic.
+
+Results are memoized. Changing an input only marks its downstream formulas
+dirty, and the next read re-evaluates just those, in topological order, so
+an update costs time proportional to the part of the graph it reaches
+rather than to the whole workspace. A formula whose inputs were recomputed
+to the same values is not re-evaluated either.
+
+    workspace = Workspace()
+    workspace.set("rate", 0.2)
+    workspace.add(Expression(name = "tax", value = "price * rate"))
+    workspace.set("price", 100)
+    workspace["tax"]        # 20.0
+"""
+
+from typing import Iterator, Optional
+
+from graphalith.compiler import CompiledExpression
+from graphalith.expression import Expression, ExpressionType
+
+
+class Workspace:
+    """Named expressions with incremental, dependency-ordered recalculation"""
+
+    def __init__(self) -> None:
+        self._formulas: dict[str, CompiledExpression] = {}  # inputs have no entry
+        self._values: dict[str, object] = {}
+        self._errors: dict[str, Exception] = {}
+        self._dependencies: dict[str, tuple[str, ...]] = {}
+        self._dependents: dict[str, set[str]] = {}  # may name undefined references
+        self._dirty: set[str] = set()  # formulas that may need re-evaluation
+        self._stale: set[str] = set()  # dirty formulas that must be re-evaluated
+
+    def __len__(self) -> int:
+        return len(self._dependencies)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._dependencies
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dependencies)
+
+    def __getitem__(self, name: str):
+        return self.get(name)
+
+    def __repr__(self) -> str:
+        return f"Workspace({len(self._formulas)} formulas, {len(self) - len(self._formulas)} inputs, {len(self._dirty)} dirty)"
+
+    ## Graph
+    def __path(self, start: str, goal: str) -> Optional[list]:
+        """Returns a dependency path from start to goal, or None if there is none"""
+        parents: dict[str, Optional[str]] = {start: None}
+        stack = [start]
+        while stack:
+            name = stack.pop()
+            if name == goal:
+                path = []
+                node: Optional[str] = name
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                return path[::-1]
+            for dependency in self._dependencies.get(name, ()):
+                if dependency not in parents:
+                    parents[dependency] = name
+                    stack.append(dependency)
+        return None
+
+    def __link(self, name: str, dependencies: tuple) -> None:
+        """Replaces the dependency edges of name"""
+        for dependency in self._dependencies.get(name, ()):
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(name)
+                if not dependents:
+                    del self._dependents[dependency]
+
+        self._dependencies[name] = dependencies
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, set()).add(name)
+
+    def __invalidate(self, name: str) -> None:
+        """Marks name (if it is a formula) and every formula downstream of it dirty"""
+        if name in self._formulas:
+            self._dirty.add(name)
+            self._stale.add(name)
+        else:
+            self._stale.update(self._dependents.get(name, ()))
+
+        # The dirty set is closed under dependents, so an already-dirty formula ends the walk
+        stack = [name]
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in self._dirty:
+                    self._dirty.add(dependent)
+                    stack.append(dependent)
+
+    def dependencies(self, name: str) -> tuple:
+        """Returns the names a formula refers to (empty for inputs)
+        Returns: Tuple"""
+        return self._dependencies[name]
+
+    def dependents(self, name: str) -> frozenset:
+        """Returns the formulas that refer directly to name
+        Returns: Frozenset"""
+        return frozenset(self._dependents.get(name, ()))
+
+    ## Definition
+    def add(self, expression: Expression) -> None:
+        """Defines (or redefines) the expression under its name
+        Numeric expressions become inputs; anything else is a formula over other names"""
+        name = expression.name
+        if expression.type == ExpressionType.NUMERIC:
+            self.set(name, expression.compile().evaluate())
+            return
+
+        compiled = expression.compile()
+        dependencies = tuple(compiled.variables)
+        for dependency in dependencies:
+            path = self.__path(dependency, name)
+            if path is not None:
+                raise ValueError(f"Workspace.add: {name} would create a cycle: {' -> '.join([name] + path)}")
+
+        self._formulas[name] = compiled
+        self.__link(name, dependencies)
+        self.__invalidate(name)
+
+    def set(self, name: str, value) -> None:
+        """Sets an input value, replacing any formula of the same name"""
+        if name in self._formulas:
+            del self._formulas[name]
+            self._dirty.discard(name)
+            self._stale.discard(name)
+        if self._dependencies.get(name):
+            self.__link(name, ())
+        self._dependencies.setdefault(name, ())
+
+        self._errors.pop(name, None)
+        if name in self._values and self._values[name] == value:
+            return
+        self._values[name] = value
+        self.__invalidate(name)
+
+    def update(self, **inputs) -> None:
+        """Sets several input values at once"""
+        for name, value in inputs.items():
+            self.set(name, value)
+
+    def remove(self, name: str) -> None:
+        """Removes a name; formulas that refer to it fail until it is defined again"""
+        self.__invalidate(name)
+        self._stale.update(self._dependents.get(name, ()))
+        self.__link(name, ())
+        del self._dependencies[name]
+        self._formulas.pop(name, None)
+        self._values.pop(name, None)
+        self._errors.pop(name, None)
+        self._dirty.discard(name)
+        self._stale.discard(name)
+
+    ## Evaluation
+    def __evaluate(self, name: str) -> None:
+        """Evaluates one formula from the memoized values of its dependencies"""
+        compiled = self._formulas[name]
+        bindings = {}
+        error: Exception
+        for dependency in self._dependencies[name]:
+            if dependency in self._errors:
+                error = ValueError(f"Workspace: {name} depends on {dependency}, which failed")
+                error.__cause__ = self._errors[dependency]
+                break
+            if dependency not in self._values:
+                error = NameError(f"Workspace: {name} refers to undefined name {dependency}")
+                break
+            bindings[dependency] = self._values[dependency]
+        else:
+            try:
+                self._values[name] = compiled.evaluate(**bindings)
+                self._errors.pop(name, None)
+                return
+            except (ArithmeticError, ValueError, TypeError) as exception:  # TypeError: a non-numeric input
+                error = exception
+
+        self._values.pop(name, None)
+        self._errors[name] = error
+
+    def recalculate(self) -> int:
+        """Re-evaluates the dirty formulas in topological order
+        Runtime: O(d) in the number of dirty formulas and their edges
+        Returns: Number of formulas evaluated"""
+        dirty = self._dirty
+        if not dirty:
+            return 0
+
+        # Kahn's algorithm restricted to the dirty subgraph
+        waiting = {name: sum(1 for dependency in self._dependencies[name] if dependency in dirty) for name in dirty}
+        ready = [name for name, count in waiting.items() if count == 0]
+        changed: set[str] = set()  # formulas whose value changed this pass
+        evaluated = 0
+
+        while ready:
+            name = ready.pop()
+
+            # Skip formulas whose recomputed dependencies all came out unchanged
+            if name in self._stale or any(dependency in changed for dependency in self._dependencies[name]):
+                before = self._values.get(name, self._errors.get(name))
+                self.__evaluate(name)
+                evaluated += 1
+                if self._values.get(name, self._errors.get(name)) != before:
+                    changed.add(name)
+
+            for dependent in self._dependents.get(name, ()):
+                if dependent in waiting:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+
+        dirty.clear()
+        self._stale.clear()
+        return evaluated
+
+    def get(self, name: str):
+        """Returns the current value of a name, recalculating dirty formulas first
+        Raises the formula's error if it could not be evaluated"""
+        if name not in self._dependencies:
+            raise KeyError(name)
+        self.recalculate()
+        if name in self._errors:
+            raise self._errors[name]
+        return self._values[name]
+
+    def values(self) -> dict:
+        """Returns every successfully evaluated name and its value
+        Returns: Dictionary"""
+        self.recalculate()
+        return dict(self._values)
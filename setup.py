@@ -40,7 +40,11 @@ setup(
     packages=find_packages(exclude=["tests", ".github"]),
     install_requires=read_requirements("requirements.txt"),
     entry_points={
-        "console_scripts": ["graphalith = graphalith.__main__:main"]
+        "console_scripts": ["graphalith = graphalith.__main__:main",
+                            "graphalith-server = graphalith.server:main"]
+    },
+    extras_require={
+        "test": read_requirements("requirements-test.txt"),
+        "vector": ["numpy"],
     },
-    extras_require={"test": read_requirements("requirements-test.txt")},
 )
@@ -1,3 +1,5 @@
+import pytest
+
 from graphalith.base import*
 
 STANDARD_TEST_CASES = ["2 + 3 - 1",
@@ -31,11 +33,37 @@ def test_expression_evaluate_standard():
         assert eval_exp.expression_get_type() == ExpressionType.NUMERIC, case
         
 def test_expression_evaluate_special():
-    #TODO: Implement test for failing error cases
     for case in ERROR_TEST_CASES:
-        assert True
-    assert True
+        expression = Expression(value = case)
+        assert expression.diagnostics and not expression.valid, case
+        assert expression.evaluation is None, case
+        with pytest.raises(RuntimeError):
+            expression.expression_evaluate()
 
 def test_expression_get_value():
     for case in STANDARD_TEST_CASES:
-        assert Expression(value = case).expression_get_value() == case, case
\ No newline at end of file
+        assert Expression(value = case).expression_get_value() == case, case
+
+def test_expression_lazy_attributes():
+    expression = Expression(value = " 2 --  3 ", auto_format = True, auto_eval = True)
+    assert not hasattr(expression, "__dict__")
+
+    assert expression.value == "2+3"
+    assert expression.valid and expression.evaluation.expression_get_value() == "5.0"
+    assert expression.type == ExpressionType.ALPHANUMERIC
+
+    expression.value = "(2 + 3"
+    assert not expression.valid and expression.evaluation is None
+
+def test_expression_auto_eval_validity():
+    assert not Expression(value = "5 / 0", auto_eval = True).valid
+    assert not Expression(value = "5 / 0").valid
+    assert Expression(value = "5 / x").valid and not Expression(value = "5 / (2 - 2)", auto_eval = True).valid
+
+def test_expression_type_follows_the_lexer():
+    for case in ["7", "1e5", "-2.5", "+.5"]:
+        assert Expression(value = case).type == ExpressionType.NUMERIC, case
+
+    for case in ["inf", "nan"]:
+        expression = Expression(value = case)
+        assert expression.type == ExpressionType.ALPHA and expression.evaluation is None, case
@@ -0,0 +1,43 @@
+import json
+
+from graphalith.batch import format_result, stream_results
+from graphalith.cli import parse_args, run_batch
+
+LINES = ["1 + 2\n", "\n", "(3\n", "x * 2\n", "5 / 0\n", "2(3 + 4)\n"]
+
+def test_stream_results_reports_errors_inline():
+    results = list(stream_results(LINES))
+
+    assert [result.line for result in results] == [1, 3, 4, 5, 6]
+    assert results[0].value == 3 and results[-1].value == 14
+    assert results[1].error.startswith("ParseError")
+    assert results[2].error.startswith("NameError")
+    assert results[3].error.startswith("ZeroDivisionError")
+
+def test_stream_results_parallel_preserves_order():
+    lines = [f"{i} * 2\n" for i in range(500)]
+    results = stream_results(lines, jobs = 2, chunk_size = 7)
+    assert [result.value for result in results] == [i * 2 for i in range(500)]
+
+def test_format_result():
+    result = next(stream_results(['"a", 1\n']))
+    assert format_result(result).startswith('1,"""a"", 1",,"ParseError')
+    assert json.loads(format_result(result, "json"))["line"] == 1
+
+def test_run_batch_files():
+    with open("input.txt", "w") as lines:
+        lines.writelines(LINES)
+
+    assert run_batch(parse_args(["input.txt", "--format", "json", "-o", "output.jsonl"])) == 0
+    with open("output.jsonl") as output:
+        rows = [json.loads(line) for line in output]
+    assert [row["value"] for row in rows] == [3.0, None, None, None, 14.0]
+
+def test_json_output_is_strict_for_non_finite_values():
+    results = list(stream_results(["1e999\n", "1e999 - 1e999\n"])) + list(stream_results(["1/3\n"], mode = "fraction"))
+    def reject(constant: str):
+        raise ValueError(f"non-standard JSON constant {constant}")
+
+    strict = [json.loads(format_result(result, "json"), parse_constant = reject) for result in results]
+    assert [row["value"] for row in strict] == ["inf", "nan", "1/3"]
+    assert format_result(results[0]) == "1,1e999,inf,"
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from benchmarks import bench_suite
+from benchmarks.workloads import BINDINGS, Workload, generate
+from graphalith.base import Expression
+
+def test_generated_workload_shape():
+    workload = Workload("test", length = 40, depth = 6, operators = "*/", delimiters = "([{", count = 20)
+    expressions = generate(workload)
+
+    assert expressions == generate(workload) and len(expressions) == 20
+    for text in expressions:
+        assert sum(text.count(opener) for opener in "([{") == 6
+        assert "+" not in text and " - " not in text
+        Expression(value = text).compile().evaluate(**BINDINGS)
+
+def test_suite_baseline_round_trip():
+    assert bench_suite.main(["--workload", "short", "--scale", "0.05", "--repeat", "1", "--save", "baseline.json"]) == 0
+    with open("baseline.json") as baseline:
+        results = json.load(baseline)
+
+    phases = results["workloads"]["short"]["phases"]
+    assert set(phases) == set(bench_suite.PHASES)
+    assert bench_suite.main(["--workload", "short", "--scale", "0.05", "--repeat", "1",
+                             "--compare", "baseline.json", "--threshold", "1000"]) == 0
+
+def test_parallel_benchmark_runs():
+    from benchmarks import bench_parallel
+    [result] = bench_parallel.main(["--sizes", "3000", "--jobs", "2", "--repeat", "1"])
+    assert result["instructions"] >= 2900 and result["speedup"] > 0
+
+def test_threads_benchmark_runs():
+    pytest.importorskip("numpy")
+    from benchmarks import bench_threads
+    results = bench_threads.main(["--threads", "1", "2", "--rows", "2000", "--columns", "100000", "--repeat", "1"])
+    assert [(result["path"], result["threads"]) for result in results] == [("rows", 1), ("rows", 2), ("columns", 1), ("columns", 2)]
+
+def test_memory_benchmark_compares_with_eager_baseline():
+    from benchmarks import bench_memory
+    results = bench_memory.main(["--count", "200"])
+    assert results["construct"][0] < results["eager (baseline)"][0]
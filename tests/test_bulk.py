@@ -0,0 +1,56 @@
+import math
+
+from graphalith.bulk import Status, evaluate_file, partition, read_columns
+from graphalith.cache import compile_expression
+
+LINES = ["1 + 2", "", "2 * (3 + 4) - -1", "1 / 0", "x + 1", "(1 + 2", "10 / 4", "   ", "[2 - 5] * 3"]
+
+def write_input(path: str, count: int) -> list:
+    lines = [LINES[i % len(LINES)] for i in range(count)]
+    with open(path, "w") as source:
+        source.write("\n".join(lines) + "\n")
+    return lines
+
+def test_partition_splits_after_newlines():
+    data = b"1+1\n22+2\n333+3\n4444+4\n"
+    spans = partition(data, 3)
+    assert spans[0][0] == 0 and spans[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in spans[1:])
+    assert partition(b"1+1", 8) == [(0, 3)] and partition(b"", 4) == []
+
+def test_results_match_per_line_evaluation():
+    lines = write_input("input.txt", 90)
+    report = evaluate_file("input.txt", "output.glxc", block_size = 64)
+    columns = read_columns("output.glxc")
+
+    assert report.rows == 90 and report.expressions == 70 and report.errors == 30
+    for i, line in enumerate(lines):
+        status = columns["status"][i]
+        if not line.strip():
+            assert status == Status.EMPTY
+        elif status == Status.OK:
+            assert columns["value"][i] == compile_expression(line).evaluate()
+        else:
+            assert math.isnan(columns["value"][i])
+    assert [columns["status"][i] for i in (3, 4, 5)] == [Status.ZERO_DIVISION, Status.NAME_ERROR, Status.PARSE_ERROR]
+    assert columns["offset"][2] == len("1 + 2\n\n")
+
+def test_parallel_matches_serial():
+    write_input("input.txt", 5000)
+    serial = evaluate_file("input.txt", "serial.glxc", jobs = 1)
+    parallel = evaluate_file("input.txt", "parallel.glxc", jobs = 3, block_size = 1024)
+    assert serial[:4] == parallel[:4]
+
+    serial, parallel = read_columns("serial.glxc"), read_columns("parallel.glxc")
+    for name in ("status", "offset"):
+        assert serial[name].tolist() == parallel[name].tolist()
+    assert serial["value"].tobytes() == parallel["value"].tobytes()
+
+def test_exact_mode_columns():
+    with open("input.txt", "w") as source:
+        source.write("1 / 3 + 1\n7 / 2")
+    report = evaluate_file("input.txt", "output.glxc", mode = "fraction")
+    columns = read_columns("output.glxc")
+    assert report.rows == 2 and columns["mode"].value == "fraction"
+    assert columns["value"].tolist() == [4 / 3, 3.5]
@@ -0,0 +1,54 @@
+import threading
+
+from graphalith.base import*
+from graphalith.cache import CACHE, ExpressionCache
+
+def test_cache_hits_on_normalized_text():
+    cache = ExpressionCache()
+    first = cache.get("2 --  x")
+
+    assert cache.get("2+x") is first
+    assert cache.get(" 2 + x ") is first
+    assert cache.stats() == {"entries": 1, "bytes": cache.bytes, "hits": 2, "misses": 1, "evictions": 0}
+
+def test_cache_lru_eviction():
+    cache = ExpressionCache(max_entries = 2)
+    cache.get("1 + 1")
+    cache.get("2 + 2")
+    cache.get("1 + 1")
+    cache.get("3 + 3")
+
+    assert "1+1" in cache and "3+3" in cache and "2+2" not in cache
+    assert cache.evictions == 1
+
+    cache.resize(max_bytes = 0)
+    assert len(cache) == 0 and cache.bytes == 0
+
+def test_cache_warm_from_file():
+    with open("formulas.txt", "w") as formulas:
+        formulas.write("# header\n1 + x\n\n(2 + 3\n2 * y\n")
+
+    cache = ExpressionCache()
+    assert cache.warm_from_file("formulas.txt") == 2
+    assert "1+x" in cache and "2*y" in cache
+
+def test_cache_thread_safe():
+    cache = ExpressionCache(max_entries = 8)
+
+    def worker():
+        for i in range(200):
+            assert cache.get(f"{i % 16} * x").evaluate(x = 2) == (i % 16) * 2
+
+    threads = [threading.Thread(target = worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 1600
+    assert stats["entries"] <= 8
+
+def test_expression_compile_uses_process_cache():
+    assert Expression(value = "7 * z + 1").compile() is Expression(value = "7*z+1").compile()
+    assert "7*z+1" in CACHE
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from graphalith.base import Expression
+from graphalith.canonical import canonical_digest, canonical_text, dedupe, group, structural_hash
+from graphalith.cache import CACHE, compile_expression
+
+EQUIVALENT = [("2 + 3", "3 + 2"), ("[x]", "(x)"), ("{a * b} - c", "(b * a) - c"), ("x * (y * 2)", "2 * y * x"),
+              ("a + 1 + b + 2", "b + a + 3"), ("-x * 3", "3 * -x"), ("(x + 0) * 1", "x"), ("2 * (x + y) / 4", "[y + x] * 2 / 4")]
+DIFFERENT = [("x - y", "y - x"), ("x / 2", "2 / x"), ("x + y", "x * y"), ("x", "-x"), ("a + b", "a + c")]
+
+def test_equivalent_forms_share_a_digest():
+    for left, right in EQUIVALENT:
+        assert canonical_digest(left) == canonical_digest(right), (left, right)
+        assert structural_hash(left) == structural_hash(right) < 2 ** 64
+        assert structural_hash(left, bits = 128) == int.from_bytes(canonical_digest(left), "little")
+    for left, right in DIFFERENT:
+        assert canonical_digest(left) != canonical_digest(right), (left, right)
+
+def test_canonical_text_reparses_to_the_same_form():
+    rng = random.Random(11)
+    for _ in range(200):
+        terms = [rng.choice(["x", "y", "z", str(rng.randint(1, 5))]) for _ in range(6)]
+        text = "".join(term + rng.choice([" + ", " * ", " - ", " / "]) for term in terms[:-1]) + terms[-1]
+        canonical = canonical_text(text)
+        assert canonical_digest(canonical) == canonical_digest(text)
+        assert compile_expression(canonical).evaluate(x = 1.5, y = 2.5, z = 4) == \
+               pytest.approx(compile_expression(text).evaluate(x = 1.5, y = 2.5, z = 4))
+
+def test_expressions_hash_and_compare_by_canonical_form():
+    assert Expression(value = "2 + x") == Expression(value = "[x] + 2")
+    assert Expression(value = "2 - x") != Expression(value = "x - 2")
+    assert len({Expression(value = text) for pair in EQUIVALENT for text in pair}) == len({canonical_digest(left) for left, _ in EQUIVALENT}) == 7
+    assert Expression(value = "(1 +") == Expression(value = "( 1+") and Expression(value = "(1 +") != Expression(value = "(2 +")
+
+def test_expression_hash_follows_its_value():
+    expression = Expression(value = "x + 1")
+    before = hash(expression)
+    held = {expression}
+
+    expression.value = "1 + x"
+    assert hash(expression) == before and expression in held
+    expression.value = "x + 2"
+    assert hash(expression) != before and expression == Expression(value = "2 + x")
+    assert expression not in held  # the set still files it under its old hash
+
+def test_expression_hashing_bypasses_the_compile_cache():
+    CACHE.clear()
+    compile_expression("y * 2")
+    before = CACHE.stats()
+
+    corpus = {Expression(value = f"x + {i}") for i in range(50)} | {Expression(value = "[x] + 0")}
+    assert len(corpus) == 50 and Expression(value = "0 + x") in corpus  # [x] + 0 is x + 0
+    assert CACHE.stats() == before and "y * 2" in CACHE and "x + 1" not in CACHE
+
+def test_dedupe_and_group_in_one_pass():
+    corpus = ["x + y", "y + x", "(y) + x", "x * y", "2 + 3", "5", "1 +", "1 +"]
+    assert list(dedupe(corpus)) == ["x + y", "x * y", "2 + 3", "1 +"]
+    groups = group(corpus)
+    assert sorted(len(members) for members in groups.values()) == [1, 2, 2, 3]
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks import bench_startup
+from graphalith.cli import EXIT_ERROR, EXIT_OK, EXIT_USAGE, main
+
+# Every graphalith module one-shot mode may load (see the graphalith.cli docstring)
+ONE_SHOT_MODULES = ["graphalith", "graphalith.cli", "graphalith.lexer", "graphalith.node", "graphalith.numeric",
+                    "graphalith.parser", "graphalith.profiling", "graphalith.tree"]
+HEAVY_MODULES = ["concurrent.futures", "multiprocessing", "ast", "hashlib",
+                 "graphalith.expression", "graphalith.cache", "graphalith.codegen", "graphalith.batch"]
+
+def run(argv: list, capsys) -> tuple:
+    with pytest.raises(SystemExit) as exit:
+        main(argv)
+    captured = capsys.readouterr()
+    return exit.value.code, captured.out, captured.err
+
+def test_one_shot_values_and_exit_status(capsys):
+    assert run(["-e", "2 * (3 + 4)", "-e", "x / y", "-D", "x=1", "-D", "y=4"], capsys) == (EXIT_OK, "14.0\n0.25\n", "")
+    assert run(["-e", "1/3 + 1", "--mode", "fraction"], capsys)[:2] == (EXIT_OK, "4/3\n")
+
+    status, out, err = run(["-e", "1 / 0", "-e", "(2", "-e", "z", "-e", "3"], capsys)
+    assert status == EXIT_ERROR and out.splitlines() == ["", "", "", "3.0"]
+    assert [line.split(": ")[2] for line in err.splitlines()] == ["ZeroDivisionError", "ParseError", "NameError"]
+
+    assert run(["-e", "x", "-D", "x"], capsys)[0] == EXIT_USAGE
+
+def test_file_mode_skips_blank_and_comment_lines(capsys):
+    with open("exprs.txt", "w") as file:
+        file.write("1 + 1\n# comment\n\n[2] * {3}\n")
+    assert run(["--file", "exprs.txt", "-e", "5"], capsys)[:2] == (EXIT_OK, "5.0\n2.0\n6.0\n")
+
+def test_define_applies_to_files_and_is_rejected_in_batch_mode(capsys):
+    with open("exprs.txt", "w") as file:
+        file.write("x + 1\nx * y\n")
+    assert run(["--file", "exprs.txt", "-D", "x=2", "-D", "y=5"], capsys)[:2] == (EXIT_OK, "3.0\n10.0\n")
+
+    for argv in (["exprs.txt", "-D", "x=2"], ["--batch", "-D", "x=2"], ["-D", "x=2"]):
+        status, out, err = run(argv, capsys)
+        assert status == EXIT_USAGE and not out and "--define" in err, argv
+
+def test_one_shot_does_not_import_heavy_modules():
+    code = ("import sys\nfrom graphalith.cli import main\ntry:\n    main(['-e', '1 + 2'])\nexcept SystemExit:\n    pass\n"
+            f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules])\n"
+            "print(sorted(name for name in sys.modules if name.split('.')[0] == 'graphalith'))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output = True, text = True,
+                            env = bench_startup._environment(), check = True)
+    assert result.stdout.splitlines() == ["3.0", "[]", repr(ONE_SHOT_MODULES)]
+
+def test_startup_within_budget():
+    # Generous budgets: this guards against heavy imports creeping back, not machine speed
+    assert bench_startup.main(["--repeat", "3", "--import-budget-ms", "250", "--startup-budget-ms", "500"]) == 0
@@ -0,0 +1,67 @@
+import ast
+import random
+from decimal import Context
+
+import pytest
+
+from graphalith import codegen
+from graphalith.base import Expression
+from graphalith.cache import compile_expression
+from graphalith.compiler import compile_tree
+from graphalith.lexer import tokenize
+from graphalith.parser import parse
+
+FORMULAS = ["(x + 2) * -y / 3 - x * x",
+            "x / y / 7 + [15 - y] * {x - -x}",
+            "2x(y + 10) - 3 / (x - y)"]
+
+def test_codegen_matches_interpreter():
+    rng = random.Random(0)
+    for mode in ["float", "int", "fraction", "decimal"]:
+        for formula in FORMULAS:
+            compiled = compile_expression(formula, mode = mode)
+            interpreted = compiled.with_backend("interpreter")
+            generated = compiled.with_backend("codegen")
+            assert generated.generated and not interpreted.generated
+
+            for _ in range(50):
+                bindings = {"x": rng.randint(-20, 20), "y": rng.randint(-20, 20)}
+                try:
+                    expected = interpreted.evaluate(**bindings)
+                except ArithmeticError as error:
+                    with pytest.raises(type(error)):
+                        generated.evaluate(**bindings)
+                    continue
+                result = generated.evaluate(**bindings)
+                assert result == expected and type(result) is type(expected)
+
+    compiled = compile_expression("x / 3 - -x", mode = "decimal").using(Context(prec = 5)).with_backend("codegen")
+    assert str(compiled.evaluate(x = 1)) == "1.3333"
+
+def test_codegen_auto_promotion():
+    compiled = compile_tree(parse(tokenize("a * b + 1")))
+    for i in range(codegen.CODEGEN_THRESHOLD - 1):
+        assert compiled.evaluate(a = i, b = 2) == i * 2 + 1
+    assert not compiled.generated
+
+    assert compiled.evaluate(a = 3, b = 2) == 7 and compiled.generated
+    assert Expression(value = "a - b", backend = "codegen").compile().generated
+    assert not Expression(value = "a - b", backend = "interpreter").compile().generated
+
+def test_codegen_deep_programs_stay_interpreted():
+    compiled = compile_tree(parse(tokenize("+".join(["x"] * 2000))))
+    with pytest.raises(ValueError):
+        compiled.with_backend("codegen")
+
+    for _ in range(codegen.CODEGEN_THRESHOLD + 1):
+        assert compiled.evaluate(x = 1.0) == 2000
+    assert not compiled.generated
+
+def test_codegen_whitelist():
+    compiled = compile_expression("__import__ + os * system")
+    source = codegen.source(compiled.program, compiled.constants, len(compiled.variables), compiled.arithmetic)
+    assert source == "lambda v0, v1, v2: v0 + v1 * v2"
+
+    for text in ["os.system", "__import__('os')", "'text'", "[x for x in y]"]:
+        with pytest.raises(ValueError):
+            codegen._check(ast.parse(text, mode = "eval"), {"x", "y"}, {})
@@ -0,0 +1,26 @@
+import pytest
+
+from graphalith.base import*
+
+def test_compile_evaluate_many():
+    compiled = Expression(value = "2x + y / (x - 1)").compile()
+
+    assert compiled.variables == ("x", "y")
+    for x in range(2, 50):
+        assert compiled.evaluate(x = x, y = 3) == 2*x + 3 / (x - 1)
+
+def test_compile_constant_expression():
+    compiled = Expression(value = "[(2 + 3) * {4 - 1}] / 5").compile()
+    assert compiled.variables == ()
+    assert compiled.evaluate() == 3
+
+def test_compile_missing_binding():
+    compiled = Expression(value = "a * b - c").compile()
+    with pytest.raises(NameError, match = "b, c"):
+        compiled.evaluate(a = 1)
+
+def test_compile_immutable():
+    compiled = Expression(value = "-x").compile()
+    assert compiled.evaluate(x = 2) == -2
+    with pytest.raises(AttributeError):
+        compiled.program = ()
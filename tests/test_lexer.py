@@ -0,0 +1,25 @@
+from graphalith.lexer import*
+
+def test_tokenize_kinds_and_spans():
+    tokens = tokenize("3 - 2.5 * (x1 + 1)")
+
+    assert [token.text for token in tokens] == ["3", "-", "2.5", "*", "(", "x1", "+", "1", ")"]
+    assert tokens.kinds[0] == TokenKind.NUMBER and tokens.values[2] == 2.5
+    assert tokens.kinds[5] == TokenKind.NAME
+    assert (tokens.starts[2], tokens.ends[2]) == (4, 7)
+
+def test_tokenize_shares_symbol_tokens():
+    tokens = tokenize("(1+2)+(3+4)")
+    assert tokens[2] is tokens[5] is SYMBOL_TOKENS["+"]
+    assert tokens[0] is tokens[6] is SYMBOL_TOKENS["("]
+
+def test_tokenize_unknown_and_empty():
+    assert len(tokenize("   ")) == 0
+    assert tokenize("2 + @").kinds[-1] == TokenKind.UNKNOWN
+
+def test_tokenize_bytes_source():
+    source = b"10 / [4 - y]"
+    tokens = tokenize(memoryview(source), 3)
+
+    assert [token.text for token in tokens] == ["/", "[", "4", "-", "y", "]"]
+    assert tokens.starts[0] == 3
@@ -0,0 +1,36 @@
+from decimal import Context, Decimal, Inexact
+from fractions import Fraction
+
+import pytest
+
+from graphalith.base import*
+from graphalith.cache import compile_expression
+
+def test_fraction_mode_is_exact():
+    compiled = compile_expression("1/3 + x/6", "fraction")
+    assert compiled.evaluate(x = 1) == Fraction(1, 2)
+    assert Expression(value = "1/3 + 1/6", mode = "fraction").expression_evaluate().expression_get_value() == "1/2"
+
+def test_int_mode():
+    assert compile_expression("(7 - 1) / 3 * x", "int").evaluate(x = 5) == 10
+    assert Expression(value = "2 * 21", mode = "int").expression_evaluate().expression_get_value() == "42"
+
+    with pytest.raises(ArithmeticError):
+        compile_expression("7 / 2", "int").evaluate()
+    with pytest.raises(ValueError):
+        compile_expression("0.5 + 1", "int")
+
+def test_decimal_mode_with_context():
+    assert compile_expression("0.1 + 0.2", "decimal").evaluate() == Decimal("0.3")
+
+    compiled = compile_expression("1 / 3", "decimal", Context(prec = 5))
+    assert compiled.evaluate() == Decimal("0.33333")
+
+    with pytest.raises(Inexact):
+        compile_expression("-1 / 3", "decimal", Context(traps = [Inexact])).evaluate()
+
+def test_float_mode_keeps_native_numbers():
+    compiled = compile_expression("x * 3", "float")
+    assert compiled.mode == NumericMode.FLOAT and compiled.constants == (3.0,)
+    assert compiled.evaluate(x = 0.1) == 0.1 * 3
+    assert compile_expression("x * 3", "fraction") is not compiled
@@ -0,0 +1,58 @@
+import decimal
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from graphalith.cache import compile_expression
+from graphalith.parallel import ParallelEvaluator, evaluate_parallel
+from graphalith.serialize import loads
+
+def chain(terms: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    return " + ".join(f"({rng.randint(1, 9)} * x - {rng.randint(1, 9)} / (y + {rng.random():.3f}))" for _ in range(terms))
+
+def balanced(depth: int) -> str:
+    if depth == 0:
+        return "(x - 0.5)"
+    return f"({balanced(depth - 1)} * {balanced(depth - 1)} - -{depth} / y)"
+
+def test_results_equal_sequential_evaluation():
+    with ThreadPoolExecutor(4) as executor:
+        for text in [chain(500), balanced(8), f"-({chain(300, 2)}) / ({chain(200, 3)})"]:
+            compiled = compile_expression(text)
+            evaluator = ParallelEvaluator(compiled, jobs = 4, threshold = 100, executor = executor)
+            assert evaluator.parallel and len(evaluator.residual) < len(compiled) / 2
+            for x, y in [(1.5, 2.0), (-3.0, 0.25)]:
+                assert evaluator.evaluate(x = x, y = y) == compiled.evaluate(x = x, y = y)
+
+        exact = compile_expression(chain(200), mode = "fraction")
+        evaluator = ParallelEvaluator(exact, jobs = 3, threshold = 100, executor = executor)
+        assert evaluator.evaluate(x = 2, y = 1) == exact.evaluate(x = 2, y = 1)
+
+def test_decimal_workers_use_the_callers_context():
+    text = chain(200)
+    with ProcessPoolExecutor(2) as executor:
+        with decimal.localcontext(decimal.Context(prec = 6, rounding = decimal.ROUND_DOWN)):
+            compiled = compile_expression(text, mode = "decimal")
+            evaluator = ParallelEvaluator(compiled, jobs = 2, threshold = 100, executor = executor)
+            assert evaluator.parallel
+            assert evaluator.evaluate(x = 2, y = 3) == compiled.evaluate(x = 2, y = 3)
+
+        explicit = compile_expression(text, mode = "decimal").using(decimal.Context(prec = 9))
+        evaluator = ParallelEvaluator(explicit, jobs = 2, threshold = 100, executor = executor)
+        assert evaluator.evaluate(x = 2, y = 3) == explicit.evaluate(x = 2, y = 3)
+
+def test_batches_are_self_contained_records():
+    compiled = compile_expression(chain(400))
+    evaluator = ParallelEvaluator(compiled, jobs = 2, threshold = 100)
+    assert len(evaluator.pieces) >= 2
+    shipped = sum(len(loads(record)) for record, _ in evaluator.pieces)
+    assert shipped + len(evaluator.residual) > len(compiled)
+    assert all(set(loads(record).variables) <= {"x", "y"} for record, _ in evaluator.pieces)
+
+def test_threshold_and_process_pool():
+    small = compile_expression(chain(20))
+    evaluator = ParallelEvaluator(small, jobs = 4)
+    assert not evaluator.parallel and evaluator.evaluate(x = 1, y = 1) == small.evaluate(x = 1, y = 1)
+
+    large = compile_expression(chain(1000))
+    assert evaluate_parallel(large, jobs = 2, threshold = 1000, x = 0.5, y = 3) == large.evaluate(x = 0.5, y = 3)
@@ -0,0 +1,47 @@
+import pytest
+
+from graphalith.base import*
+from graphalith.lexer import tokenize
+from graphalith.parser import ParseError, parse
+
+PRECEDENCE_TEST_CASES = {"2 + 3 * 4": 14,
+                         "8 - 3 - 2": 3,
+                         "8 / 4 / 2": 1,
+                         "2 * 3 + 4 * 5": 26,
+                         "-3 * (4 - 6)": 6,
+                         "-(3 + 2)": -5,
+                         "+3 + 5": 8,
+                         "2 * -3": -6,
+                         "3(2 + 1)": 9,
+                         "(1 + 1)(2 + 2)": 8,
+                         "2 - -2": 4}
+
+def evaluate(case):
+    return float(Expression(value = case).expression_evaluate().expression_get_value())
+
+def test_parse_precedence_and_associativity():
+    for case, expected in PRECEDENCE_TEST_CASES.items():
+        assert evaluate(case) == expected, case
+
+def test_parse_tree_shape():
+    root = parse(tokenize("1 - 2 - 3"))
+    assert root.val.text == "-"
+    assert root.left.val.text == "-" and root.right.val.text == "3"
+
+    negation = parse(tokenize("-x"))
+    assert negation.left is None and negation.right.val.text == "x"
+
+def test_parse_long_chain():
+    assert evaluate("+".join(["1"] * 100000)) == 100000
+    assert evaluate("(" * 5000 + "1" + ")" * 5000) == 1
+
+@pytest.mark.parametrize("case, position", [("2 +", 3),
+                                            ("* 2", 0),
+                                            ("(2 + 3", 0),
+                                            ("(2 + [3 - 1))", 11),
+                                            ("2 + @ * 3", 4),
+                                            ("()", 1)])
+def test_parse_errors(case, position):
+    with pytest.raises(ParseError) as error:
+        parse(tokenize(case))
+    assert error.value.position == position
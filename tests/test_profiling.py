@@ -0,0 +1,43 @@
+from graphalith import profiling
+from graphalith.base import Expression
+from graphalith.cache import ExpressionCache
+from graphalith.profiling import Profiler
+
+def test_profiler_records_phases_and_counters():
+    cache = ExpressionCache()
+    with Profiler() as profiler:
+        expression = Expression(value = "2 * (x + 1)")
+        assert expression.valid
+        cache.get(expression.value).evaluate(x = 3)
+        cache.get(expression.value)
+
+    report = profiler.report()
+    assert {"tokenize", "validate", "parse", "compile", "evaluate"} <= set(report["phases"])
+    assert report["phases"]["evaluate"]["calls"] == 1
+    assert report["counters"]["Expression"] == 1
+    assert report["counters"]["cache_hits"] == 1 and report["counters"]["cache_misses"] == 1
+    assert "compile" in profiler.format()
+
+def test_profiler_disabled_and_nested():
+    outer = Profiler()
+    Expression(value = "1 + 2").evaluation
+    assert profiling.ACTIVE is None
+
+    with outer:
+        with Profiler() as inner:
+            Expression(value = "1 + 2").valid
+        assert profiling.ACTIVE is outer
+    assert profiling.ACTIVE is None
+    assert inner.report()["counters"] == {"Expression": 1} and outer.report()["counters"] == {}
+
+def test_profiler_registry():
+    profiling.PROFILER.reset()
+    profiling.enable()
+    try:
+        Expression(value = "3 * 4").valid
+    finally:
+        profiling.disable()
+    Expression(value = "3 * 4").valid
+
+    assert profiling.ACTIVE is None
+    assert profiling.report()["counters"]["Expression"] == 1
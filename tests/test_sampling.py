@@ -0,0 +1,79 @@
+import decimal
+import math
+import random
+
+import pytest
+
+from graphalith.cache import compile_expression
+from graphalith.compiler import compile_tree
+from graphalith.lexer import tokenize
+from graphalith.parser import parse
+from graphalith.sampling import TileCache, sample
+
+def interpolate(samples, x: float) -> float:
+    xs, ys = samples
+    i = next(i for i in range(1, len(xs)) if xs[i] >= x)
+    t = (x - xs[i - 1]) / (xs[i] - xs[i - 1])
+    return ys[i - 1] + t * (ys[i] - ys[i - 1])
+
+def test_refines_only_where_the_curve_bends():
+    cache = TileCache()
+    line = sample("2x + 1", -4, 4, cache = cache)
+    cubic = sample("x*x*x - 4x", -4, 4, cache = cache)
+
+    assert line.xs[0] == -4 and line.xs[-1] == 4 and list(line.xs) == sorted(set(line.xs))
+    assert len(line.xs) < len(cubic.xs)
+
+    rng = random.Random(5)
+    for _ in range(200):
+        x = rng.uniform(-4, 4)
+        assert interpolate(line, x) == pytest.approx(2 * x + 1)
+        assert abs(interpolate(cubic, x) - (x ** 3 - 4 * x)) < 0.05
+
+def test_poles_and_division_by_zero_leave_gaps():
+    samples = sample("1 / (x - 1)", -3, 3, cache = TileCache())
+    gaps = [x for x, y in zip(*samples) if math.isnan(y)]
+    assert gaps and all(abs(x - 1) < 1e-3 for x in gaps)
+    assert all(y == pytest.approx(1 / (x - 1)) for x, y in zip(*samples) if not math.isnan(y))
+
+    # Points near the pole are much denser than far from it
+    near = sum(0.9 < x < 1.1 for x in samples.xs)
+    far = sum(-2.1 < x < -1.9 for x in samples.xs)
+    assert near > 10 * far
+
+def test_panning_and_zooming_reuse_tiles():
+    cache = TileCache()
+    compiled = compile_expression("x*x / (1 + x*x)")
+    sample(compiled, 0, 8, cache = cache)
+    misses = cache.misses
+
+    panned = sample(compiled, 2, 10, cache = cache)
+    assert cache.misses - misses == 1 and cache.hits == 3
+    assert panned.xs[0] == 2 and panned.xs[-1] == 10
+
+    # Zooming in samples a finer level once; zooming back out and panning there reuse it
+    sample(compiled, 0, 2, cache = cache)
+    misses = cache.misses
+    sample(compiled, 0, 8, cache = cache)
+    sample(compiled, 1, 3, cache = cache)
+    assert cache.misses - misses == 2
+
+def test_tiles_are_keyed_by_program_not_source():
+    cache = TileCache()
+    square = sample(compile_tree(parse(tokenize("x * x"))), 0, 4, cache = cache)
+    shifted = sample(compile_tree(parse(tokenize("x + 100"))), 0, 4, cache = cache)
+    assert cache.stats()["hits"] == 0
+    assert interpolate(square, 3) == pytest.approx(9, abs = 0.05)
+    assert interpolate(shifted, 3) == pytest.approx(103)
+
+    coarse = compile_expression("x / 3", mode = "decimal").using(decimal.Context(prec = 2))
+    fine = compile_expression("x / 3", mode = "decimal").using(decimal.Context(prec = 20))
+    assert all(float(f"{y:.2g}") == y for y in sample(coarse, 0, 4, cache = cache).ys)
+    assert interpolate(sample(fine, 0, 4, cache = cache), 2) == pytest.approx(2 / 3)
+
+def test_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        sample("x * y", 0, 1)
+    with pytest.raises(ValueError):
+        sample("x", 1, 1)
+    assert list(sample("3", 0, 1, cache = TileCache()).ys[:2]) == [3.0, 3.0]
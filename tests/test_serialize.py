@@ -0,0 +1,67 @@
+import pickle
+from decimal import Context
+
+import pytest
+
+from graphalith.cache import compile_expression
+from graphalith.serialize import Archive, dumps, loads, write_archive
+
+FORMULAS = ["(x + 2) * -y / 3.5 - x * x", "7", "a / b / [c - 1]", "2x(1 - x)"]
+
+def test_round_trip_every_mode():
+    for mode in ["float", "int", "fraction", "decimal"]:
+        for formula in FORMULAS:
+            if mode == "int" and "." in formula:
+                continue
+            compiled = compile_expression(formula, mode = mode)
+            loaded = loads(memoryview(dumps(compiled)))
+
+            assert (loaded.program, loaded.constants, loaded.variables, loaded.source, loaded.mode) == \
+                   (compiled.program, compiled.constants, compiled.variables, compiled.source, compiled.mode)
+
+    compiled = compile_expression("1 / x", mode = "decimal").using(Context(prec = 4)).with_backend("codegen")
+    restored = pickle.loads(pickle.dumps(compiled))
+    assert str(restored.evaluate(x = 3)) == "0.3333" and restored.generated
+
+def test_archive_lazy_named_loads():
+    compiled = [compile_expression(f"x * {i} + y") for i in range(1000)]
+    assert write_archive("formulas.glx", [(f"f{i}", item) for i, item in enumerate(compiled)]) == 1000
+
+    with Archive("formulas.glx") as archive:
+        assert len(archive) == 1000 and "0 loaded" in repr(archive)
+        assert archive[10].evaluate(x = 2, y = 1) == 21
+        assert archive.get("f999").evaluate(x = 1, y = 0) == 999
+        assert archive[-1] is archive.get("f999")
+        assert "2 loaded" in repr(archive)
+
+    # Loaded records stay usable after close; new loads fail clearly
+    assert archive[10].evaluate(x = 2, y = 1) == 21
+    with pytest.raises(ValueError, match = "closed"):
+        archive[11]
+
+    assert write_archive("unnamed.glx", compiled[:3]) == 3
+    with Archive("unnamed.glx") as archive:
+        assert archive.names() == {} and [item.source for item in archive] == [item.source for item in compiled[:3]]
+
+def test_archive_checksum_and_version_fallback():
+    write_archive("formulas.glx", [compile_expression("x + 1"), compile_expression("2 * y")])
+    with open("formulas.glx", "rb") as archive:
+        data = bytearray(archive.read())
+
+    # A record from another format version is re-parsed from its source text
+    first = data.index(b"x+1") - 6
+    data[first] = 99
+    with open("other_version.glx", "wb") as archive:
+        archive.write(data)
+    with Archive("other_version.glx", verify = False) as archive:
+        assert archive[0].evaluate(x = 1) == 2
+
+    with Archive("other_version.glx") as archive:
+        with pytest.raises(ValueError, match = "checksum"):
+            archive[0]
+        assert archive[1].evaluate(y = 2) == 4
+
+    with open("not_an_archive.glx", "wb") as archive:
+        archive.write(b"graphalith" * 4)
+    with pytest.raises(ValueError):
+        Archive("not_an_archive.glx")
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from graphalith.client import AsyncClient
+from graphalith.server import EvaluationServer, LatencyHistogram
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(lowest = 0.001, buckets = 8)
+    for milliseconds in [1] * 90 + [10] * 9 + [100]:
+        histogram.record(milliseconds / 1000)
+
+    assert histogram.count == 100 and histogram.max == 0.1
+    assert histogram.percentile(50) == 0.001
+    assert histogram.percentile(99) == 0.016
+    assert histogram.percentile(100) == 0.1
+    assert sum(count for _, count in histogram.snapshot()["buckets"]) == 100
+
+def test_server_tcp_batches_concurrent_requests():
+    async def scenario():
+        server = EvaluationServer(jobs = 0, max_delay = 0.01)
+        host, port = await server.start_tcp("127.0.0.1", 0)
+        try:
+            async with await AsyncClient.connect(host, port) as client:
+                values = await asyncio.gather(*(client.evaluate("x * 2 + 1", x = i) for i in range(200)))
+                assert values == [i * 2 + 1 for i in range(200)]
+
+                assert await client.evaluate("1 / 3", mode = "fraction") == "1/3"
+                with pytest.raises(RuntimeError, match = "ZeroDivisionError"):
+                    await client.evaluate("1 / 0")
+                with pytest.raises(RuntimeError, match = "NameError"):
+                    await client.evaluate("y + 1")
+
+                stats = await client.stats()
+                assert stats["requests"] == 203 and stats["errors"] == 2
+                assert stats["batches"] < stats["requests"]
+                assert stats["latency"]["count"] == 203
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+def test_server_unix_socket_backpressure_and_bad_lines(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "graphalith.sock")
+        server = EvaluationServer(jobs = 1, max_batch = 4, queue_size = 2)
+        await server.start_unix(path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            lines = [json.dumps({"id": i, "expression": f"{i} + 1"}) for i in range(500)]
+            writer.write(("\n".join(lines[:2] + ["not json", '{"expression": 5}'] + lines[2:]) + "\n").encode())
+            await writer.drain()
+
+            responses = [json.loads(await reader.readline()) for _ in range(502)]
+            writer.close()
+
+            assert responses[2]["error"].startswith("ValueError") and responses[3]["error"].startswith("ValueError")
+            answered = responses[:2] + responses[4:]
+            assert [response["id"] for response in answered] == list(range(500))
+            assert all(response["value"] == response["id"] + 1 for response in answered)
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+def test_server_sends_non_finite_values_as_strict_json():
+    def strict(constant):
+        raise AssertionError(f"non-standard JSON constant {constant}")
+
+    async def scenario():
+        server = EvaluationServer(jobs = 0)
+        host, port = await server.start_tcp("127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            expressions = ["1e308 * 10", "-1e308 * 10", "1e308 * 10 - 1e308 * 10", "0.5"]
+            writer.write("".join(json.dumps({"expression": text}) + "\n" for text in expressions).encode())
+            await writer.drain()
+            values = [json.loads(await reader.readline(), parse_constant = strict)["value"] for _ in expressions]
+            writer.close()
+            assert values == ["inf", "-inf", "nan", 0.5]
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import pytest
+
+from graphalith.base import Expression
+from graphalith.cache import compile_expression
+from graphalith.tree import Opcode
+
+def test_simplify_folds_constants_and_identities():
+    dag = compile_expression("2 * 3 + x").simplify()
+    assert dag.constants == [6.0] and dag.variables == ["x"]
+    assert dag.stats() == {"nodes_before": 5, "nodes_after": 3, "rewrites": 1}
+
+    dag = compile_expression("0 + x * 1 - 0").simplify()
+    assert list(dag.opcodes) == [Opcode.LOAD] and dag.evaluate(x = 4) == 4
+
+    dag = compile_expression("0 - x").simplify()
+    assert list(dag.opcodes) == [Opcode.LOAD, Opcode.NEGATE]
+
+def test_simplify_hash_conses_subexpressions():
+    dag = compile_expression("(a + b) * (b + a)").simplify()
+    assert list(dag.opcodes) == [Opcode.LOAD, Opcode.LOAD, Opcode.ADD, Opcode.MULTIPLY]
+    assert dag.rewrites == 0 and dag.evaluate(a = 1, b = 2) == 9
+
+def test_simplify_large_repeated_formula():
+    source = "x * y - 3 / x"
+    for _ in range(10):
+        source = f"({source}) + ({source})"
+    compiled = compile_expression(source)
+    dag = compiled.simplify()
+
+    assert dag.nodes_before == len(compiled) and len(dag) < 30
+    assert dag.evaluate(x = 1.5, y = 2) == pytest.approx(compiled.evaluate(x = 1.5, y = 2))
+
+def test_simplify_keeps_failing_folds():
+    dag = compile_expression("1 / 0 + x").simplify()
+    with pytest.raises(ZeroDivisionError):
+        dag.evaluate(x = 1)
+
+    dag = compile_expression("7 / 2", mode = "int").simplify()
+    with pytest.raises(ArithmeticError):
+        dag.evaluate()
+    assert compile_expression("6 / 2", mode = "fraction").simplify().evaluate() == 3
+
+def test_expression_simplified():
+    assert not Expression(value = "2 + 3").simplified
+    assert not Expression(value = "x * 1").simplified
+    assert Expression(value = "x + 2").simplified
+    assert Expression(value = "5").simplified
+    assert not Expression(value = "2 + ").simplified
@@ -0,0 +1,60 @@
+import io
+import random
+import tracemalloc
+
+import pytest
+
+from graphalith.cache import compile_expression
+from graphalith.lexer import tokenize
+from graphalith.parser import ParseError, parse
+from graphalith.stream import evaluate_stream, parse_stream
+
+FORMULAS = ["1.5e-3 * 2000 + 12345.678", "2x(1 - x) / [y + 0.25]", "-(-3 * {4 - 6}) -- 7",
+            "variable_name * 3e2 + .5 - 1.E1", "((((1 + 2) * 3) - 4) / 5)"]
+
+def split(text: str, rng: random.Random) -> list:
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(1, 8))))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+def test_any_chunking_matches_whole_text():
+    rng = random.Random(7)
+    bindings = {"x": 3, "y": 0.75, "variable_name": 2}
+    for formula in FORMULAS:
+        expected = compile_expression(formula).evaluate(**bindings)
+        for _ in range(50):
+            assert evaluate_stream(split(formula, rng), bindings = bindings) == expected
+        assert evaluate_stream(iter(formula), bindings = bindings) == expected
+
+    exact = evaluate_stream(split("1/3 + 1/6 + 2(x)", rng), mode = "fraction", bindings = {"x": 1})
+    assert str(exact) == "5/2"
+
+def test_memory_depends_on_nesting_not_length():
+    peaks = []
+    for terms in (5000, 20000):
+        tracemalloc.start()
+        total = evaluate_stream(f"{'+' if i else ''}{i}*2 - 1" for i in range(terms))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert total == terms * (terms - 1) - terms
+
+    # Four times the input (about 220 KB of text) needs no more memory
+    assert peaks[1] < peaks[0] * 1.25 and peaks[1] < 200 * 1024
+
+def test_errors_report_offsets_in_whole_input():
+    for text in ["1 + (2 * 3", "1 + 2 * ]", "1 + 2 +", "4 * (2 ] - 1", "3 $ 4"]:
+        with pytest.raises(ParseError) as whole:
+            parse(tokenize(text))
+        with pytest.raises(ParseError) as streamed:
+            parse_stream(list(text))
+        assert streamed.value.position == whole.value.position
+        assert str(streamed.value) == str(whole.value)
+
+    with pytest.raises(NameError):
+        evaluate_stream("2 * z")
+
+def test_file_and_bytes_inputs():
+    text = " + ".join(f"{i}.5" for i in range(1000))
+    expected = compile_expression(text).evaluate()
+    assert evaluate_stream(io.StringIO(text)) == expected
+    assert evaluate_stream(io.BytesIO(text.encode())) == expected
+    assert evaluate_stream(text.encode()[i:i + 7] for i in range(0, len(text), 7)) == expected
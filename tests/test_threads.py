@@ -0,0 +1,91 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+import pytest
+
+from graphalith import codegen
+from graphalith.cache import compile_expression
+from graphalith.threads import MIN_SLICE, evaluate_columns, evaluate_rows
+
+TEXT = "(x - 1) * [y + 2.5] / {x * x + 1} - -x"
+
+def expected(x: float, y: float) -> float:
+    return (x - 1) * (y + 2.5) / (x * x + 1) - -x
+
+def hammer(function, threads: int = 8) -> list:
+    """Runs function(thread index) on all threads at once, with frequent switches, and returns the results"""
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def target(k: int) -> None:
+        barrier.wait()
+        results[k] = function(k)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target = target, args = (k,)) for k in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+    return results
+
+@pytest.fixture
+def generations(monkeypatch) -> list:
+    calls = []
+    generate = codegen.generate
+
+    def counting(*args):
+        calls.append(threading.get_ident())
+        return generate(*args)
+    monkeypatch.setattr(codegen, "generate", counting)
+    return calls
+
+def test_shared_expression_promotes_once_under_contention(generations):
+    compiled = compile_expression(TEXT).with_backend("auto")  # a fresh run counter
+
+    def evaluate(k: int) -> list:
+        return [compiled.evaluate(x = k + i / 100, y = i) == expected(k + i / 100, i) for i in range(300)]
+
+    assert all(all(checks) for checks in hammer(evaluate))
+    assert compiled.generated and len(generations) == 1
+
+def test_failed_promotion_is_not_retried(generations):
+    deep = compile_expression("(" * (codegen.MAX_DEPTH + 10) + "x" + " + 1)" * (codegen.MAX_DEPTH + 10))
+    results = hammer(lambda k: {deep.evaluate(x = k) for _ in range(200)})
+    assert results == [{k + codegen.MAX_DEPTH + 10.0} for k in range(8)]
+    assert not deep.generated and len(generations) == 1
+
+def test_evaluate_rows_keeps_order_and_raises():
+    compiled = compile_expression(TEXT)
+    rows = [{"x": i / 7, "y": i % 13} for i in range(5000)]
+    with ThreadPoolExecutor(4) as executor:
+        assert evaluate_rows(compiled, rows, chunk_size = 64, executor = executor) == [expected(**row) for row in rows]
+    assert evaluate_rows(compile_expression("x / 3", mode = "fraction"), [{"x": 1}, {"x": 2}], jobs = 2) == [Fraction(1, 3), Fraction(2, 3)]
+
+    with pytest.raises(NameError):
+        evaluate_rows(compiled, rows[:10] + [{"x": 1}], chunk_size = 4)
+    with pytest.raises(ZeroDivisionError):
+        evaluate_rows(compile_expression("1 / x"), [{"x": 1}] * 100 + [{"x": 0}], chunk_size = 8, jobs = 3)
+    assert evaluate_rows(compiled, []) == []
+
+def test_evaluate_columns_matches_evaluate_array():
+    numpy = pytest.importorskip("numpy")
+    compiled = compile_expression(TEXT)
+    x = numpy.linspace(-5, 5, 4 * MIN_SLICE + 3)
+    assert numpy.array_equal(evaluate_columns(compiled, jobs = 4, x = x, y = 0.5), compiled.evaluate_array(x = x, y = 0.5))
+
+    grid = numpy.linspace(0, 1, 9 * MIN_SLICE).reshape(-1, 3)
+    out = numpy.empty_like(grid)
+    with ThreadPoolExecutor(3) as executor:
+        assert evaluate_columns(compiled, executor = executor, jobs = 3, out = out, x = grid, y = grid[:1]) is out
+    assert numpy.array_equal(out, compiled.evaluate_array(x = grid, y = grid[:1]))
+
+    assert numpy.array_equal(evaluate_columns(compiled, jobs = 4, x = x[:10], y = 1), compiled.evaluate_array(x = x[:10], y = 1))
+    with pytest.raises(NameError):
+        evaluate_columns(compiled, jobs = 4, x = x)
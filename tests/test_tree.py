@@ -0,0 +1,29 @@
+from graphalith.lexer import tokenize
+from graphalith.parser import parse
+from graphalith.tree import FlatTree, Opcode
+
+def test_flat_tree_traversals():
+    tree = FlatTree.from_tokens(tokenize("(a + 2) * -b"))
+    labels = lambda order: [tree.label(i) for i in order]
+
+    assert labels(tree.postorder()) == ["a", 2.0, Opcode.ADD, "b", Opcode.NEGATE, Opcode.MULTIPLY]
+    assert labels(tree.dfs()) == [Opcode.MULTIPLY, Opcode.ADD, "a", 2.0, Opcode.NEGATE, "b"]
+    assert labels(tree.bfs()) == [Opcode.MULTIPLY, Opcode.ADD, Opcode.NEGATE, "a", 2.0, "b"]
+    assert tree.evaluate(a = 1, b = 2) == -6
+
+def test_flat_tree_node_round_trip():
+    root = parse(tokenize("x / (3 - y) + 3 * x"))
+    tree = FlatTree.from_node(root)
+
+    assert tree.variables == ["x", "y"] and tree.constants == [3.0]
+    value = lambda token: token.value if token.value is not None else token.text
+    assert [value(token) for token in tree.to_node().bfs()] == [value(token) for token in root.bfs()]
+    assert FlatTree.from_node(tree.to_node()).opcodes == tree.opcodes
+
+def test_flat_tree_large():
+    source = "+".join(["1"] * 100000)
+    tree = FlatTree.from_tokens(tokenize(source))
+
+    assert len(tree) == 199999 and tree.nbytes / len(tree) <= 5
+    assert tree.evaluate() == 100000
+    assert sum(1 for _ in tree.dfs()) == len(tree)
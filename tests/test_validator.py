@@ -0,0 +1,42 @@
+import random
+
+from graphalith.lexer import tokenize
+from graphalith.parser import ParseError, parse
+from graphalith.validator import Issue, is_valid, validate
+
+def issues(text: str) -> list:
+    return [(diagnostic.issue, text[diagnostic.start:diagnostic.end]) for diagnostic in validate(text)]
+
+def test_reports_each_problem_with_its_span():
+    assert issues("") == [(Issue.EMPTY, "")]
+    assert issues("2 + @ * 3") == [(Issue.UNKNOWN_CHARACTER, "@")]
+    assert issues("(2 + [3 - 1))") == [(Issue.MISMATCHED_DELIMITER, "[3 - 1)")]
+    assert issues("(2 + 3") == [(Issue.UNCLOSED_DELIMITER, "(")]
+    assert issues("2 + 3)") == [(Issue.UNMATCHED_DELIMITER, ")")]
+    assert issues("* 2 + ()") == [(Issue.MISSING_OPERAND, "*"), (Issue.MISSING_OPERAND, ")")]
+    assert issues("2 * / 3 -") == [(Issue.MISSING_OPERAND, "/"), (Issue.MISSING_OPERAND, "-")]
+    assert issues("5 / 0 + 1 / - -0.0e5 + x / 0x") == [(Issue.DIVISION_BY_ZERO, "/ 0"),
+                                                      (Issue.DIVISION_BY_ZERO, "/ - -0.0e5"),
+                                                      (Issue.DIVISION_BY_ZERO, "/ 0")]
+
+def test_accepts_what_the_parser_accepts():
+    for text in ["2x(1 - x)", "-3 * --4", "[a] {b} <c>", "1 / 0.5", "1 / (0)", "+7", "x / y0"]:
+        assert validate(text) == [] and is_valid(tokenize(text)), text
+
+def test_agrees_with_parser_on_random_input():
+    rng = random.Random(3)
+    alphabet = ["1", "0", "x", "+", "-", "*", "/", "(", ")", "[", "]", " ", "$"]
+    for _ in range(3000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+        diagnostics = [d for d in validate(text) if d.issue != Issue.DIVISION_BY_ZERO]
+        try:
+            parse(tokenize(text))
+            parsed = True
+        except ParseError:
+            parsed = False
+        assert parsed == (not diagnostics), text
+
+def test_limit_stops_early():
+    text = "@ " * 1000
+    assert len(validate(text)) == 1000
+    assert len(validate(text, limit = 3)) == 3 and not is_valid(text)
@@ -0,0 +1,43 @@
+from array import array
+
+import pytest
+
+from graphalith.base import*
+
+numpy = pytest.importorskip("numpy")
+
+def test_evaluate_array_matches_scalar():
+    compiled = Expression(value = "2x*x - (x + y) / 3 + -y").compile()
+    x = numpy.linspace(-5, 5, 101)
+    y = numpy.arange(101, dtype = float)
+
+    result = compiled.evaluate_array(x = x, y = y)
+    expected = [compiled.evaluate(x = a, y = b) for a, b in zip(x.tolist(), y.tolist())]
+    assert numpy.allclose(result, expected)
+
+def test_evaluate_array_out_and_buffers():
+    compiled = Expression(value = "(x + 1) * (x - 1)").compile()
+    x = array("d", [0.0, 1.0, 2.0, 3.0])
+    out = numpy.empty(4)
+
+    assert compiled.evaluate_array(out = out, x = x) is out
+    assert out.tolist() == [-1.0, 0.0, 3.0, 8.0]
+
+    with pytest.raises(ValueError):
+        compiled.evaluate_array(out = numpy.empty(3), x = x)
+
+def test_evaluate_array_division_by_zero():
+    compiled = Expression(value = "1 / x + 1 / 0 * 0").compile()
+    result = compiled.evaluate_array(x = numpy.array([2.0, 0.0]))
+    assert numpy.isnan(result).all()
+
+    result = Expression(value = "x / (x - 1)").compile().evaluate_array(x = numpy.array([2.0, 1.0]))
+    assert result[0] == 2.0 and numpy.isnan(result[1])
+
+def test_evaluate_array_broadcast_and_missing():
+    compiled = Expression(value = "x * y").compile()
+    result = compiled.evaluate_array(x = numpy.arange(3.0)[:, None], y = numpy.arange(4.0))
+    assert result.shape == (3, 4)
+
+    with pytest.raises(NameError):
+        compiled.evaluate_array(x = numpy.arange(3.0))
@@ -0,0 +1,86 @@
+import pytest
+
+from graphalith.base import Expression
+from graphalith.workspace import Workspace
+
+def test_workspace_recalculates_only_downstream():
+    workspace = Workspace()
+    workspace.update(price = 100, rate = 0.2, other = 1)
+    workspace.add(Expression(name = "tax", value = "price * rate"))
+    workspace.add(Expression(name = "total", value = "price + tax"))
+    workspace.add(Expression(name = "unrelated", value = "other * 2"))
+
+    assert workspace.recalculate() == 3
+    assert workspace["total"] == 120 and workspace.dependents("price") == {"tax", "total"}
+
+    workspace.set("rate", 0.5)
+    assert workspace.recalculate() == 2 and workspace["total"] == 150
+    assert workspace.recalculate() == 0
+
+    # A formula recomputed to the same value does not re-evaluate its dependents
+    workspace.add(Expression(name = "tax", value = "rate * price"))
+    assert workspace.recalculate() == 1
+
+def test_workspace_detects_cycles():
+    workspace = Workspace()
+    workspace.add(Expression(name = "a", value = "b + 1"))
+    workspace.add(Expression(name = "b", value = "c * 2"))
+
+    with pytest.raises(ValueError, match = "c -> a -> b -> c"):
+        workspace.add(Expression(name = "c", value = "a - 1"))
+    with pytest.raises(ValueError):
+        workspace.add(Expression(name = "d", value = "d + 1"))
+    assert "c" not in workspace
+
+def test_workspace_errors_and_forward_references():
+    workspace = Workspace()
+    workspace.add(Expression(name = "ratio", value = "x / y"))
+    workspace.add(Expression(name = "scaled", value = "ratio * 10"))
+
+    with pytest.raises(NameError):
+        workspace["ratio"]
+    with pytest.raises(ValueError):
+        workspace["scaled"]
+
+    workspace.add(Expression(name = "x", value = "3"))
+    workspace.set("y", 0)
+    with pytest.raises(ZeroDivisionError):
+        workspace["ratio"]
+
+    workspace.set("y", 2)
+    assert workspace["scaled"] == 15
+
+    workspace.remove("y")
+    with pytest.raises(NameError):
+        workspace["ratio"]
+
+def test_workspace_records_non_numeric_inputs_as_cell_errors():
+    workspace = Workspace()
+    workspace.update(x = 6, y = "two", z = 1)
+    workspace.add(Expression(name = "ratio", value = "x / y"))
+    workspace.add(Expression(name = "scaled", value = "ratio * 10"))
+    workspace.add(Expression(name = "next", value = "z + 1"))
+
+    assert workspace.recalculate() == 3
+    with pytest.raises(TypeError):
+        workspace["ratio"]
+    with pytest.raises(ValueError):
+        workspace["scaled"]
+    assert workspace["next"] == 2
+
+    workspace.set("y", 2)
+    assert workspace.recalculate() == 2 and workspace["scaled"] == 30 and workspace.recalculate() == 0
+
+def test_workspace_update_scales_with_change():
+    workspace = Workspace()
+    for i in range(1000):
+        workspace.set(f"x{i}", i)
+        workspace.add(Expression(name = f"f{i}", value = f"x{i} * 2 + 1"))
+    workspace.add(Expression(name = "chain0", value = "f0"))
+    for i in range(1, 50):
+        workspace.add(Expression(name = f"chain{i}", value = f"chain{i - 1} + 1"))
+    workspace.recalculate()
+
+    workspace.set("x0", 10)
+    assert workspace.recalculate() == 51
+    assert workspace["chain49"] == 21 + 49